@@ -9,9 +9,11 @@ from unfold.decorators import action, display
 from unfold.forms import AdminPasswordChangeForm, UserChangeForm, UserCreationForm
 from unfold.contrib.filters.admin import RangeDateFilter, DropdownFilter, AutocompleteSelectFilter, AutocompleteSelectMultipleFilter, TextFilter, ChoicesRadioFilter, RelatedDropdownFilter
 
-import jdatetime
 from datetime import datetime, timedelta
 
+from gym.jalali import format_datetime
+from gym.pricing import memoize_prices, memoized_price
+
 from .models import (
     SportFacility, SessionTime, PricingRule, Holiday, 
     ReservationPackage, RecurringReservation, Discount, 
@@ -220,9 +222,18 @@ class SessionTimeAdmin(ModelAdmin):
             obj.capacity,
             formatted_percentage_str  # پاس دادن رشته از قبل فرمت‌شده
         )
+
+    @memoize_prices
+    def changelist_view(self, request, extra_context=None):
+        return super().changelist_view(request, extra_context)
+
+    @memoize_prices
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        return super().change_view(request, object_id, form_url, extra_context)
+
     @display(description="قیمت")
     def display_price(self, obj):
-        price = obj.get_price()
+        price = memoized_price(obj, None, obj.get_price)
         formatted_price_str = f"{int(price):,}"
 
         return format_html(
@@ -251,7 +262,7 @@ class SessionTimeAdmin(ModelAdmin):
         else:
             return format_html(
                 '<div class="price-details"><strong>قیمت:</strong> {:,} تومان</div>',
-                int(obj.get_price())
+                int(memoized_price(obj, None, obj.get_price))
             )
 
 @admin.register(PricingRule)
@@ -559,6 +570,14 @@ class ReservationAdmin(ModelAdmin):
         }),
     )
     
+    @memoize_prices
+    def changelist_view(self, request, extra_context=None):
+        return super().changelist_view(request, extra_context)
+
+    @memoize_prices
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        return super().change_view(request, object_id, form_url, extra_context)
+
     @display(description="کاربر")
     def display_user(self, obj):
         return format_html(
@@ -766,7 +785,7 @@ class ReviewAdmin(ModelAdmin):
     
     @display(description="تاریخ")
     def display_date(self, obj):
-        jalali = jdatetime.datetime.fromgregorian(datetime=obj.created_at).strftime('%Y/%m/%d %H:%M')
+        jalali = format_datetime(obj.created_at)
         return format_html('<small>{}</small>', jalali)
     
     @display(description="اطلاعات رزرو")
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import hashlib
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -129,6 +130,35 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Seconds a worker may price with its compiled rules before re-checking the rules version in the database (gym/pricing.py)
+PRICING_ENGINE_CHECK_SECONDS = 5
+
+# Runtime data files shared by worker processes (e.g. the holiday bitset)
+DATA_DIR = BASE_DIR / 'data'
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# File based so that every worker process sees the same entries and invalidations.
+# One directory per database (named like the holiday bitset file), so projects or databases sharing
+# DATA_DIR never read each other's entries and cache.clear() only empties this database's directory.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': DATA_DIR / 'cache' / hashlib.sha1(str(DATABASES['default']['NAME']).encode()).hexdigest()[:12],
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+}
+
+# Seconds a cached capacity count or availability grid may live (gym/availability_cache.py)
+AVAILABILITY_CACHE_TIMEOUT = 300
+
+# Minutes a reservation promoted from the waitlist stays pending before it expires (gym/waitlist.py)
+WAITLIST_HOLD_MINUTES = 30
+
+# Minutes a seat stays held for checkout before it is reclaimed (gym/seat_holds.py)
+SEAT_HOLD_MINUTES = 10
+
 # Unfold settings
 UNFOLD = {
     "SITE_TITLE": "سیستم مدیریت سالن‌های ورزشی",
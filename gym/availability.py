@@ -0,0 +1,180 @@
+"""
+پرس‌وجوهای دسترس‌پذیری سانس‌ها.
+
+ظرفیت باقیمانده از شمارنده‌های SessionDayOccupancy، وضعیت تعطیلی از تقویم کش‌شده
+(gym/holidays.py)، آخر هفته از بیت‌ست تعطیلات (gym/holiday_bitset.py) و قیمت از تقویم قیمت
+برداری (gym/price_calendar.py) خوانده می‌شود؛
+هزینه هر صفحه به تعداد سانس‌ها و روزها وابسته نیست.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .holiday_bitset import weekend_dates
+from .holidays import holidays_between
+from .jalali import format_date
+from .models import SessionDayOccupancy, SessionPriceSnapshot, SportFacility
+from .price_calendar import get_price_calendar
+from .snapshots import snapshot_horizon
+
+SEARCH_ORDERINGS = {
+    'price': ('final_price', 'date', 'session_time__start_minute', 'pk'),
+    'start': ('date', 'session_time__start_minute', 'final_price', 'pk'),
+}
+
+
+def _taken_seats(occupancies):
+    """{(session_time_id, date): (تعداد رزرو و نگه‌داری، اولین انقضای نگه‌داری)}"""
+    return {
+        (session_time_id, date): (booked_count + held_count, next_hold_expiry)
+        for session_time_id, date, booked_count, held_count, next_hold_expiry in occupancies.values_list(
+            'session_time_id', 'date', 'booked_count', 'held_count', 'next_hold_expiry'
+        )
+    }
+
+
+def week_bounds(day):
+    """شنبه و جمعه هفته شمسی شامل day"""
+    start = day - timedelta(days=(day.weekday() + 2) % 7)
+    return start, start + timedelta(days=6)
+
+
+def availability_grid(facility, week_start):
+    """
+    جدول هفتگی سانس‌های فعال سالن در هفته شمسی شامل week_start.
+    خروجی لیستی از دیکشنری‌ها به ترتیب تاریخ و ساعت شروع است.
+    """
+    start_date, end_date = week_bounds(week_start)
+    session_times = list(facility.get_active_sessions().select_related('facility'))
+    if not session_times:
+        return []
+
+    occupancies = SessionDayOccupancy.objects.filter(
+        session_time__facility=facility,
+        date__gte=start_date,
+        date__lte=end_date
+    )
+    taken = _taken_seats(occupancies)
+    now = timezone.now()
+    expired = [slot for slot, (_, next_hold_expiry) in taken.items() if next_hold_expiry and next_hold_expiry <= now]
+    if expired:
+        # آزادسازی تنبل نگه‌داری‌های منقضی‌شده
+        from .seat_holds import reclaim_on_read
+
+        for session_time_id, date in expired:
+            reclaim_on_read(session_time_id, date, now)
+        taken = _taken_seats(occupancies)
+    holidays = holidays_between(start_date, end_date)
+    holiday_array = np.array(sorted(holidays), dtype='datetime64[D]')
+    weekends = weekend_dates(start_date, end_date)
+
+    grid = []
+    for session_time in session_times:
+        date = start_date + timedelta(days=session_time.day_of_week)
+        price = get_price_calendar(session_time, date, date, holidays=holiday_array).get(date)
+        seats, next_hold_expiry = taken.get((session_time.pk, date), (0, None))
+        remaining = max(0, session_time.capacity - seats)
+        grid.append({
+            'session_time': session_time,
+            'date': date,
+            'jalali_date': format_date(date),
+            'remaining_capacity': remaining,
+            'is_full': remaining == 0,
+            'price': price,
+            'is_holiday': date in holidays,
+            'is_weekend': date in weekends,
+            # پس از این زمان ممکن است جای نگه‌داشته‌شده‌ای آزاد شود
+            'hold_expires_at': next_hold_expiry,
+        })
+
+    grid.sort(key=lambda slot: (slot['date'], slot['session_time'].start_minute))
+    return grid
+
+
+def _facility_has(through, field, ids):
+    """شرط EXISTS روی جدول واسط ManyToMany سالن (بدون join و سطرهای تکراری)"""
+    return Exists(through.objects.filter(
+        sportfacility_id=OuterRef('session_time__facility_id'),
+        **{f'{field}__in': ids}
+    ))
+
+
+def search_open_slots(start_date, end_date, start_time=None, end_time=None, categories=None, tags=None,
+                      features=None, city=None, min_capacity=1, order_by='price', page=1, page_size=20):
+    """
+    جستجوی سانس‌های قابل رزرو همه سالن‌ها با یک پرس‌وجو برای هر صفحه.
+
+    هر سطر SessionPriceSnapshot یک سانس در یک تاریخ برگزاری است، پس جستجو روی قیمت‌های
+    ذخیره‌شده انجام می‌شود و ظرفیت باقیمانده از SessionDayOccupancy (رزروها و جاهای نگه‌داشته‌شده)
+    خوانده می‌شود. روزهای تعطیل حذف می‌شوند.
+    بازه به افق قیمت‌های ذخیره‌شده (امروز تا PRICE_SNAPSHOT_HORIZON_DAYS روز بعد) محدود می‌شود و بازه
+    اعمال‌شده در خروجی برگردانده می‌شود؛ تا وقتی قیمت‌ها با دستور build_price_snapshots ساخته نشده باشند
+    (یا دستور دوره‌ای افق را جلو نبرده باشد) نتیجه خالی است.
+    start_time/end_time: بازه ساعتی که سانس باید کاملاً داخل آن باشد.
+    categories/tags/features: شناسه‌ها (سالن باید حداقل یکی از هر فیلتر را داشته باشد).
+    order_by: 'price' یا 'start'؛ مقدار دیگر یا صفحه نامعتبر ValidationError.
+    خروجی: {'results': [...], 'page': ..., 'has_next': ..., 'start_date': ..., 'end_date': ...}
+    """
+    if order_by not in SEARCH_ORDERINGS:
+        raise ValidationError(_("ترتیب نامعتبر است؛ مقادیر مجاز: %(choices)s"),
+                              params={'choices': '، '.join(SEARCH_ORDERINGS)})
+    if page < 1 or page_size < 1:
+        raise ValidationError(_("شماره و اندازه صفحه باید مثبت باشند."))
+    horizon_start, horizon_end = snapshot_horizon()
+    start_date, end_date = max(start_date, horizon_start), min(end_date, horizon_end)
+
+    taken = SessionDayOccupancy.objects.filter(
+        session_time_id=OuterRef('session_time_id'),
+        date=OuterRef('date')
+    ).order_by().values(seats=F('booked_count') + F('held_count'))[:1]
+
+    slots = SessionPriceSnapshot.objects.filter(
+        date__gte=start_date,
+        date__lte=end_date,
+        session_time__is_active=True,
+        session_time__facility__is_active=True
+    ).exclude(
+        date__in=holidays_between(start_date, end_date)
+    )
+    if start_time is not None:
+        slots = slots.filter(session_time__start_minute__gte=start_time.hour * 60 + start_time.minute)
+    if end_time is not None:
+        slots = slots.filter(session_time__end_minute__lte=end_time.hour * 60 + end_time.minute)
+    if city is not None:
+        slots = slots.filter(session_time__facility__city=city)
+    for ids, through, field in [(categories, SportFacility.categories.through, 'category'),
+                                (tags, SportFacility.tags.through, 'tag'),
+                                (features, SportFacility.features.through, 'facilityfeature')]:
+        if ids:
+            slots = slots.filter(_facility_has(through, field, ids))
+
+    slots = slots.annotate(
+        remaining_capacity=F('session_time__capacity') - Coalesce(Subquery(taken), Value(0))
+    ).filter(
+        remaining_capacity__gte=min_capacity
+    ).order_by(
+        *SEARCH_ORDERINGS[order_by]
+    ).values(
+        'session_time_id', 'date', 'final_price', 'remaining_capacity',
+        facility_id=F('session_time__facility_id'),
+        facility_name=F('session_time__facility__name'),
+        session_name=F('session_time__session_name'),
+        start_time=F('session_time__start_time'),
+        end_time=F('session_time__end_time'),
+    )
+
+    offset = (page - 1) * page_size
+    # یک سطر اضافه برای تشخیص وجود صفحه بعد، بدون پرس‌وجوی شمارش
+    rows = list(slots[offset:offset + page_size + 1])
+    return {
+        'results': rows[:page_size],
+        'page': page,
+        'has_next': len(rows) > page_size,
+        'start_date': start_date,
+        'end_date': end_date,
+    }
@@ -0,0 +1,168 @@
+"""
+کش دسترس‌پذیری روی cache framework جنگو (CACHES['default']؛ FileBasedCache مشترک بین workerها).
+
+- تعداد جاهای گرفته‌شده (رزرو فعال و نگه‌داری) هر (سانس، تاریخ) با کلید gym:booked:<session_time_id>:<date>؛
+  ظرفیت باقیمانده با ظرفیت فعلی سانس محاسبه می‌شود، پس تغییر ظرفیت سانس کش را باطل نمی‌کند.
+  اولین انقضای نگه‌داری‌ها کنار مقدار ذخیره می‌شود و پس از آن، نگه‌داری‌های منقضی‌شده هنگام خواندن آزاد می‌شوند.
+- جدول هفتگی هر سالن با کلید gym:grid:<facility_id>:<نسل>:<شنبه هفته>.
+
+تغییر رزروها (سیگنال‌های post_save/post_delete در gym/signals.py) دقیقاً کلیدهای سانس، تاریخ
+و هفته مربوطه را حذف می‌کنند. تغییر قیمت‌ها، سانس‌ها و تعطیلات نسل جدول‌های یک سالن یا همه
+سالن‌ها را افزایش می‌دهد. حذف‌ها پس از commit تکرار می‌شوند تا مقدار خوانده‌شده از تراکنش
+قبلی در کش نماند؛ AVAILABILITY_CACHE_TIMEOUT سقف عمر هر مقدار است.
+کش فقط برای نمایش است: بررسی ظرفیت در Reservation.clean با read_taken_seats از شمارنده دیتابیس می‌خواند.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import availability_grid, week_bounds
+from .models import SessionDayOccupancy, SessionTime
+
+GRID_GENERATION_KEY = 'gym:grid-generation'
+
+_stats = {'capacity': [0, 0], 'grid': [0, 0]}
+_stats_lock = threading.Lock()
+
+
+def _timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300)
+
+
+def _record(kind, hit):
+    with _stats_lock:
+        _stats[kind][0 if hit else 1] += 1
+
+
+def cache_stats():
+    """تعداد hit و miss و نسبت hit هر نوع کش در پروسه جاری"""
+    with _stats_lock:
+        return {
+            kind: {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else 0,
+            }
+            for kind, (hits, misses) in _stats.items()
+        }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for counters in _stats.values():
+            counters[:] = [0, 0]
+
+
+def booked_key(session_time_id, date):
+    return f'gym:booked:{session_time_id}:{date.isoformat()}'
+
+
+def grid_generation_key(facility_id):
+    return f'{GRID_GENERATION_KEY}:{facility_id}'
+
+
+def _grid_key(facility_id, week_start):
+    generations = cache.get_many([GRID_GENERATION_KEY, grid_generation_key(facility_id)])
+    generation = f'{generations.get(GRID_GENERATION_KEY, 0)}.{generations.get(grid_generation_key(facility_id), 0)}'
+    return f'gym:grid:{facility_id}:{generation}:{week_start.isoformat()}'
+
+
+def _read_taken_seats(session_time_id, date):
+    return SessionDayOccupancy.objects.filter(
+        session_time_id=session_time_id,
+        date=date
+    ).values_list('booked_count', 'held_count', 'next_hold_expiry').first() or (0, 0, None)
+
+
+def read_taken_seats(session_time_id, date, now=None):
+    """
+    (تعداد جاهای گرفته‌شده، اولین انقضای نگه‌داری) مستقیم از شمارنده SessionDayOccupancy، بدون کش؛
+    نگه‌داری‌های منقضی‌شده پیش از شمارش آزاد می‌شوند.
+    """
+    from .seat_holds import reclaim_on_read
+
+    now = now or timezone.now()
+    booked_count, held_count, next_hold_expiry = _read_taken_seats(session_time_id, date)
+    if next_hold_expiry is not None and next_hold_expiry <= now:
+        reclaim_on_read(session_time_id, date, now)
+        booked_count, held_count, next_hold_expiry = _read_taken_seats(session_time_id, date)
+    return booked_count + held_count, next_hold_expiry
+
+
+def get_taken_seats(session_time_id, date):
+    """تعداد رزروهای فعال و جاهای نگه‌داشته‌شده سانس در تاریخ، از کش یا شمارنده SessionDayOccupancy"""
+    key = booked_key(session_time_id, date)
+    now = timezone.now()
+    cached = cache.get(key)
+    if cached is not None and (cached[1] is None or cached[1] > now):
+        _record('capacity', True)
+        return cached[0]
+    _record('capacity', False)
+
+    taken, next_hold_expiry = read_taken_seats(session_time_id, date, now)
+    cache.set(key, (taken, next_hold_expiry), _timeout())
+    return taken
+
+
+def get_availability_grid(facility, week_start):
+    """جدول هفتگی سالن (gym.availability.availability_grid) از کش؛ تا اولین انقضای نگه‌داری‌های آن معتبر است"""
+    week_start = week_bounds(week_start)[0]
+    key = _grid_key(facility.pk, week_start)
+    grid = cache.get(key)
+    _record('grid', grid is not None)
+    if grid is None:
+        grid = availability_grid(facility, week_start)
+        timeout = _timeout()
+        expiries = [slot['hold_expires_at'] for slot in grid if slot['hold_expires_at'] is not None]
+        if expiries:
+            timeout = max(1, min(timeout, int((min(expiries) - timezone.now()).total_seconds()) + 1))
+        cache.set(key, grid, timeout)
+    return grid
+
+
+def _delete_now_and_on_commit(keys):
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_slots(slots, facilities=None):
+    """
+    حذف کلیدهای تعداد رزرو و جدول هفتگی برای (session_time_id, date) های داده‌شده.
+    facilities: نگاشت اختیاری session_time_id به facility_id؛ موارد ناموجود از دیتابیس خوانده می‌شوند.
+    """
+    slots = {(session_time_id, date) for session_time_id, date in slots if session_time_id and date}
+    if not slots:
+        return
+    facilities = dict(facilities or {})
+    missing = {session_time_id for session_time_id, _ in slots} - facilities.keys()
+    if missing:
+        facilities.update(SessionTime.objects.filter(pk__in=missing).values_list('pk', 'facility_id'))
+    keys = [booked_key(session_time_id, date) for session_time_id, date in slots]
+    weeks = {
+        (facilities[session_time_id], week_bounds(date)[0])
+        for session_time_id, date in slots if session_time_id in facilities
+    }
+    keys += [_grid_key(facility_id, week_start) for facility_id, week_start in weeks]
+    _delete_now_and_on_commit(keys)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def invalidate_facility_grids(facility_id):
+    """باطل کردن همه جدول‌های هفتگی یک سالن (تغییر قیمت یا سانس‌ها)"""
+    _bump(grid_generation_key(facility_id))
+    transaction.on_commit(lambda: _bump(grid_generation_key(facility_id)))
+
+
+def invalidate_all_grids():
+    """باطل کردن جدول‌های هفتگی همه سالن‌ها (تغییر تعطیلات)"""
+    _bump(GRID_GENERATION_KEY)
+    transaction.on_commit(lambda: _bump(GRID_GENERATION_KEY))
@@ -0,0 +1,284 @@
+"""
+بنچمارک موتور قیمت‌گذاری در سطوح مختلف حجم داده.
+
+داده‌ها به صورت قطعی (با seed ثابت) و با bulk_create ساخته می‌شوند؛ برای هر عملیات
+زمان، تعداد پرس‌وجو و حافظه تخصیص‌یافته به ازای هر قیمت‌دهی اندازه‌گیری می‌شود.
+دستور benchmark_pricing این ماژول را روی یک دیتابیس موقت اجرا می‌کند.
+
+hammer_booking بار هم‌زمان رزرو روی آخرین ظرفیت‌های یک سانس را با چند thread شبیه‌سازی
+و توان عملیاتی، صدک 95 تاخیر و رزروهای بیش از ظرفیت را گزارش می‌کند.
+"""
+import queue
+import random
+import threading
+import time as clock
+import tracemalloc
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .booking import book_session
+from .models import Discount, Holiday, PricingRule, Reservation, SessionDayOccupancy, SessionTime, SportFacility
+from .holidays import invalidate_holiday_calendar
+from .pricing import invalidate_pricing_engine
+
+TIERS = {
+    'small': {'facilities': 10, 'rules': 0},
+    'medium': {'facilities': 100, 'rules': 20},
+    'large': {'facilities': 1000, 'rules': 200},
+}
+
+SESSION_HOURS = [(8, 10), (16, 18), (20, 22)]
+RULE_TYPES = [choice for choice, _ in PricingRule.RULE_TYPE_CHOICES]
+ADJUSTMENT_TYPES = [choice for choice, _ in PricingRule.ADJUSTMENT_TYPE_CHOICES]
+
+
+def seed(facilities, rules, start_date, seed_value=1404):
+    """ساخت داده‌های بنچمارک؛ خروجی: (سانس‌ها، تخفیف‌ها، کاربر)"""
+    rng = random.Random(seed_value)
+    User = get_user_model()
+    manager = User.objects.create_user(phone_number='09000000000', username='benchmark-manager')
+    customer = User.objects.create_user(phone_number='09000000001', username='benchmark-customer')
+
+    SportFacility.objects.bulk_create([
+        SportFacility(
+            name=f'سالن {index}',
+            capacity=50,
+            hourly_price=Decimal(rng.randint(10, 60) * 10000),
+            address='-',
+            manager=manager,
+        )
+        for index in range(facilities)
+    ], batch_size=1000)
+    facility_ids = list(SportFacility.objects.order_by('pk').values_list('pk', flat=True))
+
+    session_times = []
+    for facility_id in facility_ids:
+        for day in range(7):
+            for start_hour, end_hour in SESSION_HOURS:
+                price_type = rng.choice(['fixed', 'hourly', 'dynamic'])
+                session_time = SessionTime(
+                    facility_id=facility_id,
+                    session_name=f'{start_hour}-{end_hour}',
+                    day_of_week=day,
+                    start_time=time(start_hour),
+                    end_time=time(end_hour),
+                    capacity=20,
+                    price_type=price_type,
+                    fixed_price=Decimal(rng.randint(10, 60) * 10000),
+                    base_weekday_price=Decimal(rng.randint(10, 40) * 10000),
+                    base_weekend_price=Decimal(rng.randint(40, 80) * 10000),
+                )
+                # bulk_create متد save را صدا نمی‌زند
+                session_time.sync_minutes()
+                session_times.append(session_time)
+    SessionTime.objects.bulk_create(session_times, batch_size=1000)
+
+    pricing_rules = []
+    for facility_id in facility_ids:
+        for index in range(rules):
+            adjustment_type = rng.choice(ADJUSTMENT_TYPES)
+            days_of_week = ','.join(str(day) for day in sorted(rng.sample(range(7), rng.randint(1, 3))))
+            rule_start = start_date + timedelta(days=rng.randint(0, 300))
+            pricing_rules.append(PricingRule(
+                facility_id=facility_id,
+                name=f'قانون {index}',
+                rule_type=rng.choice(RULE_TYPES),
+                start_time_rule=time(rng.randint(6, 18)),
+                end_time_rule=time(rng.randint(19, 23)),
+                days_of_week=days_of_week,
+                days_of_week_mask=PricingRule.weekday_mask(days_of_week),
+                start_date=rule_start,
+                end_date=rule_start + timedelta(days=rng.randint(1, 90)),
+                price_adjustment_type=adjustment_type,
+                adjustment_value=Decimal(rng.randint(1, 30)) if adjustment_type.startswith('percentage')
+                else Decimal(rng.randint(1, 20) * 5000),
+                priority=rng.randint(0, 20),
+            ))
+    PricingRule.objects.bulk_create(pricing_rules, batch_size=2000)
+
+    # یک سال تعطیلات: تعطیلات یکبار مصرف و چند تعطیلی تکرارشونده شمسی
+    Holiday.objects.bulk_create(
+        [Holiday(date=start_date + timedelta(days=offset), description='تعطیل')
+         for offset in sorted(rng.sample(range(365), 26))] +
+        [Holiday(is_recurring=True, jalali_month=month, jalali_day=day, description='تعطیل سالانه')
+         for month, day in [(1, 1), (1, 2), (1, 12), (1, 13), (3, 14), (3, 15), (11, 22), (12, 29)]]
+    )
+
+    discounts = Discount.objects.bulk_create([
+        Discount(name='درصدی', discount_type='percentage', amount=Decimal('15'), target_type='code',
+                 code='BENCH-PCT', start_date=start_date, end_date=start_date + timedelta(days=400),
+                 max_discount=Decimal('100000'), user_usage_limit=3),
+        Discount(name='ثابت', discount_type='fixed', amount=Decimal('50000'), target_type='code',
+                 code='BENCH-FIX', start_date=start_date, end_date=start_date + timedelta(days=400),
+                 min_price=Decimal('100000'), usage_limit=1000),
+    ])
+    session_times = list(SessionTime.objects.select_related('facility').order_by('pk'))
+    return session_times, discounts, customer
+
+
+def quote_sample(session_times, start_date, count, seed_value=1404):
+    """نمونه قطعی از (سانس، تاریخ) در یک سال آینده، در روز هفته همان سانس"""
+    rng = random.Random(seed_value)
+    sample = []
+    for _ in range(count):
+        session_time = rng.choice(session_times)
+        week = rng.randint(0, 51)
+        offset = (session_time.day_of_week - (start_date.weekday() + 2) % 7) % 7
+        sample.append((session_time, start_date + timedelta(days=week * 7 + offset)))
+    return sample
+
+
+def measure(operation, arguments):
+    """اجرای operation روی همه ورودی‌ها و گزارش میانگین زمان، پرس‌وجو و حافظه به ازای هر فراخوانی"""
+    count = len(arguments)
+
+    with CaptureQueriesContext(connection) as queries:
+        started = clock.perf_counter()
+        for args in arguments:
+            operation(*args)
+        elapsed = clock.perf_counter() - started
+
+    # حافظه در یک اجرای جداگانه اندازه‌گیری می‌شود تا روی زمان‌سنجی اثر نگذارد
+    tracemalloc.start()
+    peak_total = 0
+    try:
+        for args in arguments:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            operation(*args)
+            peak_total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'calls': count,
+        'wall_ms_total': round(elapsed * 1000, 3),
+        'wall_us_per_call': round(elapsed * 1_000_000 / count, 2) if count else 0,
+        'queries_per_call': round(len(queries) / count, 3) if count else 0,
+        'alloc_peak_bytes_per_call': round(peak_total / count) if count else 0,
+    }
+
+
+def run(tier, quotes=500, start_date=None, facilities=None, rules=None):
+    """ساخت داده‌ها و اجرای بنچمارک؛ خروجی دیکشنری قابل تبدیل به JSON است"""
+    params = dict(TIERS[tier])
+    if facilities is not None:
+        params['facilities'] = facilities
+    if rules is not None:
+        params['rules'] = rules
+    start_date = start_date or date.today()
+
+    started = clock.perf_counter()
+    session_times, discounts, customer = seed(params['facilities'], params['rules'], start_date)
+    seed_seconds = clock.perf_counter() - started
+    # bulk_create سیگنال نمی‌فرستد؛ کش‌ها دستی باطل می‌شوند
+    invalidate_holiday_calendar()
+    invalidate_pricing_engine()
+
+    sample = quote_sample(session_times, start_date, quotes)
+    prices = [session_time.get_price_for_date(day) for session_time, day in sample]
+    results = {}
+
+    invalidate_holiday_calendar()
+    invalidate_pricing_engine()
+    results['get_price_for_date_cold'] = measure(
+        lambda session_time, day: session_time.get_price_for_date(day), sample
+    )
+    results['get_price_for_date_warm'] = measure(
+        lambda session_time, day: session_time.get_price_for_date(day), sample
+    )
+
+    def calculate_prices(session_time, day, discount):
+        Reservation(user=customer, session_time=session_time, date=day, discount=discount).calculate_prices()
+
+    results['calculate_prices'] = measure(
+        calculate_prices,
+        [(session_time, day, discounts[index % len(discounts)]) for index, (session_time, day) in enumerate(sample)]
+    )
+    results['calculate_discount_amount'] = measure(
+        lambda discount, price: discount.calculate_discount_amount(price, user=customer),
+        [(discounts[index % len(discounts)], price) for index, price in enumerate(prices)]
+    )
+
+    return {
+        'tier': tier,
+        'params': {**params, 'sessions': len(session_times), 'quotes': len(sample), 'start_date': start_date.isoformat()},
+        'database': connection.vendor,
+        'seed_seconds': round(seed_seconds, 3),
+        'results': results,
+    }
+
+
+def percentile(values, fraction):
+    """صدک به روش نزدیک‌ترین رتبه"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))]
+
+
+def hammer_booking(session_time, date, users, threads=8):
+    """
+    رزرو هم‌زمان یک سانس و تاریخ برای همه users با چند thread.
+    خروجی شامل تعداد رزروهای موفق و ردشده، توان عملیاتی، صدک 95 تاخیر و تعداد رزرو بیش از ظرفیت است.
+    """
+    pending = queue.Queue()
+    for user in users:
+        pending.put(user)
+    latencies, outcomes = [], []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                try:
+                    user = pending.get_nowait()
+                except queue.Empty:
+                    return
+                started = clock.perf_counter()
+                try:
+                    book_session(user, session_time, date)
+                    outcome = 'booked'
+                except ValidationError:
+                    outcome = 'rejected'
+                elapsed = clock.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    outcomes.append(outcome)
+        finally:
+            # هر thread اتصال دیتابیس جداگانه دارد
+            connection.close()
+
+    started = clock.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = clock.perf_counter() - started
+
+    active = Reservation.objects.filter(
+        session_time=session_time, date=date, status__in=Reservation.ACTIVE_STATUSES
+    ).count()
+    booked_count = SessionDayOccupancy.objects.filter(
+        session_time=session_time, date=date
+    ).values_list('booked_count', flat=True).first() or 0
+    return {
+        'attempts': len(outcomes),
+        'booked': outcomes.count('booked'),
+        'rejected': outcomes.count('rejected'),
+        'capacity': session_time.capacity,
+        'active_reservations': active,
+        'occupancy_count': booked_count,
+        'overbooked': max(0, active - session_time.capacity),
+        'threads': threads,
+        'seconds': round(elapsed, 3),
+        'throughput_per_second': round(len(outcomes) / elapsed, 1) if elapsed else 0,
+        'latency_p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'latency_p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+    }
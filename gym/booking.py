@@ -0,0 +1,105 @@
+"""
+سرویس رزرو سانس.
+
+بررسی‌ها، قیمت‌گذاری، محاسبه تخفیف، افزایش شمارنده ظرفیت و درج رزرو در یک تراکنش کوتاه
+انجام می‌شوند. جلوگیری از رزرو بیش از ظرفیت بر عهده محدودیت occupancy_within_capacity در
+دیتابیس است (gym/occupancy.py)؛ خطاهای تداخل تراکنش‌ها (قفل یا serialization) با تعداد
+محدود و فاصله تصاعدی دوباره امتحان می‌شوند.
+"""
+import random
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils.translation import gettext_lazy as _
+
+from .models import Discount, Reservation
+
+# تعداد تلاش‌ها و فاصله پایه بین آن‌ها (ثانیه) در صورت تداخل تراکنش‌ها
+MAX_ATTEMPTS = 8
+RETRY_DELAY = 0.005
+
+# وضعیت‌هایی که ردیف رزرو آن‌ها برای رزرو دوباره همان کاربر استفاده می‌شود
+REUSABLE_STATUSES = ('cancelled', 'expired')
+
+
+def get_discount(discount_code):
+    """تخفیف فعال با کد داده‌شده؛ در غیر این صورت ValidationError"""
+    discount = Discount.objects.filter(code=discount_code, is_active=True).first()
+    if discount is None or discount.is_expired():
+        raise ValidationError(_("کد تخفیف معتبر نیست."))
+    return discount
+
+
+def reservation_for(user, session_time, date):
+    """
+    ردیف رزرو کاربر برای سانس و تاریخ (یکتا در unique_together): ردیف لغو یا منقضی‌شده قبلی با پاک شدن
+    تخفیف و اطلاعات لغو دوباره استفاده می‌شود و در غیر این صورت ردیف جدید ساخته می‌شود (ذخیره نمی‌شود).
+    اگر کاربر رزرو فعال یا انجام‌شده داشته باشد ValidationError؛ باید داخل تراکنش فراخوانی شود.
+    """
+    reservation = Reservation.objects.select_for_update().filter(
+        user=user,
+        session_time=session_time,
+        date=date
+    ).first()
+    if reservation is None:
+        return Reservation(user=user, session_time=session_time, date=date)
+    if reservation.status not in REUSABLE_STATUSES:
+        raise ValidationError(_("شما قبلاً این سانس را در این تاریخ رزرو کرده‌اید."))
+    reservation.discount = None
+    reservation.cancellation_reason = ''
+    reservation.cancellation_date = None
+    reservation.hold_expires_at = None
+    return reservation
+
+
+def create_reservation(user, session_time, date, discount=None, status='pending'):
+    """
+    اعتبارسنجی، قیمت‌گذاری و درج رزرو (یا فعال کردن دوباره ردیف لغو یا منقضی‌شده قبلی کاربر)؛
+    باید داخل تراکنش (مثلاً run_with_retry) فراخوانی شود
+    """
+    reservation = reservation_for(user, session_time, date)
+    reservation.discount = discount
+    reservation.status = status
+    # قیمت‌ها در save محاسبه می‌شوند
+    reservation.full_clean(exclude=['original_price', 'final_price'], validate_unique=False)
+    if reservation.pk:
+        reservation.calculate_prices()
+    try:
+        with transaction.atomic():
+            reservation.save()
+    except IntegrityError:
+        # درج هم‌زمان همین کاربر برای همین سانس و تاریخ
+        if Reservation.objects.filter(user=user, session_time=session_time, date=date,
+                                      status__in=Reservation.ACTIVE_STATUSES).exists():
+            raise ValidationError(_("شما قبلاً این سانس را در این تاریخ رزرو کرده‌اید."))
+        raise ValidationError(_("ثبت رزرو با خطا مواجه شد؛ لطفاً دوباره تلاش کنید."))
+    if discount is not None and reservation.discount_id is None:
+        raise ValidationError(_("این کد تخفیف برای این رزرو قابل استفاده نیست."))
+    return reservation
+
+
+def run_with_retry(operation):
+    """
+    اجرای operation در یک تراکنش؛ در صورت تداخل با تراکنش‌های دیگر تا MAX_ATTEMPTS بار دوباره اجرا می‌شود
+    و پس از آن ValidationError برگردانده می‌شود.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return operation()
+        except OperationalError:
+            # قفل دیتابیس یا شکست serialization؛ کل تراکنش دوباره اجرا می‌شود
+            time.sleep(RETRY_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    raise ValidationError(_("سیستم در حال حاضر مشغول است؛ لطفاً دوباره تلاش کنید."))
+
+
+def book_session(user, session_time, date, discount_code=None):
+    """
+    رزرو یک سانس در یک تاریخ برای کاربر با وضعیت pending.
+    در صورت تکمیل ظرفیت، تعطیلی، تکراری بودن یا نامعتبر بودن تخفیف ValidationError برگردانده می‌شود؛
+    اگر پس از MAX_ATTEMPTS تلاش تراکنش همچنان با تراکنش‌های دیگر تداخل داشته باشد نیز همین‌طور.
+    """
+    discount = get_discount(discount_code) if discount_code else None
+    return run_with_retry(lambda: create_reservation(user, session_time, date, discount))
@@ -0,0 +1,122 @@
+"""
+ساخت، به‌روزرسانی و پرس‌وجوی جدول DateDimension.
+
+بازه جدول از DATE_DIMENSION_PAST_DAYS روز قبل تا DATE_DIMENSION_FUTURE_DAYS روز بعد از امروز است
+(پیش‌فرض 365 و 730). پرچم is_holiday پس از commit هر تغییر تعطیلات دوباره محاسبه می‌شود.
+
+شمارش و فهرست روزهای قابل رزرو رزروهای دوره‌ای و گزارش ماهانه رزروها روی همین جدول در SQL انجام
+می‌شوند. اگر جدول بازه را پوشش ندهد، یا داخل تراکنشی که تعطیلات را تغییر داده (و پرچم‌ها هنوز به‌روز
+نشده‌اند)، همان نتیجه از تقویم تعطیلات پروسه (gym.holidays) محاسبه می‌شود.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from . import holidays
+from .holiday_bitset import weekend_dates
+from .jalali import to_jalali
+from .models import DateDimension
+
+DEFAULT_PAST_DAYS = 365
+DEFAULT_FUTURE_DAYS = 730
+
+
+def dimension_span(today=None):
+    """بازه [شروع، پایان] پیش‌فرض جدول تاریخ"""
+    today = today or timezone.localdate()
+    past_days = getattr(settings, 'DATE_DIMENSION_PAST_DAYS', DEFAULT_PAST_DAYS)
+    future_days = getattr(settings, 'DATE_DIMENSION_FUTURE_DAYS', DEFAULT_FUTURE_DAYS)
+    return today - timedelta(days=past_days), today + timedelta(days=future_days)
+
+
+def build_date_dimension(start_date=None, end_date=None):
+    """
+    ساخت (upsert) سطرهای بازه داده‌شده با bulk_create.
+    تعداد سطرهای نوشته‌شده را برمی‌گرداند.
+    """
+    default_start, default_end = dimension_span()
+    start_date = start_date or default_start
+    end_date = end_date or default_end
+    holiday_set = holidays.holidays_between(start_date, end_date)
+    weekend_set = weekend_dates(start_date, end_date)
+
+    rows = []
+    current_date = start_date
+    while current_date <= end_date:
+        year, month, day = to_jalali(current_date)
+        persian_weekday = (current_date.weekday() + 2) % 7
+        rows.append(DateDimension(
+            date=current_date,
+            jalali_year=year,
+            jalali_month=month,
+            jalali_day=day,
+            persian_weekday=persian_weekday,
+            is_weekend=current_date in weekend_set,
+            is_holiday=current_date in holiday_set,
+        ))
+        current_date += timedelta(days=1)
+
+    DateDimension.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=['jalali_year', 'jalali_month', 'jalali_day', 'persian_weekday', 'is_weekend', 'is_holiday'],
+    )
+    return len(rows)
+
+
+def refresh_holiday_flags():
+    """
+    محاسبه دوباره is_holiday برای کل بازه موجود در جدول با تعداد ثابتی پرس‌وجو.
+    تعداد روزهای تعطیل بازه را برمی‌گرداند.
+    """
+    span = DateDimension.objects.aggregate(start=Min('date'), end=Max('date'))
+    if span['start'] is None:
+        return 0
+
+    holiday_dates = holidays.holidays_between(span['start'], span['end'])
+    DateDimension.objects.filter(is_holiday=True).exclude(date__in=holiday_dates).update(is_holiday=False)
+    DateDimension.objects.filter(date__in=holiday_dates, is_holiday=False).update(is_holiday=True)
+    return len(holiday_dates)
+
+
+def dimension_covers(start_date, end_date):
+    """آیا پرچم‌های جدول برای همه روزهای بازه قابل استفاده‌اند"""
+    if holidays.holidays_changed_in_transaction():
+        return False
+    return DateDimension.objects.covers(start_date, end_date)
+
+
+def bookable_dates(weekday, start_date, end_date):
+    """تاریخ‌های غیر تعطیل بازه در روز هفته شمسی weekday، به ترتیب"""
+    if dimension_covers(start_date, end_date):
+        return list(DateDimension.objects.bookable(start_date, end_date, weekday).values_list('date', flat=True))
+    return holidays.bookable_dates(weekday, start_date, end_date)
+
+
+def count_bookable(weekday, start_date, end_date):
+    """تعداد روزهای غیر تعطیل بازه در روز هفته شمسی weekday"""
+    if dimension_covers(start_date, end_date):
+        return DateDimension.objects.bookable(start_date, end_date, weekday).count()
+    return holidays.count_bookable(weekday, start_date, end_date)
+
+
+def monthly_report(reservations):
+    """
+    تعداد و جمع مبلغ نهایی رزروها به تفکیک ماه شمسی، با join روی DateDimension در یک پرس‌وجو.
+    خروجی: لیست {'jalali_year', 'jalali_month', 'reservations', 'revenue'} به ترتیب ماه؛
+    رزروهای خارج از بازه جدول با سال و ماه None برگردانده می‌شوند.
+    """
+    day = DateDimension.objects.filter(date=OuterRef('date'))
+    return list(
+        reservations.order_by().annotate(
+            jalali_year=Subquery(day.values('jalali_year')),
+            jalali_month=Subquery(day.values('jalali_month')),
+        ).values('jalali_year', 'jalali_month').annotate(
+            reservations=Count('pk'),
+            revenue=Sum('final_price'),
+        ).order_by('jalali_year', 'jalali_month')
+    )
@@ -0,0 +1,330 @@
+"""
+بیت‌ست سالانه تعطیلات، مشترک بین پروسه‌ها از طریق فایل memory-mapped.
+
+برای هر سال شمسی gym.jalali (FIRST_YEAR تا LAST_YEAR) دو بلوک 48 بایتی (366 بیت روز سال) نگه داشته می‌شود:
+بیت i ام بلوک اول تعطیل بودن و بیت i ام بلوک دوم آخر هفته بودن (پنج‌شنبه و جمعه) روز i ام سال (از صفر) است.
+weekend_dates و weekend_mask آخر هفته را برای تقویم قیمت و جدول هفتگی از همین بلوک می‌خوانند.
+فایل در DATA_DIR (پیش‌فرض BASE_DIR/data) و به ازای هر دیتابیس جداگانه ساخته می‌شود؛
+همه workerها آن را فقط‌خواندنی map می‌کنند و بررسی تعطیلی یک خواندن بیت است.
+
+محتوای یک فایل هرگز تغییر نمی‌کند: با تغییر Holiday فایل کامل در یک فایل موقت نوشته و با os.replace
+جایگزین می‌شود (نویسنده‌ها با قفل فایل .lock به ترتیب اجرا می‌شوند) و سپس پرچم وضعیت سرآیند فایل قبلی
+«جایگزین‌شده» می‌شود تا پروسه‌هایی که آن را map کرده‌اند فایل جدید را باز کنند.
+
+هر پروسه فقط وقتی از بیت‌ست استفاده می‌کند که با نسخه تقویم تعطیلات (gym.holidays) همگام باشد؛
+در غیر این صورت (مثلا داخل تراکنشی که تعطیلات را تغییر داده) Holiday.is_holiday از تقویم پروسه می‌خواند.
+همگام‌سازی بیرون از تراکنش انجام می‌شود: اثر انگشت جدول Holiday با فایل مقایسه و در صورت اختلاف
+(مثلا تغییرات بدون سیگنال) فایل دوباره ساخته می‌شود، پس rollback یک تغییر نیز بیت‌ست را از کار نمی‌اندازد.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from django.conf import settings
+from django.db import connection
+
+from .holidays import holiday_calendar_version, holidays_changed_in_transaction
+from .jalali import FIRST_YEAR, LAST_YEAR, MONTH_OFFSETS, is_leap, to_gregorian, to_jalali
+from .models import Holiday
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # ویندوز: بدون قفل فایل
+    fcntl = None
+
+MAGIC = b'GHB3'
+# magic، وضعیت فایل، اولین سال، تعداد سال‌ها، اثر انگشت جدول تعطیلات
+HEADER = struct.Struct('<4sIHH32s')
+STATE = struct.Struct('<I')
+STATE_CURRENT = 0
+STATE_SUPERSEDED = 1
+YEAR_BYTES = 48
+YEAR_COUNT = LAST_YEAR - FIRST_YEAR + 1
+BLOCK_BYTES = YEAR_COUNT * YEAR_BYTES
+HOLIDAY_OFFSET = HEADER.size
+WEEKEND_OFFSET = HEADER.size + BLOCK_BYTES
+FILE_SIZE = HEADER.size + 2 * BLOCK_BYTES
+# دفعات باز کردن دوباره فایل وقتی نسخه باز شده هم‌زمان جایگزین شود
+MAX_OPEN_ATTEMPTS = 3
+
+
+def bitset_path():
+    """مسیر فایل بیت‌ست برای دیتابیس فعلی"""
+    data_dir = Path(getattr(settings, 'DATA_DIR', Path(settings.BASE_DIR) / 'data'))
+    database = hashlib.sha1(str(connection.settings_dict['NAME']).encode()).hexdigest()[:12]
+    return data_dir / f'holidays-{database}.bin'
+
+
+def _holiday_rows():
+    return list(Holiday.objects.order_by('pk').values_list('date', 'is_recurring', 'jalali_month', 'jalali_day'))
+
+
+def holiday_fingerprint(rows):
+    return hashlib.sha256(repr(rows).encode()).digest()
+
+
+def _set_bit(block, year, day_of_year):
+    bit = (year - FIRST_YEAR) * YEAR_BYTES * 8 + day_of_year
+    block[bit >> 3] |= 1 << (bit & 7)
+
+
+@lru_cache(maxsize=None)
+def weekend_block():
+    """بلوک آخر هفته؛ به تعطیلات وابسته نیست و یک بار ساخته می‌شود"""
+    weekends = bytearray(BLOCK_BYTES)
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        # روز هفته شمسی اول فروردین؛ پنجشنبه (5) و جمعه (6) آخر هفته هستند
+        first_weekday = (to_gregorian(year, 1, 1).weekday() + 2) % 7
+        for day_of_year in range(366 if is_leap(year) else 365):
+            if (first_weekday + day_of_year) % 7 in (5, 6):
+                _set_bit(weekends, year, day_of_year)
+    return bytes(weekends)
+
+
+def holiday_block(rows):
+    """بلوک تعطیلات برای ردیف‌های (date, is_recurring, jalali_month, jalali_day)"""
+    holidays = bytearray(BLOCK_BYTES)
+    for date, is_recurring, jalali_month, jalali_day in rows:
+        if date is not None:
+            year, month, day = to_jalali(date)
+            if FIRST_YEAR <= year <= LAST_YEAR:
+                _set_bit(holidays, year, MONTH_OFFSETS[month - 1] + day - 1)
+        if is_recurring and jalali_month is not None and jalali_day is not None:
+            for year in range(FIRST_YEAR, LAST_YEAR + 1):
+                try:
+                    to_gregorian(year, jalali_month, jalali_day)
+                except ValueError:
+                    continue
+                _set_bit(holidays, year, MONTH_OFFSETS[jalali_month - 1] + jalali_day - 1)
+    return bytes(holidays)
+
+
+def _read_bit(buffer, offset, date):
+    """بیت تاریخ میلادی در بلوکی که از offset بافر شروع می‌شود؛ None خارج از سال‌های بلوک"""
+    year, month, day = to_jalali(date)
+    if not FIRST_YEAR <= year <= LAST_YEAR:
+        return None
+    bit = (year - FIRST_YEAR) * YEAR_BYTES * 8 + MONTH_OFFSETS[month - 1] + day - 1
+    return bool(buffer[offset + (bit >> 3)] >> (bit & 7) & 1)
+
+
+def _read_dates(buffer, offset, start_date, end_date):
+    """
+    مجموعه تاریخ‌های بیت‌دار بازه [start_date, end_date] در بلوکی که از offset بافر شروع می‌شود،
+    با پیمایش بایت‌های غیر صفر هر سال؛ None اگر بازه از سال‌های بلوک بیرون بزند
+    """
+    if start_date > end_date:
+        return set()
+    first_year, last_year = to_jalali(start_date)[0], to_jalali(end_date)[0]
+    if first_year < FIRST_YEAR or last_year > LAST_YEAR:
+        return None
+    dates = set()
+    for year in range(first_year, last_year + 1):
+        year_start = to_gregorian(year, 1, 1)
+        low = max((start_date - year_start).days, 0)
+        high = min((end_date - year_start).days, YEAR_BYTES * 8 - 1)
+        year_offset = offset + (year - FIRST_YEAR) * YEAR_BYTES
+        for index in range(low >> 3, (high >> 3) + 1):
+            byte = buffer[year_offset + index]
+            while byte:
+                day_of_year = index * 8 + (byte & -byte).bit_length() - 1
+                if low <= day_of_year <= high:
+                    dates.add(year_start + timedelta(days=day_of_year))
+                byte &= byte - 1
+    return dates
+
+
+@contextmanager
+def _write_lock(path):
+    """قفل انحصاری نویسنده‌ها روی فایل جداگانه .lock (فایل بیت‌ست خودش جایگزین می‌شود)"""
+    with open(path.with_name(path.name + '.lock'), 'a+b') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def write_bitset(path=None):
+    """
+    ساخت یا بازنویسی فایل بیت‌ست از جدول Holiday: فایل کامل در فایل موقت نوشته و جایگزین می‌شود
+    و فایل قبلی برای خواننده‌هایش جایگزین‌شده علامت می‌خورد.
+    """
+    path = Path(path or bitset_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _write_lock(path):
+        # ردیف‌ها داخل قفل خوانده می‌شوند تا نویسنده‌ای که زودتر خوانده، داده جدیدتر را بازنویسی نکند
+        rows = _holiday_rows()
+        descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=path.name)
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, STATE_CURRENT, FIRST_YEAR, YEAR_COUNT, holiday_fingerprint(rows)))
+                f.write(holiday_block(rows))
+                f.write(weekend_block())
+            try:
+                previous = open(path, 'r+b')
+            except FileNotFoundError:
+                previous = None
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        if previous is not None:
+            with previous:
+                previous.seek(4)
+                previous.write(STATE.pack(STATE_SUPERSEDED))
+    return path
+
+
+class HolidayBitset:
+    """نمای فقط‌خواندنی یک نسخه از فایل بیت‌ست؛ متدها بدون کپی از حافظه map‌شده می‌خوانند"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) != FILE_SIZE:
+            self._buffer.close()
+            raise ValueError(f"فایل بیت‌ست نامعتبر: {path}")
+        magic, _, first_year, year_count, self.fingerprint = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or first_year != FIRST_YEAR or year_count != YEAR_COUNT:
+            self._buffer.close()
+            raise ValueError(f"فایل بیت‌ست نامعتبر: {path}")
+
+    @property
+    def superseded(self):
+        """آیا فایل دیگری جای این نسخه را گرفته است"""
+        return STATE.unpack_from(self._buffer, 4)[0] != STATE_CURRENT
+
+    def is_holiday(self, date):
+        """تعطیل بودن تاریخ میلادی؛ None خارج از سال‌های فایل"""
+        return _read_bit(self._buffer, HOLIDAY_OFFSET, date)
+
+    def is_weekend(self, date):
+        """پنج‌شنبه یا جمعه بودن تاریخ میلادی؛ None خارج از سال‌های فایل"""
+        return _read_bit(self._buffer, WEEKEND_OFFSET, date)
+
+    def dates_between(self, start_date, end_date):
+        """مجموعه تاریخ‌های تعطیل بازه [start_date, end_date]؛ None اگر بازه از سال‌های فایل بیرون بزند"""
+        return _read_dates(self._buffer, HOLIDAY_OFFSET, start_date, end_date)
+
+    def weekend_dates_between(self, start_date, end_date):
+        """مجموعه پنج‌شنبه‌ها و جمعه‌های بازه؛ None اگر بازه از سال‌های فایل بیرون بزند"""
+        return _read_dates(self._buffer, WEEKEND_OFFSET, start_date, end_date)
+
+
+_bitset = None
+_bitset_lock = threading.Lock()
+# نسخه تقویم تعطیلات (gym.holidays) که فایل با آن همگام است؛ فقط پس از commit یا بیرون از
+# تراکنش و پس از مقایسه اثر انگشت تنظیم می‌شود.
+_synced_version = None
+
+
+def _open_current(path):
+    """باز کردن آخرین نسخه فایل؛ اگر هر بار هم‌زمان جایگزین شود، پس از MAX_OPEN_ATTEMPTS بار None"""
+    for _attempt in range(MAX_OPEN_ATTEMPTS):
+        bitset = HolidayBitset(path)
+        if not bitset.superseded:
+            return bitset
+    return None
+
+
+def _sync(version):
+    """همگام کردن بیت‌ست پروسه با جدول Holiday (در صورت اختلاف اثر انگشت، فایل بازنویسی می‌شود)"""
+    global _bitset, _synced_version
+    path = bitset_path()
+    try:
+        bitset = _open_current(path)
+    except (OSError, ValueError):
+        bitset = None
+    if bitset is None or bitset.fingerprint != holiday_fingerprint(_holiday_rows()):
+        write_bitset(path)
+        bitset = _open_current(path)
+    if bitset is not None:
+        _bitset, _synced_version = bitset, version
+    return bitset
+
+
+def refresh_holiday_bitset():
+    """بازنویسی فایل پس از commit تغییر تعطیلات؛ در صورت خطای فایل، خطا فقط ثبت می‌شود"""
+    global _bitset, _synced_version
+    version = holiday_calendar_version()
+    try:
+        write_bitset()
+        bitset = _open_current(bitset_path())
+    except (OSError, ValueError):
+        logger.exception("holiday bitset could not be written")
+        return
+    with _bitset_lock:
+        if bitset is not None:
+            _bitset, _synced_version = bitset, version
+
+
+def get_holiday_bitset():
+    """
+    بیت‌ست map‌شده پروسه جاری، یا None تا وقتی که با آخرین تغییر تعطیلات همگام نشده باشد
+    یا فایل قابل ساخت و خواندن نباشد (Holiday.is_holiday در این حالت از تقویم پروسه می‌خواند).
+    """
+    global _bitset
+    bitset = _bitset
+    if bitset is not None and _synced_version == holiday_calendar_version() and not bitset.superseded:
+        return bitset
+    # تراکنشی که تعطیلات را تغییر داده ردیف‌های commit نشده را می‌بیند و نباید فایل را بسازد
+    if holidays_changed_in_transaction():
+        return None
+    with _bitset_lock:
+        version = holiday_calendar_version()
+        bitset = _bitset
+        try:
+            if bitset is not None and _synced_version == version:
+                if not bitset.superseded:
+                    return bitset
+                # فایل پس از commit یا همگام‌سازی (در این یا پروسه دیگری) جایگزین شده است
+                bitset = _open_current(bitset_path())
+                if bitset is not None:
+                    _bitset = bitset
+                    return bitset
+            return _sync(version)
+        except (OSError, ValueError):
+            logger.exception("holiday bitset unavailable")
+            return None
+
+
+def weekend_dates(start_date, end_date):
+    """
+    مجموعه پنج‌شنبه‌ها و جمعه‌های بازه از بلوک آخر هفته فایل؛ بلوک به تعطیلات وابسته نیست، پس وقتی
+    فایل همگام یا در دسترس نیست همان بلوک از حافظه خوانده می‌شود. خارج از سال‌های gym.jalali با گام 7 روز.
+    """
+    bitset = get_holiday_bitset()
+    if bitset is not None:
+        dates = bitset.weekend_dates_between(start_date, end_date)
+    else:
+        dates = _read_dates(weekend_block(), 0, start_date, end_date)
+    if dates is not None:
+        return dates
+    from .holidays import weekday_dates
+
+    return set(weekday_dates(5, start_date, end_date) + weekday_dates(6, start_date, end_date))
+
+
+def is_weekend(date):
+    """پنج‌شنبه یا جمعه بودن تاریخ میلادی از بلوک آخر هفته"""
+    return date in weekend_dates(date, date)
+
+
+def weekend_mask(dates):
+    """ماسک بولی آخر هفته برای آرایه NumPy تاریخ‌ها (datetime64[D])"""
+    if not len(dates):
+        return np.zeros(dates.shape, dtype=bool)
+    weekends = weekend_dates(dates.min().item(), dates.max().item())
+    return np.isin(dates, np.array(sorted(weekends), dtype='datetime64[D]'))
@@ -0,0 +1,159 @@
+"""
+تقویم تعطیلات درون‌فرایندی.
+
+تعطیلات یکبار مصرف (مجموعه تاریخ‌های میلادی) و تکرارشونده (مجموعه زوج‌های
+(ماه، روز) شمسی) یک بار از دیتابیس خوانده و در حافظه نگه داشته می‌شوند.
+با ذخیره یا حذف Holiday، سیگنال‌های gym/signals.py کش را باطل و نسخه آن را افزایش می‌دهند.
+
+تراکنشی که تعطیلات را تغییر داده، تا پایان خود تقویم جداگانه‌ای روی اتصال خودش می‌خواند و
+کش مشترک را پر نمی‌کند؛ با rollback چیزی از تغییرات در حافظه نمی‌ماند و پس از commit کش دوباره باطل
+می‌شود تا تقویمی که پروسه‌های دیگر در طول تراکنش از داده‌های قبلی ساخته‌اند کنار گذاشته شود.
+"""
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from .jalali import to_gregorian, to_jalali
+from .models import Holiday
+
+
+def jalali_month_day(date):
+    """(ماه، روز) شمسی یک تاریخ میلادی؛ None اگر قابل تبدیل نباشد"""
+    try:
+        return to_jalali(date)[1:]
+    except ValueError:
+        return None
+
+
+class HolidayCalendar:
+    """تصویر فقط‌خواندنی از جدول تعطیلات در یک نسخه مشخص"""
+    __slots__ = ('version', 'dates', 'recurring')
+
+    def __init__(self, version, dates, recurring):
+        self.version = version
+        self.dates = frozenset(dates)
+        self.recurring = frozenset(recurring)
+
+    @classmethod
+    def load(cls, version):
+        rows = Holiday.objects.values_list('date', 'is_recurring', 'jalali_month', 'jalali_day')
+        dates, recurring = [], []
+        for date, is_recurring, jalali_month, jalali_day in rows:
+            if date is not None:
+                dates.append(date)
+            if is_recurring and jalali_month is not None and jalali_day is not None:
+                recurring.append((jalali_month, jalali_day))
+        return cls(version, dates, recurring)
+
+    def is_holiday(self, date):
+        if date in self.dates:
+            return True
+        return bool(self.recurring) and jalali_month_day(date) in self.recurring
+
+    def dates_between(self, start_date, end_date):
+        """مجموعه تاریخ‌های تعطیل بازه [start_date, end_date]، با تصویر تعطیلات تکرارشونده روی سال‌های شمسی بازه"""
+        holidays = {date for date in self.dates if start_date <= date <= end_date}
+        if self.recurring and start_date <= end_date:
+            for year in range(to_jalali(start_date)[0], to_jalali(end_date)[0] + 1):
+                for month, day in self.recurring:
+                    try:
+                        date = to_gregorian(year, month, day)
+                    except ValueError:
+                        continue
+                    if start_date <= date <= end_date:
+                        holidays.add(date)
+        return holidays
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+_version = 0
+
+
+def holidays_changed_in_transaction():
+    """آیا تراکنش جاری اتصال (بلوک atomic بیرونی آن) تعطیلات را تغییر داده است"""
+    state = getattr(connection, 'gym_holiday_transaction', None)
+    return state is not None and bool(connection.atomic_blocks) and state[0] is connection.atomic_blocks[0]
+
+
+def _transaction_calendar():
+    """تقویم خصوصی تراکنش جاری اگر در آن تعطیلات تغییر کرده باشد؛ در غیر این صورت None"""
+    if not holidays_changed_in_transaction():
+        return None
+    state = connection.gym_holiday_transaction
+    if state[1] is None or state[1].version != _version:
+        state[1] = HolidayCalendar.load(_version)
+    return state[1]
+
+
+def get_holiday_calendar():
+    """تقویم تعطیلات کش‌شده (در صورت نبود، با یک پرس‌وجو ساخته می‌شود)"""
+    global _calendar
+    calendar = _transaction_calendar()
+    if calendar is not None:
+        return calendar
+    calendar = _calendar
+    if calendar is None:
+        version = _version
+        calendar = HolidayCalendar.load(version)
+        with _calendar_lock:
+            if version == _version:
+                _calendar = calendar
+    return calendar
+
+
+def _invalidate():
+    global _calendar, _version
+    with _calendar_lock:
+        _version += 1
+        _calendar = None
+
+
+def invalidate_holiday_calendar():
+    """
+    باطل کردن تقویم کش‌شده؛ خواندن بعدی از دیتابیس انجام می‌شود.
+    داخل تراکنش، تا پایان آن تقویم خصوصی تراکنش استفاده و پس از commit کش دوباره باطل می‌شود.
+    """
+    _invalidate()
+    if connection.in_atomic_block:
+        connection.gym_holiday_transaction = [connection.atomic_blocks[0], None]
+        transaction.on_commit(_invalidate)
+
+
+def holiday_calendar_version():
+    """نسخه فعلی تقویم تعطیلات؛ با هر تغییر Holiday عوض می‌شود"""
+    return _version
+
+
+def weekday_dates(weekday, start_date, end_date):
+    """تاریخ‌های بازه که روز هفته شمسی آن‌ها weekday است (0 = شنبه)، با گام 7 روز"""
+    first = start_date + timedelta(days=(weekday - (start_date.weekday() + 2) % 7) % 7)
+    return [first + timedelta(days=7 * week) for week in range(max((end_date - first).days // 7 + 1, 0))]
+
+
+def holidays_between(start_date, end_date):
+    """
+    مجموعه تاریخ‌های تعطیل بازه؛ از بیت‌ست مشترک (gym/holiday_bitset.py) و در صورت نبود یا همگام نبودن آن
+    از تقویم کش‌شده پروسه (بدون پرس‌وجو در صورت وجود کش)، همان ترتیب Holiday.is_holiday
+    """
+    from .holiday_bitset import get_holiday_bitset
+
+    bitset = get_holiday_bitset()
+    if bitset is not None:
+        holidays = bitset.dates_between(start_date, end_date)
+        if holidays is not None:
+            return holidays
+    return get_holiday_calendar().dates_between(start_date, end_date)
+
+
+def bookable_dates(weekday, start_date, end_date):
+    """تاریخ‌های غیر تعطیل بازه در روز هفته weekday، به ترتیب"""
+    holidays = holidays_between(start_date, end_date)
+    return [date for date in weekday_dates(weekday, start_date, end_date) if date not in holidays]
+
+
+def count_bookable(weekday, start_date, end_date):
+    """تعداد روزهای غیر تعطیل بازه در روز هفته weekday"""
+    dates = weekday_dates(weekday, start_date, end_date)
+    return len(dates) - len(holidays_between(start_date, end_date).intersection(dates))
@@ -0,0 +1,90 @@
+"""
+تبدیل سریع تاریخ میلادی و شمسی با جدول‌های از پیش محاسبه‌شده.
+
+برای سال‌های شمسی FIRST_YEAR تا LAST_YEAR، سال/ماه/روز شمسی هر روز بر اساس
+ordinal میلادی آن در آرایه‌های فشرده نگه داشته می‌شود؛ تبدیل و قالب‌بندی فقط یک
+دسترسی به آرایه است. جدول‌ها در اولین استفاده از روی jdatetime ساخته می‌شوند و
+خارج از این بازه، تبدیل به خود jdatetime سپرده می‌شود. درستی جدول‌ها در
+gym/tests.py در کل بازه با jdatetime مقایسه می‌شود.
+"""
+from array import array
+from datetime import date as gregorian_date
+from functools import lru_cache
+
+import jdatetime
+
+FIRST_YEAR = 1200
+LAST_YEAR = 1499
+
+# طول ماه‌های شمسی؛ اسفند در سال کبیسه 30 روز است
+MONTH_LENGTHS = (31, 31, 31, 31, 31, 31, 30, 30, 30, 30, 30, 29)
+# فاصله اول هر ماه از اول فروردین
+MONTH_OFFSETS = (0, 31, 62, 93, 124, 155, 186, 216, 246, 276, 306, 336)
+
+
+@lru_cache(maxsize=None)
+def _tables():
+    """(ordinal اول فروردین هر سال، سال، ماه و روز شمسی هر روز)"""
+    year_starts = array('l', (
+        jdatetime.date(year, 1, 1).togregorian().toordinal()
+        for year in range(FIRST_YEAR, LAST_YEAR + 2)
+    ))
+    years, months, days = array('H'), array('B'), array('B')
+    for index in range(LAST_YEAR - FIRST_YEAR + 1):
+        year = FIRST_YEAR + index
+        year_length = year_starts[index + 1] - year_starts[index]
+        for month, offset in enumerate(MONTH_OFFSETS, start=1):
+            length = MONTH_LENGTHS[month - 1] if month < 12 else year_length - offset
+            years.extend([year] * length)
+            months.extend([month] * length)
+            days.extend(range(1, length + 1))
+    return year_starts, years, months, days
+
+
+def to_jalali(date):
+    """تبدیل تاریخ میلادی به (سال، ماه، روز) شمسی"""
+    year_starts, years, months, days = _tables()
+    index = date.toordinal() - year_starts[0]
+    if 0 <= index < len(years):
+        return years[index], months[index], days[index]
+    jalali_date = jdatetime.date.fromgregorian(date=date)
+    return jalali_date.year, jalali_date.month, jalali_date.day
+
+
+def is_leap(year):
+    """کبیسه بودن سال شمسی"""
+    if FIRST_YEAR <= year <= LAST_YEAR:
+        year_starts = _tables()[0]
+        index = year - FIRST_YEAR
+        return year_starts[index + 1] - year_starts[index] == 366
+    return jdatetime.date(year, 1, 1).isleap()
+
+
+def month_length(year, month):
+    """تعداد روزهای یک ماه شمسی"""
+    if month == 12:
+        return 30 if is_leap(year) else 29
+    return MONTH_LENGTHS[month - 1]
+
+
+def to_gregorian(year, month, day):
+    """
+    تبدیل تاریخ شمسی به datetime.date میلادی.
+    برای تاریخ نامعتبر (مثلا 30 اسفند سال غیر کبیسه) ValueError برمی‌گرداند.
+    """
+    if not (FIRST_YEAR <= year <= LAST_YEAR):
+        return jdatetime.date(year, month, day).togregorian()
+    if not (1 <= month <= 12 and 1 <= day <= month_length(year, month)):
+        raise ValueError(f"تاریخ شمسی نامعتبر: {year}/{month}/{day}")
+    return gregorian_date.fromordinal(_tables()[0][year - FIRST_YEAR] + MONTH_OFFSETS[month - 1] + day - 1)
+
+
+def format_date(date, separator='/'):
+    """قالب شمسی YYYY/MM/DD، معادل jdatetime.date.fromgregorian(date=date).strftime('%Y/%m/%d')"""
+    year, month, day = to_jalali(date)
+    return f"{year:04d}{separator}{month:02d}{separator}{day:02d}"
+
+
+def format_datetime(value):
+    """قالب شمسی YYYY/MM/DD HH:MM برای datetime (بدون تبدیل منطقه زمانی)"""
+    return f"{format_date(value)} {value.hour:02d}:{value.minute:02d}"
@@ -0,0 +1,51 @@
+import json
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from gym.benchmarks import hammer_booking
+from gym.holidays import bookable_dates
+from gym.models import SessionTime, SportFacility
+
+
+class Command(BaseCommand):
+    help = 'آزمون بار رزرو هم‌زمان آخرین ظرفیت‌های یک سانس روی دیتابیس موقت (توان عملیاتی، تاخیر و رزرو بیش از ظرفیت)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=10, help='ظرفیت سانس')
+        parser.add_argument('--users', type=int, default=200, help='تعداد کاربرانی که هم‌زمان رزرو می‌کنند')
+        parser.add_argument('--threads', type=int, default=8, help='تعداد thread ها')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            User = get_user_model()
+            manager = User.objects.create_user(phone_number='09000000000', username='benchmark-manager')
+            facility = SportFacility.objects.create(
+                name='سالن', capacity=options['capacity'], hourly_price=Decimal('100000'), address='-', manager=manager
+            )
+            session_time = SessionTime.objects.create(
+                facility=facility, session_name='بار', day_of_week=2, start_time=time(18), end_time=time(19),
+                capacity=options['capacity'], price_type='fixed', fixed_price=Decimal('200000')
+            )
+            tomorrow = timezone.localdate() + timedelta(days=1)
+            day = bookable_dates(session_time.day_of_week, tomorrow, tomorrow + timedelta(days=30))[0]
+            users = User.objects.bulk_create([
+                User(phone_number=f'09{index:09d}', username=f'benchmark-{index}')
+                for index in range(1, options['users'] + 1)
+            ])
+
+            report = hammer_booking(session_time, day, users, threads=options['threads'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        if report['overbooked']:
+            self.stdout.write(self.style.ERROR(f'{report["overbooked"]} رزرو بیش از ظرفیت ثبت شد.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('هیچ رزرو بیش از ظرفیتی ثبت نشد.'))
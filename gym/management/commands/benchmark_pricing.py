@@ -0,0 +1,68 @@
+import json
+from datetime import date
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from gym.benchmarks import TIERS, run
+
+
+class Command(BaseCommand):
+    help = 'بنچمارک قیمت‌گذاری (get_price_for_date، calculate_prices، calculate_discount_amount) روی دیتابیس موقت'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tier',
+            choices=list(TIERS),
+            action='append',
+            help='سطح داده (قابل تکرار)؛ پیش‌فرض: small و medium'
+        )
+        parser.add_argument('--quotes', type=int, default=500, help='تعداد قیمت‌دهی در هر عملیات')
+        parser.add_argument('--facilities', type=int, default=None, help='جایگزین تعداد سالن‌های سطح')
+        parser.add_argument('--rules', type=int, default=None, help='جایگزین تعداد قوانین هر سالن')
+        parser.add_argument(
+            '--start-date',
+            type=date.fromisoformat,
+            default=None,
+            help='تاریخ شروع داده‌ها (YYYY-MM-DD)؛ برای مقایسه اجراها ثابت نگه دارید'
+        )
+        parser.add_argument(
+            '--output',
+            default='pricing_benchmark.json',
+            help='مسیر فایل JSON خروجی'
+        )
+
+    def handle(self, *args, **options):
+        tiers = options['tier'] or ['small', 'medium']
+        reports = []
+
+        # داده‌ها در یک دیتابیس آزمایشی جداگانه ساخته و در پایان حذف می‌شوند
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            for tier in tiers:
+                self.stdout.write(f'در حال اجرای سطح {tier}...')
+                if reports:
+                    call_command('flush', interactive=False, verbosity=0)
+                report = run(
+                    tier,
+                    quotes=options['quotes'],
+                    start_date=options['start_date'],
+                    facilities=options['facilities'],
+                    rules=options['rules'],
+                )
+                reports.append(report)
+                for name, result in report['results'].items():
+                    self.stdout.write(
+                        f'  {name}: {result["wall_us_per_call"]} µs، '
+                        f'{result["queries_per_call"]} پرس‌وجو، '
+                        f'{result["alloc_peak_bytes_per_call"]} بایت به ازای هر قیمت‌دهی'
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump({'runs': reports}, output, ensure_ascii=False, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f'نتایج در {options["output"]} ذخیره شد.'))
@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from gym.date_dimension import build_date_dimension, dimension_span
+
+
+class Command(BaseCommand):
+    help = 'ساخت جدول ابعاد تاریخ (تاریخ شمسی، روز هفته، آخر هفته و تعطیلی) برای بازه مشخص'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            default=None,
+            help='تاریخ شروع (YYYY-MM-DD)؛ پیش‌فرض: DATE_DIMENSION_PAST_DAYS روز قبل'
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            default=None,
+            help='تاریخ پایان (YYYY-MM-DD)؛ پیش‌فرض: DATE_DIMENSION_FUTURE_DAYS روز بعد'
+        )
+
+    def handle(self, *args, **options):
+        default_start, default_end = dimension_span()
+        start_date = options['start'] or default_start
+        end_date = options['end'] or default_end
+
+        self.stdout.write(f'در حال ساخت جدول تاریخ از {start_date} تا {end_date}...')
+        count = build_date_dimension(start_date, end_date)
+
+        self.stdout.write(self.style.SUCCESS(f'{count} روز ذخیره شد.'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from gym.models import SessionPriceSnapshot, SessionTime
+from gym.snapshots import build_snapshots, snapshot_horizon
+
+
+class Command(BaseCommand):
+    help = 'ساخت قیمت‌های از پیش محاسبه‌شده سانس‌ها برای افق پیش رو'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='طول افق به روز، حداکثر PRICE_SNAPSHOT_HORIZON_DAYS (پیش‌فرض همان مقدار یا 90)'
+        )
+        parser.add_argument(
+            '--facility',
+            type=int,
+            action='append',
+            help='شناسه سالن (قابل تکرار)؛ بدون آن همه سالن‌ها ساخته می‌شوند'
+        )
+
+    def handle(self, *args, **options):
+        horizon_start, horizon_end = snapshot_horizon()
+        start_date, end_date = snapshot_horizon(days=options['days'])
+        # سیگنال‌ها فقط افق تنظیم‌شده را به‌روز می‌کنند؛ قیمت‌های بعد از آن کهنه می‌ماندند
+        if end_date > horizon_end:
+            raise CommandError(
+                f'--days نمی‌تواند از افق تنظیم‌شده ({(horizon_end - horizon_start).days + 1} روز) بیشتر باشد؛ '
+                'PRICE_SNAPSHOT_HORIZON_DAYS را افزایش دهید.'
+            )
+        session_times = SessionTime.objects.filter(is_active=True).select_related('facility')
+        stale = SessionPriceSnapshot.objects.filter(
+            Q(date__lt=start_date) | Q(date__gt=horizon_end) | Q(session_time__is_active=False)
+        )
+        if options['facility']:
+            session_times = session_times.filter(facility_id__in=options['facility'])
+            stale = stale.filter(session_time__facility_id__in=options['facility'])
+
+        self.stdout.write(f'در حال محاسبه قیمت سانس‌ها از {start_date} تا {end_date}...')
+        deleted, _ = stale.delete()
+        count = build_snapshots(session_times, start_date, end_date)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{count} قیمت ذخیره شد و {deleted} قیمت قدیمی حذف شد.')
+        )
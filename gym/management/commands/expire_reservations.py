@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from gym.seat_holds import reclaim_expired_holds
+from gym.waitlist import expire_pending_reservations, expire_waitlist
+
+
+class Command(BaseCommand):
+    help = 'آزاد کردن نگه‌داری‌های منقضی‌شده و رزروهای پرداخت‌نشده پس از مهلت و واگذاری ظرفیت آن‌ها به لیست انتظار (برای اجرای دوره‌ای)'
+
+    def handle(self, *args, **options):
+        holds = reclaim_expired_holds()
+        expired, promoted = expire_pending_reservations()
+        stale = expire_waitlist()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{holds} جای نگه‌داشته‌شده آزاد شد، {expired} رزرو منقضی شد، '
+                f'{promoted} درخواست لیست انتظار به رزرو تبدیل شد و {stale} درخواست تاریخ گذشته بسته شد.'
+            )
+        )
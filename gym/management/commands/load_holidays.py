@@ -0,0 +1,96 @@
+import csv
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from gym.jalali import to_gregorian
+from gym.models import Holiday
+from gym.signals import holidays_changed
+
+# تبدیل ارقام فارسی و عربی به لاتین
+DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+
+def read_items(path):
+    """
+    خواندن تعطیلات از فایل JSON یا CSV با همان ساختار پاسخ API تقویم
+    (فیلدهای date به صورت 'YYYY/MM/DD' شمسی و holidayDesription).
+    JSON می‌تواند پاسخ کامل API ({"data": [...]})، لیستی از آیتم‌ها یا لیستی از پاسخ‌ها باشد.
+    """
+    if path.suffix.lower() == '.csv':
+        with path.open(encoding='utf-8-sig', newline='') as f:
+            return list(csv.DictReader(f))
+
+    with path.open(encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise CommandError(f'فایل {path} JSON معتبر نیست ({e}).')
+    is_response_list = isinstance(data, list) and data and isinstance(data[0], dict) and 'data' in data[0]
+    items = []
+    for response in data if is_response_list else [data]:
+        if isinstance(response, dict):
+            if not isinstance(response.get('data'), list):
+                raise CommandError(f"پاسخ نامعتبر در {path}: فهرست 'data' وجود ندارد (کلیدها: {sorted(response)}).")
+            response = response['data']
+        elif not isinstance(response, list):
+            raise CommandError(f'ساختار نامعتبر در {path}: {type(response).__name__}')
+        items.extend(response)
+    return items
+
+
+def parse_item(item):
+    """تبدیل یک آیتم به (تاریخ میلادی، توضیحات)"""
+    year, month, day = (int(part) for part in item['date'].translate(DIGITS).replace('-', '/').split('/'))
+    description = (item.get('holidayDesription') or item.get('description') or '').strip()
+    return to_gregorian(year, month, day), description[:200]
+
+
+class Command(BaseCommand):
+    help = 'بارگذاری تعطیلات از فایل‌های JSON/CSV محلی (ساختار پاسخ API تقویم) با upsert گروهی'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='مسیر فایل‌های JSON یا CSV')
+
+    def handle(self, *args, **options):
+        holidays = {}
+        for path in map(Path, options['paths']):
+            if not path.exists():
+                raise CommandError(f'فایل {path} پیدا نشد.')
+            for item in read_items(path):
+                try:
+                    holiday_date, description = parse_item(item)
+                except (KeyError, TypeError, ValueError) as e:
+                    raise CommandError(f'آیتم نامعتبر در {path}: {item} ({e})')
+                # در تاریخ‌های تکراری آخرین مورد باقی می‌ماند
+                holidays[holiday_date] = description
+
+        with transaction.atomic():
+            existing = dict(
+                Holiday.objects.filter(date__in=holidays).values_list('date', 'description')
+            )
+            changed = [
+                Holiday(date=holiday_date, description=description)
+                for holiday_date, description in holidays.items()
+                if existing.get(holiday_date) != description
+            ]
+            inserted = sum(1 for holiday in changed if holiday.date not in existing)
+            updated = len(changed) - inserted
+            unchanged = len(holidays) - len(changed)
+
+            if changed:
+                Holiday.objects.bulk_create(
+                    changed,
+                    batch_size=1000,
+                    update_conflicts=True,
+                    unique_fields=['date'],
+                    update_fields=['description'],
+                )
+                # bulk_create سیگنال نمی‌فرستد
+                holidays_changed([holiday.date for holiday in changed])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{inserted} تعطیلی جدید، {updated} به‌روزرسانی و {unchanged} بدون تغییر.')
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionPriceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('base_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='قیمت پایه')),
+                ('final_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='قیمت نهایی')),
+                ('applied_rule_ids', models.CharField(blank=True, help_text='شناسه قوانین قیمت\u200cگذاری اعمال شده به ترتیب اعمال، جدا شده با کاما.', max_length=255, verbose_name='قوانین اعمال شده')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='زمان محاسبه')),
+                ('session_time', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_snapshots', to='gym.sessiontime', verbose_name='سانس')),
+            ],
+            options={
+                'verbose_name': 'قیمت محاسبه\u200cشده سانس',
+                'verbose_name_plural': 'قیمت\u200cهای محاسبه\u200cشده سانس\u200cها',
+                'ordering': ['date', 'session_time'],
+                'unique_together': {('session_time', 'date')},
+            },
+        ),
+    ]
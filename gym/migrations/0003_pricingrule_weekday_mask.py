@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+def fill_weekday_masks(apps, schema_editor):
+    PricingRule = apps.get_model('gym', 'PricingRule')
+    rules = list(PricingRule.objects.exclude(days_of_week=''))
+    for rule in rules:
+        tokens = {d.strip() for d in rule.days_of_week.split(',')}
+        rule.days_of_week_mask = sum(1 << day for day in range(7) if str(day) in tokens)
+    PricingRule.objects.bulk_update(rules, ['days_of_week_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0002_session_price_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pricingrule',
+            name='days_of_week_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='ماسک روزهای هفته'),
+        ),
+        migrations.RunPython(fill_weekday_masks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pricingrule',
+            index=models.Index(fields=['facility', 'is_active', 'rule_type'], name='pricingrule_facility_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricingrule',
+            index=models.Index(fields=['facility', 'start_date', 'end_date'], name='pricingrule_facility_dates_idx'),
+        ),
+    ]
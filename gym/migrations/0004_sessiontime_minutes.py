@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:16
+
+from django.db import migrations, models
+
+
+def fill_session_minutes(apps, schema_editor):
+    SessionTime = apps.get_model('gym', 'SessionTime')
+    session_times = list(SessionTime.objects.all())
+    for session_time in session_times:
+        session_time.start_minute = session_time.start_time.hour * 60 + session_time.start_time.minute
+        session_time.end_minute = session_time.end_time.hour * 60 + session_time.end_time.minute
+        session_time.duration_minutes = session_time.end_minute - session_time.start_minute
+    SessionTime.objects.bulk_update(session_times, ['start_minute', 'end_minute', 'duration_minutes'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0003_pricingrule_weekday_mask'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='sessiontime',
+            options={'ordering': ['day_of_week', 'start_minute'], 'verbose_name': 'زمان سانس', 'verbose_name_plural': 'زمان\u200cهای سانس'},
+        ),
+        migrations.AddField(
+            model_name='sessiontime',
+            name='duration_minutes',
+            field=models.SmallIntegerField(editable=False, null=True, verbose_name='مدت سانس (دقیقه)'),
+        ),
+        migrations.AddField(
+            model_name='sessiontime',
+            name='end_minute',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='دقیقه پایان'),
+        ),
+        migrations.AddField(
+            model_name='sessiontime',
+            name='start_minute',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='دقیقه شروع'),
+        ),
+        migrations.RunPython(fill_session_minutes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sessiontime',
+            index=models.Index(fields=['facility', 'day_of_week', 'start_minute', 'end_minute'], name='sessiontime_day_minutes_idx'),
+        ),
+    ]
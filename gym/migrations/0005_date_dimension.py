@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0004_sessiontime_minutes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DateDimension',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False, verbose_name='تاریخ (میلادی)')),
+                ('jalali_year', models.PositiveSmallIntegerField(verbose_name='سال شمسی')),
+                ('jalali_month', models.PositiveSmallIntegerField(verbose_name='ماه شمسی')),
+                ('jalali_day', models.PositiveSmallIntegerField(verbose_name='روز شمسی')),
+                ('persian_weekday', models.PositiveSmallIntegerField(choices=[(0, 'شنبه'), (1, 'یکشنبه'), (2, 'دوشنبه'), (3, 'سه\u200cشنبه'), (4, 'چهارشنبه'), (5, 'پنج\u200cشنبه'), (6, 'جمعه')], verbose_name='روز هفته')),
+                ('is_weekend', models.BooleanField(default=False, verbose_name='آخر هفته (پنج\u200cشنبه و جمعه)')),
+                ('is_holiday', models.BooleanField(default=False, verbose_name='تعطیل')),
+            ],
+            options={
+                'verbose_name': 'روز تقویم',
+                'verbose_name_plural': 'روزهای تقویم',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['persian_weekday', 'is_holiday', 'date'], name='datedim_weekday_idx'), models.Index(fields=['jalali_year', 'jalali_month', 'jalali_day'], name='datedim_jalali_idx')],
+            },
+        ),
+    ]
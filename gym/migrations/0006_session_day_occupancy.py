@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_occupancy(apps, schema_editor):
+    Reservation = apps.get_model('gym', 'Reservation')
+    SessionDayOccupancy = apps.get_model('gym', 'SessionDayOccupancy')
+    rows = Reservation.objects.filter(status__in=['pending', 'confirmed']).values(
+        'session_time_id', 'date', 'session_time__capacity'
+    ).annotate(booked_count=Count('pk'))
+    SessionDayOccupancy.objects.bulk_create([
+        SessionDayOccupancy(
+            session_time_id=row['session_time_id'],
+            date=row['date'],
+            booked_count=row['booked_count'],
+            capacity=max(row['session_time__capacity'], row['booked_count']),
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0005_date_dimension'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionDayOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('booked_count', models.PositiveIntegerField(default=0, verbose_name='تعداد رزرو فعال')),
+                ('capacity', models.PositiveIntegerField(verbose_name='ظرفیت')),
+                ('session_time', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancies', to='gym.sessiontime', verbose_name='سانس')),
+            ],
+            options={
+                'verbose_name': 'اشغال سانس',
+                'verbose_name_plural': 'اشغال سانس\u200cها',
+                'ordering': ['date', 'session_time'],
+                'constraints': [models.CheckConstraint(condition=models.Q(('booked_count__lte', models.F('capacity'))), name='occupancy_within_capacity')],
+                'unique_together': {('session_time', 'date')},
+            },
+        ),
+        migrations.RunPython(fill_occupancy, migrations.RunPython.noop),
+    ]
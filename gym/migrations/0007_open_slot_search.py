@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0001_initial'),
+        ('gym', '0006_session_day_occupancy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sportfacility',
+            name='city',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='facilities', to='address.city', verbose_name='شهر'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionpricesnapshot',
+            index=models.Index(fields=['date', 'final_price'], name='snapshot_date_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sportfacility',
+            index=models.Index(fields=['city', 'is_active'], name='facility_city_active_idx'),
+        ),
+    ]
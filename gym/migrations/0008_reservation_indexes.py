@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0007_open_slot_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['session_time', 'date', 'status'], name='reservation_slot_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['discount', 'user', 'status'], name='reservation_discount_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'date'], name='reservation_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['recurring_reservation', 'status'], name='reservation_recurring_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessiontime',
+            index=models.Index(fields=['facility', 'day_of_week', 'is_active'], name='sessiontime_day_active_idx'),
+        ),
+    ]
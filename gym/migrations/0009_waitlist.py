@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0008_reservation_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('status', models.CharField(choices=[('waiting', 'در انتظار'), ('promoted', 'تبدیل به رزرو'), ('cancelled', 'لغو شده'), ('expired', 'منقضی شده')], default='waiting', max_length=20, verbose_name='وضعیت')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('promoted_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان تبدیل به رزرو')),
+            ],
+            options={
+                'verbose_name': 'لیست انتظار',
+                'verbose_name_plural': 'لیست\u200cهای انتظار',
+                'ordering': ['created_at', 'pk'],
+            },
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, help_text='رزرو در انتظار پرداخت پس از این زمان منقضی و ظرفیت آن آزاد می\u200cشود.', null=True, verbose_name='مهلت پرداخت'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'hold_expires_at'], name='reservation_hold_expiry_idx'),
+        ),
+        migrations.AddField(
+            model_name='waitlistentry',
+            name='reservation',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='gym.reservation', verbose_name='رزرو ایجاد شده'),
+        ),
+        migrations.AddField(
+            model_name='waitlistentry',
+            name='session_time',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='gym.sessiontime', verbose_name='سانس'),
+        ),
+        migrations.AddField(
+            model_name='waitlistentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL, verbose_name='کاربر'),
+        ),
+        migrations.AddIndex(
+            model_name='waitlistentry',
+            index=models.Index(fields=['session_time', 'date', 'status', 'created_at'], name='waitlist_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('user', 'session_time', 'date'), name='waitlist_one_waiting_per_user'),
+        ),
+    ]
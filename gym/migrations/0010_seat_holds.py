@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:34
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0009_waitlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('expires_at', models.DateTimeField(verbose_name='زمان انقضا')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'نگه\u200cداری جا',
+                'verbose_name_plural': 'نگه\u200cداری جاها',
+                'ordering': ['expires_at'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='sessiondayoccupancy',
+            name='occupancy_within_capacity',
+        ),
+        migrations.AddField(
+            model_name='sessiondayoccupancy',
+            name='held_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='تعداد جای نگه\u200cداشته\u200cشده'),
+        ),
+        migrations.AddField(
+            model_name='sessiondayoccupancy',
+            name='next_hold_expiry',
+            field=models.DateTimeField(blank=True, help_text='پس از این زمان حداقل یک جای نگه\u200cداشته\u200cشده منقضی شده و باید آزاد شود.', null=True, verbose_name='اولین انقضای نگه\u200cداری'),
+        ),
+        migrations.AddConstraint(
+            model_name='sessiondayoccupancy',
+            constraint=models.CheckConstraint(condition=models.Q(('booked_count__lte', django.db.models.expressions.CombinedExpression(models.F('capacity'), '-', models.F('held_count')))), name='occupancy_within_capacity'),
+        ),
+        migrations.AddField(
+            model_name='seathold',
+            name='session_time',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='gym.sessiontime', verbose_name='سانس'),
+        ),
+        migrations.AddField(
+            model_name='seathold',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to=settings.AUTH_USER_MODEL, verbose_name='کاربر'),
+        ),
+        migrations.AddIndex(
+            model_name='seathold',
+            index=models.Index(fields=['session_time', 'date', 'expires_at'], name='seathold_slot_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seathold',
+            index=models.Index(fields=['expires_at'], name='seathold_expiry_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='seathold',
+            constraint=models.UniqueConstraint(fields=('user', 'session_time', 'date'), name='seathold_one_per_user'),
+        ),
+    ]
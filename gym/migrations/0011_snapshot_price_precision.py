@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym', '0010_seat_holds'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sessionpricesnapshot',
+            name='base_price',
+            field=models.DecimalField(decimal_places=4, max_digits=14, verbose_name='قیمت پایه'),
+        ),
+        migrations.AlterField(
+            model_name='sessionpricesnapshot',
+            name='final_price',
+            field=models.DecimalField(decimal_places=4, max_digits=14, verbose_name='قیمت نهایی'),
+        ),
+    ]
@@ -2,7 +2,7 @@ from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import datetime, timedelta, time
-import jdatetime
+from . import jalali
 from decimal import Decimal
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
@@ -92,6 +92,8 @@ class SportFacility(models.Model):
     hourly_price = models.DecimalField(max_digits=10, decimal_places=0, verbose_name=_("قیمت ساعتی پیش‌فرض سالن"),
                                        help_text=_("در صورتی که سانس قیمت ساعتی نداشته باشد، از این استفاده می‌شود."))
     address = models.TextField(verbose_name=_("آدرس"))
+    city = models.ForeignKey('address.City', on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='facilities', verbose_name=_("شهر"))
     phone = models.CharField(max_length=20, blank=True, verbose_name=_("تلفن"))
     is_active = models.BooleanField(default=True, verbose_name=_("فعال"))
     manager = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("مدیر سالن"),
@@ -109,7 +111,16 @@ class SportFacility(models.Model):
 
     def get_active_sessions(self):
         """دریافت تمام سانس‌های فعال برای این سالن"""
-        return self.session_times.filter(is_active=True).order_by('day_of_week', 'start_time')
+        return self.session_times.filter(is_active=True).order_by('day_of_week', 'start_minute')
+
+    def get_availability_grid(self, week_start):
+        """
+        سانس‌های فعال سالن در هفته شمسی شامل week_start، همراه با تاریخ، ظرفیت باقیمانده، قیمت و وضعیت تعطیلی.
+        محاسبه در gym/availability.py با تعداد ثابتی پرس‌وجو انجام و نتیجه در gym/availability_cache.py کش می‌شود.
+        """
+        from .availability_cache import get_availability_grid
+
+        return get_availability_grid(self, week_start)
 
     def get_average_rating(self):
         """محاسبه میانگین امتیازات برای این سالن"""
@@ -127,6 +138,9 @@ class SportFacility(models.Model):
         verbose_name = _("سالن ورزشی")
         verbose_name_plural = _("سالن‌های ورزشی")
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['city', 'is_active'], name='facility_city_active_idx'),
+        ]
 
 
 class FacilityGallery(models.Model):
@@ -248,6 +262,11 @@ class SessionTime(models.Model):
         validators=[MinValueValidator(Decimal('0'))]
     )
 
+    # بازه نیم‌باز [start_minute, end_minute) بر حسب دقیقه از ابتدای روز؛ در save() از start_time/end_time محاسبه می‌شوند
+    start_minute = models.PositiveSmallIntegerField(null=True, editable=False, verbose_name=_("دقیقه شروع"))
+    end_minute = models.PositiveSmallIntegerField(null=True, editable=False, verbose_name=_("دقیقه پایان"))
+    duration_minutes = models.SmallIntegerField(null=True, editable=False, verbose_name=_("مدت سانس (دقیقه)"))
+
     is_active = models.BooleanField(default=True, verbose_name=_("فعال"))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -259,6 +278,24 @@ class SessionTime(models.Model):
     def __str__(self):
         return f"{self.facility.name} - {self.session_name} ({self.get_day_of_week_display()}: {self.start_time.strftime('%H:%M')} - {self.end_time.strftime('%H:%M')})"
 
+    @staticmethod
+    def minute_of_day(value):
+        """تبدیل زمان به دقیقه از ابتدای روز (ثانیه‌ها نادیده گرفته می‌شوند)"""
+        return value.hour * 60 + value.minute
+
+    def sync_minutes(self):
+        """به‌روزرسانی بازه دقیقه‌ای و مدت سانس از روی start_time و end_time"""
+        self.start_minute = self.minute_of_day(self.start_time)
+        self.end_minute = self.minute_of_day(self.end_time)
+        self.duration_minutes = self.end_minute - self.start_minute
+
+    def save(self, *args, **kwargs):
+        self.sync_minutes()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'start_time', 'end_time'}.intersection(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'start_minute', 'end_minute', 'duration_minutes'}
+        super().save(*args, **kwargs)
+
     def clean(self):
         if self.start_time >= self.end_time:
             raise ValidationError(_("زمان شروع باید قبل از زمان پایان باشد."))
@@ -277,38 +314,33 @@ class SessionTime(models.Model):
         if self.capacity > self.facility.capacity:
             raise ValidationError(_(f"ظرفیت سانس نمی‌تواند از ظرفیت سالن ({self.facility.capacity}) بیشتر باشد."))
 
-        # Check for overlapping sessions
-        overlapping = SessionTime.objects.filter(
+        # Check for overlapping sessions (تداخل بازه‌های نیم‌باز در دیتابیس بررسی می‌شود)
+        self.sync_minutes()
+        session = SessionTime.objects.filter(
             facility=self.facility,
             day_of_week=self.day_of_week,
-            is_active=True
-        ).exclude(pk=self.pk)
+            is_active=True,
+            start_minute__lt=self.end_minute,
+            end_minute__gt=self.start_minute
+        ).exclude(pk=self.pk).order_by('start_minute').first()
 
-        for session in overlapping:
-            if (self.start_time < session.end_time and
-                    self.end_time > session.start_time):
-                raise ValidationError(
-                    _(f"این زمان با سانس '{session.session_name}' ({session.start_time}-{session.end_time}) در همین روز تداخل دارد."))
+        if session is not None:
+            raise ValidationError(
+                _(f"این زمان با سانس '{session.session_name}' ({session.start_time}-{session.end_time}) در همین روز تداخل دارد."))
 
     def get_duration_hours(self):
         """محاسبه مدت زمان سانس به ساعت (اعشاری)"""
-        dt_start = datetime.combine(datetime.today(), self.start_time)
-        dt_end = datetime.combine(datetime.today(), self.end_time)
-        duration = dt_end - dt_start
-        return Decimal(duration.total_seconds()) / Decimal('3600')
+        return Decimal(self.get_duration_minutes()) / Decimal('60')
 
     def get_duration_minutes(self):
-        """محاسبه مدت زمان سانس به دقیقه"""
-        dt_start = datetime.combine(datetime.today(), self.start_time)
-        dt_end = datetime.combine(datetime.today(), self.end_time)
-        duration = dt_end - dt_start
-        return int(duration.total_seconds() // 60)
+        """مدت زمان سانس به دقیقه (ذخیره‌شده در duration_minutes)"""
+        if self.duration_minutes is None:
+            self.sync_minutes()
+        return self.duration_minutes
 
-    def get_price_for_date(self, date):
+    def get_base_price_for_date(self, date):
         """
-        محاسبه قیمت نهایی یک سانس برای یک تاریخ مشخص، با در نظر گرفتن قوانین قیمت‌گذاری.
-        این متد پیچیده‌ترین منطق قیمت‌گذاری را پوشش می‌دهد.
-        از ai_models.py
+        محاسبه قیمت پایه سانس (بدون قوانین قیمت‌گذاری) برای یک تاریخ مشخص.
         """
         base_price = Decimal('0')
 
@@ -334,18 +366,33 @@ class SessionTime(models.Model):
             else:
                 base_price = self.base_weekday_price if self.base_weekday_price is not None else Decimal('0')
 
-        # اعمال قوانین قیمت‌گذاری (PricingRule)
-        # قوانین با اولویت بالاتر (عدد بزرگتر) زودتر اعمال می‌شوند
-        applicable_rules = self.facility.pricing_rules.filter(
-            is_active=True
-        ).order_by('-priority')
+        return base_price
 
-        final_price = base_price
-        for rule in applicable_rules:
-            if rule.is_applicable(date, self):
-                final_price = rule.apply_to_price(final_price)
+    def get_price_for_date(self, date):
+        """
+        محاسبه قیمت نهایی یک سانس برای یک تاریخ مشخص، با در نظر گرفتن قوانین قیمت‌گذاری.
+        قوانین سالن توسط موتور قیمت‌گذاری (gym/pricing.py) یک بار کامپایل و کش می‌شوند.
+        """
+        from .pricing import current_price_memo, get_pricing_engine
+
+        def compute():
+            base_price = self.get_base_price_for_date(date)
+            # اعمال قوانین قیمت‌گذاری (PricingRule)
+            # قوانین با اولویت بالاتر (عدد بزرگتر) زودتر اعمال می‌شوند
+            return get_pricing_engine(self.facility_id).apply(self, date, base_price)
 
-        return max(final_price, Decimal('0'))  # اطمینان از عدم وجود قیمت منفی
+        # اگر درخواست جاری PriceMemo فعال کرده باشد (مثلا صفحات ادمین)، از آن خوانده می‌شود
+        memo = current_price_memo()
+        return memo.get(self, date, compute) if memo is not None else compute()
+
+    def get_price_calendar(self, start_date, end_date):
+        """
+        قیمت سانس برای همه تاریخ‌های برگزاری آن در یک بازه، به صورت {تاریخ: قیمت}.
+        محاسبه به صورت برداری انجام می‌شود (gym/price_calendar.py).
+        """
+        from .price_calendar import get_price_calendar
+
+        return get_price_calendar(self, start_date, end_date)
 
     def get_price_display(self, date=None):
         """نمایش قیمت به همراه نوع قیمت‌گذاری و جزئیات"""
@@ -360,13 +407,15 @@ class SessionTime(models.Model):
             return f"{int(price):,} تومان (پویا)"
         return f"{int(price):,} تومان"
 
-    def get_remaining_capacity(self, date):
-        """محاسبه ظرفیت باقیمانده برای یک تاریخ خاص"""
-        reserved_count = self.reservations.filter(
-            date=date,
-            status__in=['confirmed', 'pending']
-        ).count()
-        return max(0, self.capacity - reserved_count)
+    def get_remaining_capacity(self, date, cached=True):
+        """
+        محاسبه ظرفیت باقیمانده برای یک تاریخ خاص (رزروها و جاهای نگه‌داشته‌شده در SessionDayOccupancy).
+        cached=False شمارنده را مستقیم از دیتابیس می‌خواند (برای اعتبارسنجی رزرو).
+        """
+        from .availability_cache import get_taken_seats, read_taken_seats
+
+        taken = get_taken_seats(self.pk, date) if cached else read_taken_seats(self.pk, date)[0]
+        return max(0, self.capacity - taken)
 
     def is_full(self, date):
         """بررسی پر بودن ظرفیت برای یک تاریخ خاص"""
@@ -379,9 +428,39 @@ class SessionTime(models.Model):
     class Meta:
         verbose_name = _("زمان سانس")
         verbose_name_plural = _("زمان‌های سانس")
-        ordering = ['day_of_week', 'start_time']
+        ordering = ['day_of_week', 'start_minute']
         # هر سانس برای یک سالن در یک روز هفته با زمان شروع و پایان مشخص باید منحصر به فرد باشد.
         unique_together = ['facility', 'day_of_week', 'start_time', 'end_time']
+        indexes = [
+            # بررسی تداخل و جستجوی سانس‌های یک روز بر اساس بازه دقیقه‌ای
+            models.Index(fields=['facility', 'day_of_week', 'start_minute', 'end_minute'],
+                         name='sessiontime_day_minutes_idx'),
+            # سانس‌های فعال یک سالن در یک روز هفته
+            models.Index(fields=['facility', 'day_of_week', 'is_active'], name='sessiontime_day_active_idx'),
+        ]
+
+
+class PricingRuleQuerySet(models.QuerySet):
+
+    def applicable_to(self, facility, date, start_time, end_time):
+        """
+        قوانین فعال سالن که برای تاریخ و بازه زمانی سانس قابل اعمال هستند، به ترتیب اولویت.
+        روز هفته (با ماسک بیتی)، بازه تاریخی و بازه ساعتی در دیتابیس فیلتر می‌شوند؛
+        قوانین 'روزهای خاص' همچنان نیاز به بررسی تعطیلی در پایتون دارند.
+        """
+        weekday_bit = 1 << ((date.weekday() + 2) % 7)
+        return self.filter(
+            facility=facility,
+            is_active=True
+        ).alias(
+            weekday_match=models.F('days_of_week_mask').bitand(weekday_bit)
+        ).filter(
+            models.Q(rule_type='day_of_week', weekday_match__gt=0) |
+            models.Q(rule_type='date_range', start_date__lte=date, end_date__gte=date) |
+            models.Q(rule_type__in=['time_of_day', 'peak_hours'],
+                     start_time_rule__lt=end_time, end_time_rule__gt=start_time) |
+            models.Q(rule_type='special_day')
+        ).order_by('-priority', 'pk')
 
 
 class PricingRule(models.Model):
@@ -422,6 +501,9 @@ class PricingRule(models.Model):
         verbose_name=_("روزهای هفته شمسی"),
         help_text=_("شماره روزها با کاما جدا شود (0=شنبه, 1=یکشنبه, ..., 6=جمعه). مثال: 5,6 برای پنجشنبه و جمعه.")
     )
+    # نسخه بیتی days_of_week (بیت 0=شنبه ... بیت 6=جمعه) که در save همگام می‌شود
+    days_of_week_mask = models.PositiveSmallIntegerField(default=0, editable=False,
+                                                         verbose_name=_("ماسک روزهای هفته"))
 
     start_date = models.DateField(null=True, blank=True, verbose_name=_("تاریخ شروع اعمال قانون"))
     end_date = models.DateField(null=True, blank=True, verbose_name=_("تاریخ پایان اعمال قانون"))
@@ -440,9 +522,25 @@ class PricingRule(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PricingRuleQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} - {self.facility.name} ({self.get_price_adjustment_type_display()}: {self.adjustment_value})"
 
+    @staticmethod
+    def weekday_mask(days_of_week):
+        """تبدیل رشته روزهای هفته (مثلا '5,6') به ماسک بیتی"""
+        tokens = {d.strip() for d in (days_of_week or '').split(',')}
+        mask = 0
+        for day in range(7):
+            if str(day) in tokens:
+                mask |= 1 << day
+        return mask
+
+    def save(self, *args, **kwargs):
+        self.days_of_week_mask = self.weekday_mask(self.days_of_week)
+        super().save(*args, **kwargs)
+
     def clean(self):
         if self.rule_type in ['time_of_day', 'peak_hours']:
             if not self.start_time_rule or not self.end_time_rule:
@@ -491,7 +589,7 @@ class PricingRule(models.Model):
         persian_day_of_week = (date.weekday() + 2) % 7
 
         if self.rule_type == 'day_of_week':
-            return str(persian_day_of_week) in [d.strip() for d in self.days_of_week.split(',')]
+            return bool(self.days_of_week_mask & (1 << persian_day_of_week))
 
         elif self.rule_type == 'date_range':
             return self.start_date <= date <= self.end_date
@@ -532,6 +630,10 @@ class PricingRule(models.Model):
         verbose_name = _("قانون قیمت‌گذاری")
         verbose_name_plural = _("قوانین قیمت‌گذاری")
         ordering = ['-priority', 'name']
+        indexes = [
+            models.Index(fields=['facility', 'is_active', 'rule_type'], name='pricingrule_facility_type_idx'),
+            models.Index(fields=['facility', 'start_date', 'end_date'], name='pricingrule_facility_dates_idx'),
+        ]
 
 
 class Holiday(models.Model):
@@ -554,7 +656,7 @@ class Holiday(models.Model):
             return f"{self.jalali_month}/{self.jalali_day} (تکرارشونده) - {self.description}"
         elif self.date:
             try:
-                return f"{jdatetime.date.fromgregorian(date=self.date).strftime('%Y/%m/%d')} - {self.description}"
+                return f"{jalali.format_date(self.date)} - {self.description}"
             except ValueError:
                 return f"{self.date} - {self.description}"
         return self.description
@@ -584,33 +686,28 @@ class Holiday(models.Model):
     def is_holiday(cls, check_date):
         """
         بررسی تعطیل بودن یک روز مشخص (تاریخ میلادی).
-        بهبود یافته برای بررسی هم تعطیلات یکبار مصرف و هم تکرارشونده.
+        ابتدا بیت‌ست مشترک بین پروسه‌ها (gym/holiday_bitset.py) و در صورت نبود یا همگام نبودن آن،
+        تقویم کش‌شده پروسه (gym/holidays.py) بررسی می‌شود.
         """
-        # بررسی تعطیلات یکبار مصرف
-        if cls.objects.filter(date=check_date).exists():
-            return True
-
-        # بررسی تعطیلات تکرارشونده
-        try:
-            jalali_date = jdatetime.date.fromgregorian(date=check_date)
-            if cls.objects.filter(
-                    is_recurring=True,
-                    jalali_month=jalali_date.month,
-                    jalali_day=jalali_date.day
-            ).exists():
-                return True
-        except ValueError:  # در صورتی که تاریخ میلادی به شمسی تبدیل نشود
-            pass
+        from .holiday_bitset import get_holiday_bitset
+        from .holidays import get_holiday_calendar
 
-        return False
+        bitset = get_holiday_bitset()
+        if bitset is not None:
+            result = bitset.is_holiday(check_date)
+            if result is not None:
+                return result
+        return get_holiday_calendar().is_holiday(check_date)
 
     @classmethod
     def get_holidays_in_range(cls, start_date, end_date):
         """
         دریافت لیست تعطیلات در یک بازه تاریخی مشخص (میلادی).
-        از ai_models.py
+        هر تعطیلی تکرارشونده فقط روی سال‌های شمسی که بازه پوشش می‌دهد تصویر می‌شود،
+        پس هزینه به تعداد سال‌ها × تعطیلات بستگی دارد و نه به تعداد روزهای بازه.
         """
-        holidays_list = []
+        # کلید: تاریخ؛ در تاریخ‌های تکراری آخرین مورد (تکرارشونده بر تعطیلی ثابت) باقی می‌ماند
+        holidays_by_date = {}
 
         # تعطیلات با تاریخ میلادی ثابت
         fixed_holidays = cls.objects.filter(
@@ -618,30 +715,32 @@ class Holiday(models.Model):
             date__lte=end_date,
             is_recurring=False
         ).values('date', 'description')
-        holidays_list.extend(list(fixed_holidays))
-
-        # تعطیلات تکرارشونده
-        recurring_holidays = cls.objects.filter(is_recurring=True)
+        for holiday in fixed_holidays:
+            holidays_by_date[holiday['date']] = holiday
 
-        current_date = start_date
-        while current_date <= end_date:
+        if start_date <= end_date:
+            # تعطیلات تکرارشونده
+            recurring_holidays = cls.objects.filter(is_recurring=True)
             try:
-                jalali_date = jdatetime.date.fromgregorian(date=current_date)
-                for holiday in recurring_holidays:
-                    if (holiday.jalali_month == jalali_date.month and
-                            holiday.jalali_day == jalali_date.day):
-                        holidays_list.append({
-                            'date': current_date,
-                            'description': holiday.description
-                        })
+                jalali_years = range(jalali.to_jalali(start_date)[0], jalali.to_jalali(end_date)[0] + 1)
             except ValueError:
-                # اگر تاریخ میلادی قابل تبدیل به شمسی نباشد، آن را رد کنید
-                pass
-            current_date += timedelta(days=1)
+                # اگر تاریخ میلادی قابل تبدیل به شمسی نباشد، تعطیلات تکرارشونده بررسی نمی‌شوند
+                jalali_years = range(0)
+
+            for holiday in recurring_holidays:
+                for year in jalali_years:
+                    try:
+                        holiday_date = jalali.to_gregorian(year, holiday.jalali_month, holiday.jalali_day)
+                    except (TypeError, ValueError):  # مثلا 30 اسفند در سال غیر کبیسه
+                        continue
+                    if start_date <= holiday_date <= end_date:
+                        holidays_by_date[holiday_date] = {
+                            'date': holiday_date,
+                            'description': holiday.description
+                        }
 
-        # حذف موارد تکراری و مرتب‌سازی
-        unique_holidays = {h['date'].isoformat(): h for h in holidays_list}.values()
-        return sorted(list(unique_holidays), key=lambda x: x['date'])
+        # مرتب‌سازی بر اساس تاریخ
+        return sorted(holidays_by_date.values(), key=lambda x: x['date'])
 
     class Meta:
         verbose_name = _("تعطیلی")
@@ -649,6 +748,168 @@ class Holiday(models.Model):
         ordering = ['date']
 
 
+class SessionPriceSnapshot(models.Model):
+    """
+    قیمت از پیش محاسبه‌شده یک سانس در یک تاریخ مشخص.
+    توسط دستور build_price_snapshots ساخته و با سیگنال‌های تغییر قوانین، سانس‌ها و تعطیلات به‌روز می‌شود.
+    """
+    session_time = models.ForeignKey(SessionTime, on_delete=models.CASCADE, related_name='price_snapshots',
+                                     verbose_name=_("سانس"))
+    date = models.DateField(verbose_name=_("تاریخ"))
+    # با دقت کامل هسته صحیح (gym/money.py، یک ده‌هزارم ریال) تا گرد کردن به ریال فقط یک بار و هنگام ذخیره رزرو
+    # انجام شود، مانند قیمتی که get_price_for_date برمی‌گرداند
+    base_price = models.DecimalField(max_digits=14, decimal_places=4, verbose_name=_("قیمت پایه"))
+    final_price = models.DecimalField(max_digits=14, decimal_places=4, verbose_name=_("قیمت نهایی"))
+    applied_rule_ids = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name=_("قوانین اعمال شده"),
+        help_text=_("شناسه قوانین قیمت‌گذاری اعمال شده به ترتیب اعمال، جدا شده با کاما.")
+    )
+    computed_at = models.DateTimeField(auto_now=True, verbose_name=_("زمان محاسبه"))
+
+    def __str__(self):
+        return f"{self.session_time_id} - {self.date}: {int(self.final_price):,}"
+
+    def get_applied_rule_ids(self):
+        return [int(rule_id) for rule_id in self.applied_rule_ids.split(',') if rule_id]
+
+    class Meta:
+        verbose_name = _("قیمت محاسبه‌شده سانس")
+        verbose_name_plural = _("قیمت‌های محاسبه‌شده سانس‌ها")
+        ordering = ['date', 'session_time']
+        unique_together = ['session_time', 'date']
+        indexes = [
+            # جستجوی سانس‌های آزاد در یک بازه تاریخی، مرتب‌شده بر اساس قیمت
+            models.Index(fields=['date', 'final_price'], name='snapshot_date_price_idx'),
+        ]
+
+
+class DateDimensionQuerySet(models.QuerySet):
+
+    def in_range(self, start_date, end_date):
+        return self.filter(date__gte=start_date, date__lte=end_date)
+
+    def bookable(self, start_date, end_date, day_of_week):
+        """روزهای غیر تعطیل بازه که روز هفته شمسی آن‌ها day_of_week است"""
+        return self.in_range(start_date, end_date).filter(persian_weekday=day_of_week, is_holiday=False)
+
+    def covers(self, start_date, end_date):
+        """آیا جدول برای همه روزهای بازه سطر دارد"""
+        if start_date > end_date:
+            return True
+        return self.in_range(start_date, end_date).count() == (end_date - start_date).days + 1
+
+
+class DateDimension(models.Model):
+    """
+    جدول ابعاد تاریخ: یک سطر برای هر روز میلادی در بازه DATE_DIMENSION_PAST_DAYS/FUTURE_DAYS.
+    با دستور build_date_dimension ساخته و با تغییر تعطیلات (سیگنال‌ها) به‌روز می‌شود
+    تا پرس‌وجوها به جای تبدیل تاریخ در پایتون، روی این جدول join کنند.
+    """
+    date = models.DateField(primary_key=True, verbose_name=_("تاریخ (میلادی)"))
+    jalali_year = models.PositiveSmallIntegerField(verbose_name=_("سال شمسی"))
+    jalali_month = models.PositiveSmallIntegerField(verbose_name=_("ماه شمسی"))
+    jalali_day = models.PositiveSmallIntegerField(verbose_name=_("روز شمسی"))
+    # 0 = شنبه ... 6 = جمعه، مانند SessionTime.DAYS_OF_WEEK
+    persian_weekday = models.PositiveSmallIntegerField(choices=SessionTime.DAYS_OF_WEEK, verbose_name=_("روز هفته"))
+    is_weekend = models.BooleanField(default=False, verbose_name=_("آخر هفته (پنج‌شنبه و جمعه)"))
+    is_holiday = models.BooleanField(default=False, verbose_name=_("تعطیل"))
+
+    objects = DateDimensionQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.jalali_year}/{self.jalali_month:02d}/{self.jalali_day:02d} ({self.get_persian_weekday_display()})"
+
+    class Meta:
+        verbose_name = _("روز تقویم")
+        verbose_name_plural = _("روزهای تقویم")
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['persian_weekday', 'is_holiday', 'date'], name='datedim_weekday_idx'),
+            models.Index(fields=['jalali_year', 'jalali_month', 'jalali_day'], name='datedim_jalali_idx'),
+        ]
+
+
+class SessionDayOccupancy(models.Model):
+    """
+    تعداد رزروهای فعال (pending/confirmed) و جاهای نگه‌داشته‌شده (SeatHold) یک سانس در یک تاریخ.
+    در Reservation.save، حذف رزرو و ثبت یا آزادسازی SeatHold با به‌روزرسانی F() و در همان تراکنش
+    نگه داشته می‌شود (gym/occupancy.py).
+    capacity کپی ظرفیت سانس است تا محدودیت دیتابیس مانع رزرو بیش از ظرفیت شود.
+    """
+    session_time = models.ForeignKey(SessionTime, on_delete=models.CASCADE, related_name='occupancies',
+                                     verbose_name=_("سانس"))
+    date = models.DateField(verbose_name=_("تاریخ"))
+    booked_count = models.PositiveIntegerField(default=0, verbose_name=_("تعداد رزرو فعال"))
+    held_count = models.PositiveIntegerField(default=0, verbose_name=_("تعداد جای نگه‌داشته‌شده"))
+    next_hold_expiry = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("اولین انقضای نگه‌داری"),
+        help_text=_("پس از این زمان حداقل یک جای نگه‌داشته‌شده منقضی شده و باید آزاد شود.")
+    )
+    capacity = models.PositiveIntegerField(verbose_name=_("ظرفیت"))
+
+    def __str__(self):
+        return f"{self.session_time_id} - {self.date}: {self.booked_count}+{self.held_count}/{self.capacity}"
+
+    @property
+    def taken(self):
+        return self.booked_count + self.held_count
+
+    @property
+    def remaining(self):
+        return max(0, self.capacity - self.taken)
+
+    class Meta:
+        verbose_name = _("اشغال سانس")
+        verbose_name_plural = _("اشغال سانس‌ها")
+        ordering = ['date', 'session_time']
+        unique_together = ['session_time', 'date']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(booked_count__lte=models.F('capacity') - models.F('held_count')),
+                name='occupancy_within_capacity'
+            ),
+        ]
+
+
+class SeatHold(models.Model):
+    """
+    نگه‌داری کوتاه‌مدت یک جا در سانس و تاریخ بین انتخاب سانس و پرداخت.
+    تا expires_at از ظرفیت کم می‌شود؛ با تایید به Reservation تبدیل و پس از انقضا به صورت تنبل
+    (هنگام خواندن ظرفیت) یا با دستور expire_reservations آزاد می‌شود (gym/seat_holds.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='seat_holds', verbose_name=_("کاربر"))
+    session_time = models.ForeignKey(SessionTime, on_delete=models.CASCADE, related_name='seat_holds',
+                                     verbose_name=_("سانس"))
+    date = models.DateField(verbose_name=_("تاریخ"))
+    expires_at = models.DateTimeField(verbose_name=_("زمان انقضا"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user} - {self.session_time_id} ({jalali.format_date(self.date)})"
+
+    @property
+    def is_expired(self):
+        return timezone.now() >= self.expires_at
+
+    class Meta:
+        verbose_name = _("نگه‌داری جا")
+        verbose_name_plural = _("نگه‌داری جاها")
+        ordering = ['expires_at']
+        indexes = [
+            # انقضای نگه‌داری‌های یک سانس و تاریخ و پاکسازی دوره‌ای
+            models.Index(fields=['session_time', 'date', 'expires_at'], name='seathold_slot_expiry_idx'),
+            models.Index(fields=['expires_at'], name='seathold_expiry_idx'),
+        ]
+        constraints = [
+            # هر کاربر در هر سانس و تاریخ حداکثر یک جای نگه‌داشته‌شده دارد
+            models.UniqueConstraint(fields=['user', 'session_time', 'date'], name='seathold_one_per_user'),
+        ]
+
+
 class Discount(models.Model):
     """
     مدلی برای تعریف تخفیف‌ها.
@@ -785,10 +1046,11 @@ class Discount(models.Model):
         if self.target_type != 'code' and self.code:
             raise ValidationError(_("کد تخفیف فقط برای نوع هدف 'کد تخفیف' قابل استفاده است."))
 
-    def calculate_discount_amount(self, original_price, user=None):
+    def calculate_discount_amount(self, original_price, user=None, user_used_count=None):
         """
         محاسبه مبلغ تخفیف قابل اعمال بر روی قیمت اصلی.
         پارامتر user برای بررسی محدودیت استفاده کاربر.
+        user_used_count (اختیاری) تعداد استفاده تایید شده کاربر است، اگر از قبل شمرده شده باشد.
         """
         if not self.is_active or self.is_expired():
             return Decimal('0')
@@ -800,11 +1062,12 @@ class Discount(models.Model):
             return Decimal('0')
 
         if self.user_usage_limit is not None and user:
-            user_used_count = Reservation.objects.filter(
-                discount=self,
-                user=user,
-                status='confirmed'
-            ).count()
+            if user_used_count is None:
+                user_used_count = Reservation.objects.filter(
+                    discount=self,
+                    user=user,
+                    status='confirmed'
+                ).count()
             if user_used_count >= self.user_usage_limit:
                 return Decimal('0')
 
@@ -823,10 +1086,10 @@ class Discount(models.Model):
         return timezone.now().date() > self.end_date
 
     def get_jalali_start_date(self):
-        return jdatetime.date.fromgregorian(date=self.start_date).strftime("%Y/%m/%d")
+        return jalali.format_date(self.start_date)
 
     def get_jalali_end_date(self):
-        return jdatetime.date.fromgregorian(date=self.end_date).strftime("%Y/%m/%d")
+        return jalali.format_date(self.end_date)
 
     class Meta:
         verbose_name = _("تخفیف")
@@ -906,10 +1169,10 @@ class RecurringReservation(models.Model):
         return f"{self.user.get_full_name()} - {self.session_time.session_name} ({self.get_jalali_start_date()} تا {self.get_jalali_end_date()})"
 
     def get_jalali_start_date(self):
-        return jdatetime.date.fromgregorian(date=self.start_date).strftime("%Y/%m/%d")
+        return jalali.format_date(self.start_date)
 
     def get_jalali_end_date(self):
-        return jdatetime.date.fromgregorian(date=self.end_date).strftime("%Y/%m/%d")
+        return jalali.format_date(self.end_date)
 
     def clean(self):
         if self.end_date <= self.start_date:
@@ -929,71 +1192,66 @@ class RecurringReservation(models.Model):
         رزروهای تکی را برای این دوره تکرارشونده ایجاد می‌کند.
         از ai_models.py با بهبودها
         """
+        from .date_dimension import bookable_dates
+        from .holidays import weekday_dates
+
         reservations_created = []
-        current_date = self.start_date
 
         # استفاده از timezone.localdate() برای اطمینان از مقایسه صحیح با تاریخ فعلی
         today = timezone.localdate()
-
-        while current_date <= self.end_date:
-            # تبدیل ISO weekday به Persian weekday
-            persian_day_of_week = (current_date.weekday() + 2) % 7
-
-            if persian_day_of_week == self.session_time.day_of_week:
-                if not Holiday.is_holiday(current_date):
-                    # از ایجاد رزرو برای گذشته جلوگیری شود (اگر تاریخ شروع در گذشته است)
-                    if current_date >= today:
-                        if not self.session_time.is_full(current_date):
-                            try:
-                                # اطمینان از عدم وجود رزرو تکراری (در سطح فردی)
-                                existing_reservation = Reservation.objects.filter(
-                                    user=self.user,
-                                    session_time=self.session_time,
-                                    date=current_date,
-                                    status__in=['pending', 'confirmed']
-                                ).first()
-
-                                if not existing_reservation:
-                                    # استفاده از transaction.atomic برای اطمینان از یکپارچگی
-                                    with transaction.atomic():
-                                        # مبلغ تخفیف پکیج در اینجا به صورت اولیه محاسبه می‌شود
-                                        # و در متد calculate_prices در Reservation نهایی خواهد شد.
-                                        reservation = Reservation.objects.create(
-                                            user=self.user,
-                                            session_time=self.session_time,
-                                            date=current_date,
-                                            recurring_reservation=self,
-                                            status='pending',
-                                            # نیازی به calculate_prices اینجا نیست، در save رزرو انجام می‌شود
-                                        )
-                                        reservations_created.append(reservation)
-                                else:
-                                    print(f"Skipping reservation for {current_date} - already exists for user/session.")
-                            except ValidationError as e:
-                                print(f"Validation error creating reservation for {current_date}: {e.message}")
-                            except Exception as e:
-                                print(f"Error creating reservation for {current_date}: {str(e)}")
-                        else:
-                            print(f"Skipping reservation for {current_date} - session is full.")
+        day_of_week = self.session_time.day_of_week
+        # روزهای غیر تعطیل از جدول DateDimension (یا تقویم تعطیلات اگر جدول بازه را پوشش ندهد)
+        bookable = set(bookable_dates(day_of_week, self.start_date, self.end_date))
+
+        # فقط روزهای هم‌روز با سانس (با گام 7 روز) بررسی می‌شوند
+        for current_date in weekday_dates(day_of_week, self.start_date, self.end_date):
+            if current_date in bookable:
+                # از ایجاد رزرو برای گذشته جلوگیری شود (اگر تاریخ شروع در گذشته است)
+                if current_date >= today:
+                    if not self.session_time.is_full(current_date):
+                        try:
+                            # اطمینان از عدم وجود رزرو تکراری (در سطح فردی)
+                            existing_reservation = Reservation.objects.filter(
+                                user=self.user,
+                                session_time=self.session_time,
+                                date=current_date,
+                                status__in=['pending', 'confirmed']
+                            ).first()
+
+                            if not existing_reservation:
+                                # استفاده از transaction.atomic برای اطمینان از یکپارچگی
+                                with transaction.atomic():
+                                    # مبلغ تخفیف پکیج در اینجا به صورت اولیه محاسبه می‌شود
+                                    # و در متد calculate_prices در Reservation نهایی خواهد شد.
+                                    reservation = Reservation.objects.create(
+                                        user=self.user,
+                                        session_time=self.session_time,
+                                        date=current_date,
+                                        recurring_reservation=self,
+                                        status='pending',
+                                        # نیازی به calculate_prices اینجا نیست، در save رزرو انجام می‌شود
+                                    )
+                                    reservations_created.append(reservation)
+                            else:
+                                print(f"Skipping reservation for {current_date} - already exists for user/session.")
+                        except ValidationError as e:
+                            print(f"Validation error creating reservation for {current_date}: {e.message}")
+                        except Exception as e:
+                            print(f"Error creating reservation for {current_date}: {str(e)}")
                     else:
-                        print(f"Skipping reservation for {current_date} - date is in the past.")
+                        print(f"Skipping reservation for {current_date} - session is full.")
                 else:
-                    print(f"Skipping reservation for {current_date} - it's a holiday.")
-            current_date += timedelta(days=1)
+                    print(f"Skipping reservation for {current_date} - date is in the past.")
+            else:
+                print(f"Skipping reservation for {current_date} - it's a holiday.")
 
         return reservations_created
 
     def get_total_sessions(self):
-        """تعداد کل سانس‌های (قابل رزرو) در این دوره"""
-        count = 0
-        current_date = self.start_date
-        while current_date <= self.end_date:
-            persian_day_of_week = (current_date.weekday() + 2) % 7
-            if persian_day_of_week == self.session_time.day_of_week:
-                if not Holiday.is_holiday(current_date):
-                    count += 1
-            current_date += timedelta(days=1)
-        return count
+        """تعداد کل سانس‌های (قابل رزرو) در این دوره؛ با یک COUNT روی جدول DateDimension"""
+        from .date_dimension import count_bookable
+
+        return count_bookable(self.session_time.day_of_week, self.start_date, self.end_date)
 
     class Meta:
         verbose_name = _("رزرو دوره‌ای")
@@ -1013,6 +1271,8 @@ class Reservation(models.Model):
         ('completed', _('انجام شده')),
         ('expired', _('منقضی شده (پرداخت نشده)')),  # اضافه شدن وضعیت جدید
     ]
+    # وضعیت‌هایی که از ظرفیت سانس کم می‌کنند
+    ACTIVE_STATUSES = ('pending', 'confirmed')
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reservations', verbose_name=_("کاربر"))
     session_time = models.ForeignKey(SessionTime, on_delete=models.CASCADE, related_name='reservations',
@@ -1053,6 +1313,12 @@ class Reservation(models.Model):
     notes = models.TextField(blank=True, verbose_name=_("یادداشت"))
     cancellation_reason = models.TextField(blank=True, verbose_name=_("دلیل لغو"))
     cancellation_date = models.DateTimeField(null=True, blank=True, verbose_name=_("تاریخ لغو"))
+    hold_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("مهلت پرداخت"),
+        help_text=_("رزرو در انتظار پرداخت پس از این زمان منقضی و ظرفیت آن آزاد می‌شود.")
+    )
 
     def clean(self):
         # بررسی تاریخ گذشته
@@ -1070,14 +1336,13 @@ class Reservation(models.Model):
 
         # بررسی ظرفیت (فقط برای رزروهای جدید یا در حال تغییر وضعیت به confirmed/pending)
         if self._state.adding or self.status in ['pending', 'confirmed']:
-            if self.session_time.is_full(self.date) and not (
-                    self._state.adding and self.pk):  # اگر در حال اضافه شدن است و pk دارد (یعنی قبلا ایجاد شده بود)
-                # اگر رزرو برای خود این شی نیست، و ظرفیت پر است، خطا بده.
-                # این شرط برای جلوگیری از خطای "ظرفیت تکمیل است" هنگام ویرایش یک رزرو موجود است.
-                if self.session_time.get_remaining_capacity(self.date) == 0 and \
-                        not (self.pk and Reservation.objects.filter(pk=self.pk, date=self.date,
-                                                                    session_time=self.session_time).exists()):
-                    raise ValidationError(_("ظرفیت این سانس تکمیل است."))
+            # اگر رزرو برای خود این شی نیست، و ظرفیت پر است، خطا بده.
+            # این شرط برای جلوگیری از خطای "ظرفیت تکمیل است" هنگام ویرایش یک رزرو موجود است.
+            if self.session_time.get_remaining_capacity(self.date, cached=False) == 0 and \
+                    not (self.pk and Reservation.objects.filter(pk=self.pk, date=self.date,
+                                                                session_time=self.session_time,
+                                                                status__in=self.ACTIVE_STATUSES).exists()):
+                raise ValidationError(_("ظرفیت این سانس تکمیل است."))
 
         # بررسی رزرو تکراری برای کاربر در همان سانس و تاریخ
         # از ai_models.py
@@ -1103,7 +1368,9 @@ class Reservation(models.Model):
         """
         محاسبه قیمت‌های رزرو شامل قیمت اصلی سانس، تخفیف‌ها و قیمت نهایی.
         """
-        self.original_price = self.session_time.get_price_for_date(self.date)
+        from .snapshots import get_snapshot_price
+
+        self.original_price = get_snapshot_price(self.session_time, self.date)
 
         # اعمال تخفیف پکیج اگر رزرو بخشی از یک رزرو دوره‌ای با پکیج باشد
         if self.recurring_reservation and self.recurring_reservation.package:
@@ -1142,33 +1409,13 @@ class Reservation(models.Model):
         # اگر وضعیت به لغو شده تغییر کرده است
         if self.status == 'cancelled' and not self.cancellation_date:
             self.cancellation_date = timezone.now()
-            # اگر رزرو لغو شد و قبلاً تخفیف اعمال شده بود، used_count را کم کنید.
-            # این کار باید در یک ترنزکشن انجام شود تا از Race Condition جلوگیری شود.
-            if self.discount and self.discount.used_count > 0:
-                with transaction.atomic():
-                    discount_to_update = Discount.objects.select_for_update().get(pk=self.discount.pk)
-                    discount_to_update.used_count -= 1
-                    discount_to_update.save()
-
-        # افزایش used_count تخفیف فقط زمانی که رزرو برای اولین بار confirmed شود
-        if self.discount and self.status == 'confirmed' and (
-                self._state.adding or self.__original_status != 'confirmed'
-        ):
-            with transaction.atomic():
-                discount_to_update = Discount.objects.select_for_update().get(pk=self.discount.pk)
-                # بررسی نهایی محدودیت قبل از افزایش
-                if discount_to_update.usage_limit is None or discount_to_update.used_count < discount_to_update.usage_limit:
-                    if discount_to_update.user_usage_limit is None or \
-                            Reservation.objects.filter(discount=self.discount, user=self.user,
-                                                       status='confirmed').count() < discount_to_update.user_usage_limit:
-                        discount_to_update.used_count += 1
-                        discount_to_update.save()
-                    else:
-                        raise ValidationError(_("این تخفیف به حداکثر دفعات مجاز برای شما رسیده است."))
-                else:
-                    raise ValidationError(_("محدودیت استفاده از این تخفیف به پایان رسیده است."))
 
-        super().save(*args, **kwargs)
+        # شمارنده تخفیف، شمارنده ظرفیت و ذخیره رزرو در یک تراکنش؛ رزرو بیش از ظرفیت در دیتابیس رد می‌شود
+        # و در آن صورت تغییر used_count تخفیف هم برگردانده می‌شود
+        with transaction.atomic():
+            self._update_discount_usage()
+            self._update_occupancy()
+            super().save(*args, **kwargs)
 
         # ذخیره وضعیت و FK های اصلی برای مقایسه در دفعات بعدی save
         self.__original_status = self.status
@@ -1186,18 +1433,88 @@ class Reservation(models.Model):
         self.__original_discount_id = self.discount_id
         self.__original_recurring_reservation_id = self.recurring_reservation_id
 
+    def _update_discount_usage(self):
+        """
+        افزایش used_count تخفیف فقط زمانی که رزرو برای اولین بار confirmed شود (با بررسی نهایی محدودیت‌ها)
+        و کاهش آن با لغو رزرو تایید شده؛ باید داخل تراکنش save فراخوانی شود
+        """
+        if not self.discount_id:
+            return
+        confirming = self.status == 'confirmed' and (self._state.adding or self.__original_status != 'confirmed')
+        cancelling = self.status == 'cancelled' and not self._state.adding and self.__original_status == 'confirmed'
+        if not (confirming or cancelling):
+            return
+
+        discount_to_update = Discount.objects.select_for_update().get(pk=self.discount_id)
+        if cancelling:
+            if discount_to_update.used_count > 0:
+                discount_to_update.used_count -= 1
+                discount_to_update.save()
+            return
+
+        # بررسی نهایی محدودیت قبل از افزایش
+        if discount_to_update.usage_limit is not None and \
+                discount_to_update.used_count >= discount_to_update.usage_limit:
+            raise ValidationError(_("محدودیت استفاده از این تخفیف به پایان رسیده است."))
+        if discount_to_update.user_usage_limit is not None and \
+                Reservation.objects.filter(discount=self.discount, user=self.user,
+                                           status='confirmed').count() >= discount_to_update.user_usage_limit:
+            raise ValidationError(_("این تخفیف به حداکثر دفعات مجاز برای شما رسیده است."))
+        discount_to_update.used_count += 1
+        discount_to_update.save()
+
+    def _update_occupancy(self):
+        """کاهش شمارنده سانس/تاریخ قبلی و افزایش شمارنده جدید، در صورت تغییر وضعیت فعال بودن یا سانس و تاریخ"""
+        from .occupancy import book, release
+
+        was_active = not self._state.adding and self.__original_status in self.ACTIVE_STATUSES
+        is_active = self.status in self.ACTIVE_STATUSES
+        old_key = (self.__original_session_time_id, self.__original_date)
+        new_key = (self.session_time_id, self.date)
+
+        if was_active and (not is_active or old_key != new_key):
+            release(*old_key)
+        if is_active and (not was_active or old_key != new_key):
+            book(self.session_time, self.date)
+
+    def get_affected_slots(self):
+        """(session_time_id, date) فعلی و قبل از آخرین ذخیره؛ برای باطل کردن کش ظرفیت در سیگنال post_save"""
+        return {(self.__original_session_time_id, self.__original_date), (self.session_time_id, self.date)}
+
     def cancel(self, reason=""):
-        """لغو رزرو"""
+        """لغو رزرو؛ ظرفیت آزادشده به اولین درخواست لیست انتظار می‌رسد (درخواست تبدیل‌شده برگردانده می‌شود)"""
         if not self.can_cancel:
             raise ValidationError(_("این رزرو قابل لغو نیست."))
 
-        self.status = 'cancelled'
-        self.cancellation_reason = reason
-        self.cancellation_date = timezone.now()  # اطمینان از ثبت تاریخ لغو
-        self.save()  # save() خودش handles کاهش used_count را
+        with transaction.atomic():
+            # قفل ردیف تا لغو هم‌زمان همین رزرو ظرفیت را دو بار آزاد نکند
+            if not self._lock_if_status(self.ACTIVE_STATUSES):
+                raise ValidationError(_("این رزرو قابل لغو نیست."))
+            self.status = 'cancelled'
+            self.cancellation_reason = reason
+            self.cancellation_date = timezone.now()  # اطمینان از ثبت تاریخ لغو
+            self.save()  # save() خودش handles کاهش used_count را
+            return self._promote_waitlist()
+
+    def expire(self):
+        """انقضای رزرو پرداخت‌نشده؛ ظرفیت آزادشده به اولین درخواست لیست انتظار می‌رسد"""
+        with transaction.atomic():
+            if self.status != 'pending' or not self._lock_if_status(['pending']):
+                raise ValidationError(_("فقط رزروهای در انتظار پرداخت منقضی می‌شوند."))
+            self.status = 'expired'
+            self.save()
+            return self._promote_waitlist()
+
+    def _lock_if_status(self, statuses):
+        return Reservation.objects.select_for_update().filter(pk=self.pk, status__in=statuses).exists()
+
+    def _promote_waitlist(self):
+        from .waitlist import promote_next
+
+        return promote_next(self.session_time, self.date)
 
     def get_jalali_date(self):
-        return jdatetime.date.fromgregorian(date=self.date).strftime("%Y/%m/%d")
+        return jalali.format_date(self.date)
 
     @property
     def is_past(self):
@@ -1225,6 +1542,71 @@ class Reservation(models.Model):
         ordering = ['-date', 'session_time__start_time']
         # هر کاربر می‌تواند یک سانس خاص را در یک تاریخ خاص فقط یکبار رزرو کند.
         unique_together = ['user', 'session_time', 'date']
+        indexes = [
+            # ظرفیت و رزروهای فعال یک سانس در یک تاریخ
+            models.Index(fields=['session_time', 'date', 'status'], name='reservation_slot_status_idx'),
+            # تعداد استفاده هر کاربر از یک تخفیف
+            models.Index(fields=['discount', 'user', 'status'], name='reservation_discount_user_idx'),
+            # پاکسازی و انقضای رزروها بر اساس وضعیت و تاریخ
+            models.Index(fields=['status', 'date'], name='reservation_status_date_idx'),
+            # رزروهای تکی یک رزرو دوره‌ای بر اساس وضعیت
+            models.Index(fields=['recurring_reservation', 'status'], name='reservation_recurring_idx'),
+            # انقضای رزروهای پرداخت‌نشده
+            models.Index(fields=['status', 'hold_expires_at'], name='reservation_hold_expiry_idx'),
+        ]
+
+
+class WaitlistEntry(models.Model):
+    """
+    درخواست کاربر برای رزرو یک سانس تکمیل‌شده در یک تاریخ.
+    با لغو یا انقضای یک رزرو، اولین درخواست منتظر به رزرو در انتظار پرداخت تبدیل می‌شود (gym/waitlist.py).
+    """
+    STATUS_CHOICES = [
+        ('waiting', _('در انتظار')),
+        ('promoted', _('تبدیل به رزرو')),
+        ('cancelled', _('لغو شده')),
+        ('expired', _('منقضی شده')),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries',
+                             verbose_name=_("کاربر"))
+    session_time = models.ForeignKey(SessionTime, on_delete=models.CASCADE, related_name='waitlist_entries',
+                                     verbose_name=_("سانس"))
+    date = models.DateField(verbose_name=_("تاریخ"))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting', verbose_name=_("وضعیت"))
+    reservation = models.OneToOneField(
+        Reservation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entry',
+        verbose_name=_("رزرو ایجاد شده")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    promoted_at = models.DateTimeField(null=True, blank=True, verbose_name=_("زمان تبدیل به رزرو"))
+
+    def __str__(self):
+        return f"{self.user} - {self.session_time_id} ({self.get_jalali_date()}) - {self.get_status_display()}"
+
+    def get_jalali_date(self):
+        return jalali.format_date(self.date)
+
+    class Meta:
+        verbose_name = _("لیست انتظار")
+        verbose_name_plural = _("لیست‌های انتظار")
+        ordering = ['created_at', 'pk']
+        indexes = [
+            # انتخاب اولین درخواست منتظر یک سانس و تاریخ
+            models.Index(fields=['session_time', 'date', 'status', 'created_at'], name='waitlist_queue_idx'),
+        ]
+        constraints = [
+            # هر کاربر برای هر سانس و تاریخ فقط یک درخواست منتظر دارد
+            models.UniqueConstraint(
+                fields=['user', 'session_time', 'date'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_one_waiting_per_user'
+            ),
+        ]
 
 
 class Review(models.Model):
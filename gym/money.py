@@ -0,0 +1,156 @@
+"""
+هسته محاسبات پولی با اعداد صحیح (fixed-point) برای مسیرهای پرتکرار قیمت‌گذاری.
+
+قواعد گرد کردن:
+- مبالغ داخلی بر حسب «واحد» نگه داشته می‌شوند: هر ریال = SCALE واحد (یک ده‌هزارم ریال).
+- درصدها (با دو رقم اعشار مانند adjustment_value و amount تخفیف) به صورت صدم درصد
+  ذخیره می‌شوند؛ هر ضرب درصدی نتیجه را به نزدیک‌ترین واحد گرد می‌کند (half-even).
+- تبدیل نهایی به ریال، مانند ذخیره در DecimalField با decimal_places=0، half-even است.
+
+توابع برای اعداد صحیح پایتون و آرایه‌های int64/object نامپای هر دو کار می‌کنند
+(توابع *_array). معادل بودن با مسیر Decimal در gym/tests.py بررسی می‌شود.
+"""
+from decimal import ROUND_HALF_EVEN, Decimal
+
+import numpy as np
+
+SCALE = 10_000
+# مخرج درصدهای صدم‌دار: 100 درصد × 100
+PERCENT_SCALE = 10_000
+# بالاتر از این مقدار، ضرب در آرایه int64 ممکن است سرریز کند
+INT64_SAFE = 2 ** 62
+
+DECIMAL_SCALE = Decimal(SCALE)
+
+
+def div_round(numerator, denominator):
+    """تقسیم صحیح با گرد کردن half-even (مخرج مثبت)"""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = remainder * 2
+    if twice > denominator or (twice == denominator and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def div_round_array(numerators, denominator):
+    """نسخه آرایه‌ای div_round"""
+    quotients, remainders = np.divmod(numerators, denominator)
+    twice = remainders * 2
+    round_up = (twice > denominator) | ((twice == denominator) & (quotients % 2 == 1))
+    return quotients + round_up
+
+
+def to_units(amount):
+    """تبدیل مبلغ Decimal/int (ریال) به واحد داخلی"""
+    if isinstance(amount, int):
+        return amount * SCALE
+    return int((Decimal(amount) * DECIMAL_SCALE).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def to_rials(units):
+    """گرد کردن واحد داخلی به ریال کامل"""
+    return div_round(units, SCALE)
+
+
+def to_decimal(units, places=0):
+    """تبدیل واحد داخلی به Decimal با تعداد رقم اعشار مشخص (half-even)"""
+    step = SCALE // 10 ** places
+    return Decimal(div_round(units, step)).scaleb(-places)
+
+
+def percent_hundredths(percent):
+    """درصد Decimal (مثلا 12.5) به صدم درصد (1250)"""
+    return int((Decimal(percent) * 100).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def scale_by_percent(units, hundredths):
+    """units × (hundredths / 10000) با گرد کردن به نزدیک‌ترین واحد"""
+    return div_round(units * hundredths, PERCENT_SCALE)
+
+
+def scale_by_percent_array(units, hundredths):
+    if units.dtype != object and np.abs(units).max(initial=0) * abs(hundredths) >= INT64_SAFE:
+        units = units.astype(object)
+    return div_round_array(units * hundredths, PERCENT_SCALE)
+
+
+def session_base_units(session_time, date):
+    """معادل صحیح SessionTime.get_base_price_for_date"""
+    if session_time.price_type == 'fixed':
+        return to_units(session_time.fixed_price or 0)
+    if session_time.price_type == 'hourly':
+        hourly_rate = session_time.hourly_price if session_time.hourly_price is not None \
+            else session_time.facility.hourly_price
+        return div_round(to_units(hourly_rate) * session_time.get_duration_minutes(), 60)
+    if session_time.price_type == 'dynamic':
+        # پنجشنبه (5) و جمعه (6) در تقویم شمسی آخر هفته محسوب می‌شوند.
+        if (date.weekday() + 2) % 7 in (5, 6):
+            return to_units(session_time.base_weekend_price or 0)
+        return to_units(session_time.base_weekday_price or 0)
+    return 0
+
+
+class RuleKernel:
+    """
+    عملیات صحیح معادل PricingRule.apply_to_price.
+    op یکی از 'scale' (ضرب درصدی)، 'set'، 'add' یا 'keep' است.
+    """
+    __slots__ = ('op', 'operand')
+
+    def __init__(self, adjustment_type, adjustment_value):
+        if adjustment_type == 'percentage_increase':
+            self.op, self.operand = 'scale', PERCENT_SCALE + percent_hundredths(adjustment_value)
+        elif adjustment_type == 'percentage_decrease':
+            self.op, self.operand = 'scale', PERCENT_SCALE - percent_hundredths(adjustment_value)
+        elif adjustment_type == 'fixed_price':
+            self.op, self.operand = 'set', to_units(adjustment_value)
+        elif adjustment_type == 'fixed_increase':
+            self.op, self.operand = 'add', to_units(adjustment_value)
+        elif adjustment_type == 'fixed_decrease':
+            self.op, self.operand = 'add', -to_units(adjustment_value)
+        else:
+            self.op, self.operand = 'keep', 0
+
+    def __call__(self, units):
+        if self.op == 'scale':
+            return scale_by_percent(units, self.operand)
+        if self.op == 'set':
+            return self.operand
+        if self.op == 'add':
+            return units + self.operand
+        return units
+
+    def apply_array(self, units, mask):
+        """اعمال روی آرایه واحدها فقط در خانه‌هایی که mask درست است"""
+        if self.op == 'scale':
+            return np.where(mask, scale_by_percent_array(units, self.operand), units)
+        if self.op == 'set':
+            return np.where(mask, self.operand, units)
+        if self.op == 'add':
+            return np.where(mask, units + self.operand, units)
+        return units
+
+
+def discount_units(discount, original_units, user_used_count=0, today=None):
+    """
+    معادل صحیح Discount.calculate_discount_amount.
+    user_used_count باید از قبل شمرده شده باشد (در صورت وجود محدودیت کاربر).
+    """
+    if not discount.is_active or (today is not None and today > discount.end_date) or \
+            (today is None and discount.is_expired()):
+        return 0
+    if discount.min_price is not None and original_units < to_units(discount.min_price):
+        return 0
+    if discount.usage_limit is not None and discount.used_count >= discount.usage_limit:
+        return 0
+    if discount.user_usage_limit is not None and user_used_count >= discount.user_usage_limit:
+        return 0
+
+    if discount.discount_type == 'percentage':
+        amount = scale_by_percent(original_units, percent_hundredths(discount.amount))
+    else:
+        amount = to_units(discount.amount)
+
+    if discount.max_discount is not None:
+        amount = min(amount, to_units(discount.max_discount))
+    return amount
@@ -0,0 +1,120 @@
+"""
+نگهداری شمارنده SessionDayOccupancy (تعداد رزروهای فعال و جاهای نگه‌داشته‌شده هر سانس در هر تاریخ).
+
+تمام تغییرات با UPDATE ... SET booked_count = booked_count ± 1 (یا held_count) انجام می‌شوند؛ محدودیت
+occupancy_within_capacity در دیتابیس مانع عبور از ظرفیت می‌شود، حتی در رزروهای هم‌زمان.
+این توابع باید داخل تراکنش ذخیره رزرو یا نگه‌داری فراخوانی شوند.
+"""
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils.translation import gettext_lazy as _
+
+from .availability_cache import invalidate_slots
+from .models import Reservation, SeatHold, SessionDayOccupancy
+
+
+def _increment(session_time, date, **changes):
+    occupancy, _created = SessionDayOccupancy.objects.get_or_create(
+        session_time=session_time,
+        date=date,
+        defaults={'capacity': session_time.capacity}
+    )
+    try:
+        with transaction.atomic():
+            SessionDayOccupancy.objects.filter(pk=occupancy.pk).update(**changes)
+    except IntegrityError:
+        raise ValidationError(_("ظرفیت این سانس تکمیل است."))
+
+
+def book(session_time, date):
+    """افزایش اتمیک شمارنده؛ در صورت تکمیل ظرفیت ValidationError"""
+    _increment(session_time, date, booked_count=F('booked_count') + 1)
+
+
+def hold(session_time, date, expires_at):
+    """افزایش اتمیک تعداد جاهای نگه‌داشته‌شده؛ در صورت تکمیل ظرفیت ValidationError"""
+    _increment(
+        session_time,
+        date,
+        held_count=F('held_count') + 1,
+        next_hold_expiry=Least(Coalesce(F('next_hold_expiry'), Value(expires_at)), Value(expires_at))
+    )
+
+
+def release_holds(session_time_id, date, count):
+    """
+    کاهش تعداد جاهای نگه‌داشته‌شده پس از حذف count ردیف SeatHold و محاسبه دوباره اولین انقضا
+    از نگه‌داری‌های باقیمانده.
+    """
+    SessionDayOccupancy.objects.filter(
+        session_time_id=session_time_id,
+        date=date
+    ).update(
+        held_count=Greatest(F('held_count') - count, Value(0)),
+        next_hold_expiry=Subquery(
+            SeatHold.objects.filter(
+                session_time_id=OuterRef('session_time_id'),
+                date=OuterRef('date')
+            ).order_by().values('session_time_id').annotate(first=Min('expires_at')).values('first')[:1]
+        )
+    )
+
+
+def release(session_time_id, date):
+    """کاهش اتمیک شمارنده (در صورت وجود)"""
+    SessionDayOccupancy.objects.filter(
+        session_time_id=session_time_id,
+        date=date,
+        booked_count__gt=0
+    ).update(booked_count=F('booked_count') - 1)
+
+
+def sync_capacity(session_time):
+    """
+    اعمال ظرفیت جدید سانس روی شمارنده‌ها.
+    اگر ظرفیت از رزروها و جاهای نگه‌داشته‌شده موجود کمتر شود، ظرفیت آن روز برابر همان تعداد (یعنی تکمیل) می‌ماند.
+    """
+    SessionDayOccupancy.objects.filter(session_time_id=session_time.pk).update(
+        capacity=Greatest(F('booked_count') + F('held_count'), Value(session_time.capacity))
+    )
+
+
+def rebuild_occupancy(session_times=None):
+    """بازسازی کامل شمارنده‌ها از جداول Reservation و SeatHold (برای داده‌های موجود یا اصلاح ناسازگاری)"""
+    reservations = Reservation.objects.filter(status__in=Reservation.ACTIVE_STATUSES)
+    holds = SeatHold.objects.all()
+    occupancies = SessionDayOccupancy.objects.all()
+    if session_times is not None:
+        reservations = reservations.filter(session_time__in=session_times)
+        holds = holds.filter(session_time__in=session_times)
+        occupancies = occupancies.filter(session_time__in=session_times)
+
+    counts = {}
+    for row in reservations.order_by().values('session_time_id', 'date', 'session_time__capacity').annotate(
+            count=Count('pk')):
+        counts[row['session_time_id'], row['date']] = [row['session_time__capacity'], row['count'], 0, None]
+    for row in holds.order_by().values('session_time_id', 'date', 'session_time__capacity').annotate(
+            count=Count('pk'), first=Min('expires_at')):
+        slot = counts.setdefault((row['session_time_id'], row['date']), [row['session_time__capacity'], 0, 0, None])
+        slot[2:] = [row['count'], row['first']]
+
+    rows = [
+        SessionDayOccupancy(
+            session_time_id=session_time_id,
+            date=date,
+            booked_count=booked_count,
+            held_count=held_count,
+            next_hold_expiry=next_hold_expiry,
+            capacity=max(capacity, booked_count + held_count),
+        )
+        for (session_time_id, date), (capacity, booked_count, held_count, next_hold_expiry) in counts.items()
+    ]
+    slots = set(occupancies.values_list('session_time_id', 'date'))
+    slots.update((row.session_time_id, row.date) for row in rows)
+    with transaction.atomic():
+        occupancies.delete()
+        SessionDayOccupancy.objects.bulk_create(rows, batch_size=1000)
+        invalidate_slots(slots)
+    return len(rows)
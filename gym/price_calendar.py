@@ -0,0 +1,101 @@
+"""
+تقویم قیمت سانس‌ها در یک بازه تاریخی.
+
+به جای فراخوانی get_price_for_date برای هر روز، تمام تاریخ‌های برگزاری سانس
+در یک آرایه NumPy قرار می‌گیرند و قیمت پایه، ماسک قوانین و تنظیم قیمت‌ها
+به صورت برداری روی کل آرایه اعمال می‌شوند.
+"""
+from decimal import Decimal
+
+import numpy as np
+
+from .holiday_bitset import weekend_mask
+from .models import Holiday
+from .money import SCALE, div_round_array, session_base_units, to_units
+from .pricing import TIME_RULE_TYPES, get_pricing_engine, persian_weekday
+
+# 1970-01-01 پنج‌شنبه است (روز 5 هفته شمسی)
+EPOCH_PERSIAN_WEEKDAY = 5
+
+
+def session_dates(session_time, start_date, end_date):
+    """آرایه تاریخ‌های برگزاری سانس (با گام 7 روز) در بازه [start_date, end_date]"""
+    offset = (session_time.day_of_week - persian_weekday(start_date)) % 7
+    first = np.datetime64(start_date, 'D') + offset
+    return np.arange(first, np.datetime64(end_date, 'D') + 1, 7)
+
+
+def holiday_dates(start_date, end_date):
+    """آرایه تاریخ‌های تعطیل بازه، با یک بار پرس‌وجو"""
+    holidays = Holiday.get_holidays_in_range(start_date, end_date)
+    return np.array([h['date'] for h in holidays], dtype='datetime64[D]')
+
+
+def _rule_mask(rule, dates, weekdays, holidays):
+    if rule.rule_type == 'day_of_week':
+        return np.isin(weekdays, list(rule.days))
+    if rule.rule_type == 'date_range':
+        if rule.start_date is None or rule.end_date is None:
+            return np.zeros(dates.shape, dtype=bool)
+        return (dates >= np.datetime64(rule.start_date, 'D')) & (dates <= np.datetime64(rule.end_date, 'D'))
+    if rule.rule_type in TIME_RULE_TYPES:
+        # تداخل زمانی قبلا توسط ایندکس بازه‌های ساعتی بررسی شده است
+        return np.ones(dates.shape, dtype=bool)
+    if rule.rule_type == 'special_day':
+        return np.isin(dates, holidays)
+    return np.zeros(dates.shape, dtype=bool)
+
+
+def price_units(session_time, start_date, end_date, holidays=None):
+    """
+    محاسبه برداری قیمت سانس در تاریخ‌های برگزاری آن با هسته صحیح gym/money.py.
+    خروجی: (تاریخ‌ها، واحدهای قیمت پایه، واحدهای قیمت نهایی، [(شناسه قانون، ماسک اعمال)]).
+    holidays (اختیاری) آرایه تاریخ‌های تعطیل است تا برای چند سانس یک بار محاسبه شود.
+    """
+    dates = session_dates(session_time, start_date, end_date)
+    if holidays is None and len(dates):
+        holidays = holiday_dates(start_date, end_date)
+
+    day_numbers = dates.astype('int64')
+    weekdays = (day_numbers + EPOCH_PERSIAN_WEEKDAY) % 7
+
+    if session_time.price_type == 'dynamic':
+        # آخر هفته (پنجشنبه و جمعه) از بلوک آخر هفته بیت‌ست تعطیلات خوانده می‌شود
+        weekend = to_units(session_time.base_weekend_price or 0)
+        weekday = to_units(session_time.base_weekday_price or 0)
+        base_units = np.where(weekend_mask(dates), weekend, weekday).astype('int64')
+    else:
+        base_units = np.full(dates.shape, session_base_units(session_time, start_date), dtype='int64')
+
+    units = base_units
+    applied = []
+    if len(dates):
+        engine = get_pricing_engine(session_time.facility_id)
+        for rule in engine.rules_for_range(session_time, start_date, end_date):
+            mask = _rule_mask(rule, dates, weekdays, holidays)
+            units = rule.kernel.apply_array(units, mask)
+            applied.append((rule.pk, mask))
+
+    return dates, base_units, np.maximum(units, 0), applied
+
+
+def get_price_calendar(session_time, start_date, end_date, holidays=None):
+    """
+    قیمت نهایی سانس برای همه تاریخ‌های برگزاری آن در بازه، به صورت {تاریخ: قیمت}.
+    قیمت‌ها مانند فیلدهای قیمت رزرو به ریال کامل (half-even) گرد می‌شوند.
+    """
+    dates, _, units, _ = price_units(session_time, start_date, end_date, holidays=holidays)
+    prices = div_round_array(units, SCALE)
+    return {
+        day.item(): Decimal(int(price))
+        for day, price in zip(dates, prices)
+    }
+
+
+def get_price_calendars(session_times, start_date, end_date):
+    """تقویم قیمت چند سانس با یک بار خواندن تعطیلات بازه: {session_time_id: {تاریخ: قیمت}}"""
+    holidays = holiday_dates(start_date, end_date)
+    return {
+        session_time.pk: get_price_calendar(session_time, start_date, end_date, holidays=holidays)
+        for session_time in session_times
+    }
@@ -0,0 +1,545 @@
+"""
+موتور قیمت‌گذاری سانس‌ها.
+
+قوانین فعال هر سالن یک بار از دیتابیس خوانده و به ارزیاب‌های پایتونی خالص
+کامپایل می‌شوند و در حافظه پروسه نگه داشته می‌شوند. تغییر PricingRule، SessionTime یا Holiday
+در همان پروسه (سیگنال‌های gym/signals.py) موتور را فوراً باطل می‌کند؛ تغییرات پروسه‌های دیگر
+با مقایسه نسخه قوانین سالن در دیتابیس (تعداد و آخرین updated_at) دیده می‌شوند که حداکثر هر
+PRICING_ENGINE_CHECK_SECONDS ثانیه یک بار بررسی می‌شود.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from decimal import Decimal
+from heapq import merge
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max
+
+from .money import RuleKernel
+from .models import Discount, Holiday, PricingRule, Reservation, SessionPriceSnapshot, SessionTime
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+HUNDRED = Decimal('100')
+ONE_DAY = timedelta(days=1)
+DEFAULT_ENGINE_CHECK_SECONDS = 5
+
+TIME_RULE_TYPES = ('time_of_day', 'peak_hours')
+
+
+def persian_weekday(date):
+    """تبدیل ISO weekday (0=دوشنبه) به روز هفته شمسی (0=شنبه)"""
+    return (date.weekday() + 2) % 7
+
+
+class CompiledRule:
+    """
+    نسخه کامپایل‌شده یک PricingRule.
+    شرط اعمال و تابع تنظیم قیمت یک بار ساخته می‌شوند و دیگر به مدل دسترسی ندارند.
+    """
+    __slots__ = (
+        'pk', 'order', 'priority', 'rule_type', 'applies', 'adjust', 'start_time', 'end_time',
+        'days', 'start_date', 'end_date', 'adjustment_type', 'adjustment_value', 'factor', 'kernel',
+    )
+
+    def __init__(self, rule):
+        self.pk = rule.pk
+        self.order = None
+        self.priority = rule.priority
+        self.rule_type = rule.rule_type
+        self.start_time = rule.start_time_rule
+        self.end_time = rule.end_time_rule
+        self.days = frozenset(day for day in range(7) if rule.days_of_week_mask & (1 << day))
+        self.start_date = rule.start_date
+        self.end_date = rule.end_date
+        self.adjustment_type = rule.price_adjustment_type
+        self.adjustment_value = rule.adjustment_value
+        self.factor = None
+        if self.adjustment_type == 'percentage_increase':
+            self.factor = Decimal('1') + self.adjustment_value / HUNDRED
+        elif self.adjustment_type == 'percentage_decrease':
+            self.factor = Decimal('1') - self.adjustment_value / HUNDRED
+        self.applies = self._compile_predicate()
+        self.adjust = self._compile_adjustment()
+        self.kernel = RuleKernel(self.adjustment_type, self.adjustment_value)
+
+    def _compile_predicate(self):
+        """شرط وابسته به تاریخ قانون؛ ورودی: (تاریخ، روز هفته شمسی، تابع تعطیلی)"""
+        if self.rule_type == 'day_of_week':
+            days = self.days
+            return lambda date, weekday, is_holiday: weekday in days
+
+        if self.rule_type == 'date_range':
+            start_date, end_date = self.start_date, self.end_date
+            if start_date is None or end_date is None:
+                return lambda date, weekday, is_holiday: False
+            return lambda date, weekday, is_holiday: start_date <= date <= end_date
+
+        if self.rule_type in TIME_RULE_TYPES:
+            # تداخل زمانی هنگام انتخاب قوانین هر سانس بررسی شده است
+            return lambda date, weekday, is_holiday: True
+
+        if self.rule_type == 'special_day':
+            return lambda date, weekday, is_holiday: is_holiday(date)
+
+        return lambda date, weekday, is_holiday: False
+
+    def _compile_adjustment(self):
+        value = self.adjustment_value
+        factor = self.factor
+
+        if factor is not None:
+            return lambda price: price * factor
+        if self.adjustment_type == 'fixed_price':
+            return lambda price: value
+        if self.adjustment_type == 'fixed_increase':
+            return lambda price: price + value
+        if self.adjustment_type == 'fixed_decrease':
+            return lambda price: price - value
+        return lambda price: price
+
+
+class IntervalIndex:
+    """
+    ایندکس بازه‌های نیم‌باز [start, stop) بر پایه نقاط انتهایی مرتب‌شده.
+    محور به بخش‌های مقدماتی بین نقاط انتهایی تقسیم می‌شود و برای هر بخش، قوانین پوشش‌دهنده
+    (به ترتیب اعمال) از پیش محاسبه می‌شوند؛ یافتن بخش یک نقطه با جستجوی دودویی O(log n) است.
+    """
+
+    def __init__(self, intervals):
+        intervals = [(start, stop, item) for start, stop, item in intervals if start < stop]
+        self._bounds = sorted({point for start, stop, _ in intervals for point in (start, stop)})
+        self._segments = tuple(
+            tuple(item for start, stop, item in intervals if start <= low and stop >= high)
+            for low, high in zip(self._bounds, self._bounds[1:])
+        )
+
+    def __len__(self):
+        return len(self._segments)
+
+    def locate(self, point):
+        """شماره بخش شامل نقطه، یا None اگر نقطه خارج از همه بازه‌ها باشد"""
+        index = bisect_right(self._bounds, point) - 1
+        if 0 <= index < len(self._segments):
+            return index
+        return None
+
+    def stab(self, point):
+        """قوانینی که بازه آن‌ها شامل نقطه است"""
+        index = self.locate(point)
+        return self._segments[index] if index is not None else ()
+
+    def overlapping(self, start, stop):
+        """قوانینی که بازه آن‌ها با [start, stop) تداخل دارد، به ترتیب اعمال"""
+        first = max(bisect_right(self._bounds, start) - 1, 0)
+        last = bisect_left(self._bounds, stop)
+        items = {}
+        for segment in self._segments[first:last]:
+            for item in segment:
+                items[item.order] = item
+        return tuple(items[order] for order in sorted(items))
+
+
+def _merge(*groups):
+    return tuple(merge(*groups, key=attrgetter('order')))
+
+
+class FacilityPricingEngine:
+    """
+    مجموعه مرتب قوانین کامپایل‌شده یک سالن.
+    قوانین بازه تاریخی و ساعتی در IntervalIndex نگه داشته می‌شوند تا برای هر نرخ‌دهی
+    فقط قوانین متداخل با تاریخ و بازه زمانی سانس بررسی شوند.
+    """
+
+    def __init__(self, facility_id, rules, version=None):
+        self.facility_id = facility_id
+        # نسخه قوانین سالن در دیتابیس هنگام ساخت و زمان آخرین بررسی آن (time.monotonic)
+        self.version = version
+        self.checked_at = time.monotonic()
+        # قوانین با اولویت بالاتر (عدد بزرگتر) زودتر اعمال می‌شوند
+        self.rules = tuple(CompiledRule(rule) for rule in rules)
+        for order, rule in enumerate(self.rules):
+            rule.order = order
+
+        self._static_rules = tuple(
+            rule for rule in self.rules
+            if rule.rule_type != 'date_range' and rule.rule_type not in TIME_RULE_TYPES
+        )
+        self.time_index = IntervalIndex(
+            (rule.start_time, rule.end_time, rule) for rule in self.rules
+            if rule.rule_type in TIME_RULE_TYPES and rule.start_time and rule.end_time
+        )
+        # بازه تاریخی قوانین بسته است؛ انتهای آن یک روز جلو برده می‌شود
+        self.date_index = IntervalIndex(
+            (rule.start_date, rule.end_date + ONE_DAY, rule) for rule in self.rules
+            if rule.rule_type == 'date_range' and rule.start_date and rule.end_date
+        )
+        self._session_rules = {}
+        self._dated_rules = {}
+        self._holidays = {}
+
+    def is_holiday(self, date):
+        try:
+            return self._holidays[date]
+        except KeyError:
+            result = self._holidays[date] = Holiday.is_holiday(date)
+            return result
+
+    def revalidate(self, now):
+        """نسخه قوانین تغییر نکرده است؛ وضعیت تعطیلی تاریخ‌ها دوباره خوانده می‌شود (ممکن است پروسه دیگری آن را تغییر داده باشد)"""
+        self.checked_at = now
+        self._holidays = {}
+
+    def remember_holidays(self, dates, holidays):
+        """ثبت وضعیت تعطیلی تاریخ‌ها از پیش (holidays مجموعه تاریخ‌های تعطیل است)"""
+        for date in dates:
+            self._holidays[date] = date in holidays
+
+    def rules_for_session(self, session_time):
+        """قوانین غیر تاریخی که بازه زمانی آن‌ها با سانس تداخل دارد (یا وابسته به ساعت نیستند)"""
+        key = (session_time.pk, session_time.start_time, session_time.end_time)
+        rules = self._session_rules.get(key)
+        if rules is None:
+            rules = self._session_rules[key] = _merge(
+                self._static_rules,
+                self.time_index.overlapping(session_time.start_time, session_time.end_time),
+            )
+        return rules
+
+    def rules_for(self, session_time, date):
+        """قوانین کاندید سانس در یک تاریخ، به ترتیب اعمال"""
+        segment = self.date_index.locate(date)
+        if segment is None:
+            return self.rules_for_session(session_time)
+        key = (session_time.pk, session_time.start_time, session_time.end_time, segment)
+        rules = self._dated_rules.get(key)
+        if rules is None:
+            rules = self._dated_rules[key] = _merge(
+                self.rules_for_session(session_time),
+                self.date_index.stab(date),
+            )
+        return rules
+
+    def rules_for_range(self, session_time, start_date, end_date):
+        """قوانین کاندید سانس در بازه [start_date, end_date]، به ترتیب اعمال"""
+        return _merge(
+            self.rules_for_session(session_time),
+            self.date_index.overlapping(start_date, end_date + ONE_DAY),
+        )
+
+    def apply(self, session_time, date, base_price):
+        """اعمال قوانین قابل اجرا بر روی قیمت پایه سانس در تاریخ مشخص"""
+        weekday = persian_weekday(date)
+        price = base_price
+        for rule in self.rules_for(session_time, date):
+            if rule.applies(date, weekday, self.is_holiday):
+                price = rule.adjust(price)
+        return max(price, ZERO)  # اطمینان از عدم وجود قیمت منفی
+
+
+def price_for_date(session_time, date):
+    """
+    قیمت یک سانس در یک تاریخ بدون ساختن موتور سالن. قوانین کاندید با PricingRule.objects.applicable_to
+    (روز هفته با ماسک بیتی، بازه تاریخی و بازه ساعتی) در دیتابیس انتخاب می‌شوند و در پایتون فقط
+    تعطیلی قوانین 'روزهای خاص' بررسی می‌شود؛ برای قیمت‌های تکی خارج از افق قیمت‌های ذخیره‌شده.
+    """
+    price = session_time.get_base_price_for_date(date)
+    for rule in PricingRule.objects.applicable_to(
+            session_time.facility_id, date, session_time.start_time, session_time.end_time
+    ):
+        if rule.rule_type != 'special_day' or Holiday.is_holiday(date):
+            price = rule.apply_to_price(price)
+    return max(price, ZERO)  # اطمینان از عدم وجود قیمت منفی
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+# با هر ابطال افزایش می‌یابد تا موتوری که حین ابطال ساخته شده در کش ذخیره نشود
+_generation = 0
+# نسخه قوانین هر سالن (و نسخه سراسری برای ابطال همه سالن‌ها)؛ بخشی از کلید PriceMemo
+_rules_versions = {}
+_global_rules_version = 0
+
+
+def _check_interval():
+    return getattr(settings, 'PRICING_ENGINE_CHECK_SECONDS', DEFAULT_ENGINE_CHECK_SECONDS)
+
+
+def rules_db_versions(facility_ids):
+    """
+    نسخه قوانین هر سالن در دیتابیس: (تعداد قوانین، آخرین updated_at)، با یک پرس‌وجو.
+    افزودن، ویرایش (save) یا حذف قانون در هر پروسه‌ای این مقدار را تغییر می‌دهد.
+    """
+    versions = {facility_id: (0, None) for facility_id in facility_ids}
+    for facility_id, count, updated_at in PricingRule.objects.filter(
+            facility_id__in=versions.keys()
+    ).order_by().values('facility_id').annotate(
+        count=Count('pk'), updated_at=Max('updated_at')
+    ).values_list('facility_id', 'count', 'updated_at'):
+        versions[facility_id] = (count, updated_at)
+    return versions
+
+
+def get_pricing_engine(facility_id):
+    """دریافت موتور قیمت‌گذاری کش‌شده یک سالن (در صورت نبود یا تغییر قوانین در دیتابیس، ساخته می‌شود)"""
+    engine = _engines.get(facility_id)
+    if engine is not None and time.monotonic() - engine.checked_at < _check_interval():
+        return engine
+    return _load_pricing_engines([facility_id])[facility_id]
+
+
+def _load_pricing_engines(facility_ids):
+    """
+    موتور چند سالن؛ نسخه قوانین سالن‌هایی که موتور آن‌ها در کش نیست یا مدتی بررسی نشده با یک
+    پرس‌وجو خوانده می‌شود و قوانین سالن‌هایی که تغییر کرده‌اند با یک پرس‌وجوی دیگر.
+    """
+    now = time.monotonic()
+    interval = _check_interval()
+    engines = {facility_id: _engines.get(facility_id) for facility_id in facility_ids}
+    stale = [
+        facility_id for facility_id, engine in engines.items()
+        if engine is None or now - engine.checked_at >= interval
+    ]
+    if not stale:
+        return engines
+
+    generation = _generation
+    # نسخه پیش از قوانین خوانده می‌شود؛ تغییر هم‌زمان در بررسی بعدی دیده می‌شود
+    versions = rules_db_versions(stale)
+    missing = []
+    for facility_id in stale:
+        engine = engines[facility_id]
+        if engine is not None and engine.version == versions[facility_id]:
+            engine.revalidate(now)
+        else:
+            missing.append(facility_id)
+
+    if missing:
+        rules_by_facility = {facility_id: [] for facility_id in missing}
+        for rule in PricingRule.objects.filter(
+                facility_id__in=missing,
+                is_active=True
+        ).order_by('-priority', 'pk'):
+            rules_by_facility[rule.facility_id].append(rule)
+        with _engines_lock:
+            for facility_id, rules in rules_by_facility.items():
+                engine = FacilityPricingEngine(facility_id, rules, versions[facility_id])
+                if generation == _generation:
+                    _engines[facility_id] = engine
+                engines[facility_id] = engine
+    return engines
+
+
+def _invalidate(facility_id=None):
+    global _generation, _global_rules_version
+    with _engines_lock:
+        _generation += 1
+        if facility_id is None:
+            _global_rules_version += 1
+            _engines.clear()
+        else:
+            _rules_versions[facility_id] = _rules_versions.get(facility_id, 0) + 1
+            _engines.pop(facility_id, None)
+
+
+def invalidate_pricing_engine(facility_id=None):
+    """
+    حذف موتور کش‌شده یک سالن؛ بدون ورودی، کش همه سالن‌ها خالی می‌شود.
+    داخل تراکنش پس از commit دوباره باطل می‌شود تا موتوری که thread دیگری در این فاصله از قوانین
+    commit شده قبلی ساخته، برای بازسازی قیمت‌های ذخیره‌شده پس از commit استفاده نشود.
+    """
+    _invalidate(facility_id)
+    if connection.in_atomic_block:
+        transaction.on_commit(partial(_invalidate, facility_id))
+
+
+def rules_version(facility_id):
+    """نسخه فعلی قوانین قیمت‌گذاری سالن؛ با هر تغییر قانون، سانس یا تعطیلی عوض می‌شود"""
+    return _global_rules_version, _rules_versions.get(facility_id, 0)
+
+
+def quote_many(items, user=None):
+    """
+    قیمت‌گذاری دسته‌ای درخواست‌های (session_time_id, date, discount_code) با تعداد ثابتی پرس‌وجو.
+    مبالغ خروجی همان مقادیری است که Reservation.calculate_prices برای رزروی با همین
+    سانس، تاریخ، تخفیف و کاربر محاسبه می‌کند. خروجی به ترتیب ورودی است؛ برای
+    session_time_id ناموجود مقدار None برگردانده می‌شود.
+    """
+    items = [(session_time_id, date, code or None) for session_time_id, date, code in items]
+    if not items:
+        return []
+
+    session_times = SessionTime.objects.select_related('facility').in_bulk(
+        {session_time_id for session_time_id, _, _ in items}
+    )
+    dates = {date for _, date, _ in items}
+
+    snapshots = {
+        (session_time_id, date): price
+        for session_time_id, date, price in SessionPriceSnapshot.objects.filter(
+            session_time_id__in=session_times.keys(),
+            date__in=dates
+        ).order_by().values_list('session_time_id', 'date', 'final_price')
+    }
+
+    # موتور قیمت و تعطیلات فقط برای مواردی که قیمت ذخیره‌شده ندارند
+    unpriced = [
+        (session_time_id, date) for session_time_id, date, _ in items
+        if session_time_id in session_times and (session_time_id, date) not in snapshots
+    ]
+    engines = _load_pricing_engines({session_times[session_time_id].facility_id for session_time_id, _ in unpriced})
+    if unpriced:
+        unpriced_dates = {date for _, date in unpriced}
+        holidays = {h['date'] for h in Holiday.get_holidays_in_range(min(unpriced_dates), max(unpriced_dates))}
+        for engine in engines.values():
+            engine.remember_holidays(unpriced_dates, holidays)
+
+    codes = {code for _, _, code in items if code}
+    discounts = {discount.code: discount for discount in Discount.objects.filter(code__in=codes)} if codes else {}
+    used_counts = {}
+    if user is not None and any(discount.user_usage_limit is not None for discount in discounts.values()):
+        used_counts = dict(
+            Reservation.objects.filter(
+                discount__in=discounts.values(),
+                user=user,
+                status='confirmed'
+            ).values('discount').annotate(count=Count('pk')).values_list('discount', 'count')
+        )
+
+    quotes = []
+    for session_time_id, date, code in items:
+        session_time = session_times.get(session_time_id)
+        if session_time is None:
+            quotes.append(None)
+            continue
+
+        original_price = snapshots.get((session_time_id, date))
+        if original_price is None:
+            engine = engines[session_time.facility_id]
+            original_price = engine.apply(session_time, date, session_time.get_base_price_for_date(date))
+
+        discount = discounts.get(code)
+        discount_amount = ZERO
+        if discount is not None:
+            discount_amount = discount.calculate_discount_amount(
+                original_price,
+                user=user,
+                user_used_count=used_counts.get(discount.pk, 0)
+            )
+            if discount_amount == ZERO:
+                discount = None
+
+        quotes.append({
+            'session_time_id': session_time_id,
+            'date': date,
+            'discount': discount,
+            'original_price': original_price,
+            'discount_amount': discount_amount,
+            'final_price': max(original_price - discount_amount, ZERO),
+        })
+    return quotes
+
+
+class PriceMemo:
+    """
+    حافظه موقت قیمت سانس‌ها در طول یک درخواست، با کلید (session_time_id, date, rules_version).
+    شمارنده‌های hits/misses نشان می‌دهند حافظه چقدر موثر بوده است.
+    """
+
+    def __init__(self):
+        self._prices = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_time, date, compute):
+        key = (session_time.pk, date, rules_version(session_time.facility_id))
+        try:
+            price = self._prices[key]
+        except KeyError:
+            self.misses += 1
+            price = self._prices[key] = compute()
+        else:
+            self.hits += 1
+        return price
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_ratio': self.hit_ratio}
+
+
+_current_memo = ContextVar('gym_price_memo', default=None)
+_memo_totals = {'hits': 0, 'misses': 0}
+_memo_totals_lock = threading.Lock()
+
+
+def current_price_memo():
+    """PriceMemo فعال در درخواست جاری، یا None"""
+    return _current_memo.get()
+
+
+@contextmanager
+def price_memo_scope():
+    """فعال کردن PriceMemo برای بلوک جاری؛ اگر از قبل فعال باشد، همان استفاده می‌شود"""
+    memo = _current_memo.get()
+    if memo is not None:
+        yield memo
+        return
+
+    memo = PriceMemo()
+    token = _current_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _current_memo.reset(token)
+        with _memo_totals_lock:
+            _memo_totals['hits'] += memo.hits
+            _memo_totals['misses'] += memo.misses
+        logger.debug("price memo: %(hits)d hits, %(misses)d misses (%(hit_ratio).0%%)", memo.stats())
+
+
+def price_memo_stats():
+    """مجموع hits/misses همه PriceMemoهای بسته‌شده در این پروسه"""
+    with _memo_totals_lock:
+        hits, misses = _memo_totals['hits'], _memo_totals['misses']
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses) if hits + misses else 0.0}
+
+
+def memoize_prices(view):
+    """
+    دکوراتور ویو (تابعی یا متد ادمین) برای فعال کردن PriceMemo در طول درخواست.
+    پاسخ‌های TemplateResponse داخل همان محدوده رندر می‌شوند تا ستون‌های قیمت نیز از حافظه بخوانند؛
+    شمارنده‌ها در هدر X-Price-Memo پاسخ قرار می‌گیرند.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with price_memo_scope() as memo:
+            response = view(*args, **kwargs)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+            response['X-Price-Memo'] = f"hits={memo.hits}; misses={memo.misses}"
+            return response
+    return wrapper
+
+
+def memoized_price(session_time, date, compute):
+    """
+    حاصل compute از PriceMemo فعال (در صورت وجود)، برای قیمت‌هایی که از مسیر
+    SessionTime.get_price_for_date نمی‌آیند (مثلا ستون‌های ادمین).
+    """
+    memo = _current_memo.get()
+    if memo is None:
+        return compute()
+    return memo.get(session_time, date, compute)
@@ -0,0 +1,125 @@
+"""
+نگه‌داری کوتاه‌مدت جا (SeatHold) بین انتخاب سانس و پرداخت.
+
+hold_seat یک جا را با مهلت SEAT_HOLD_MINUTES از ظرفیت کم می‌کند (held_count در SessionDayOccupancy،
+زیر همان محدودیت دیتابیس رزروها) و تراکنش را فوراً می‌بندد؛ در طول پرداخت هیچ قفلی نگه داشته نمی‌شود.
+confirm_hold در یک تراکنش کوتاه نگه‌داری را آزاد و رزرو تایید شده را ثبت می‌کند.
+
+نگه‌داری‌های منقضی‌شده هنگام خواندن ظرفیت (next_hold_expiry شمارنده گذشته باشد) و با دستور
+دوره‌ای expire_reservations آزاد می‌شوند و ظرفیت آزادشده به لیست انتظار می‌رسد.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .availability_cache import invalidate_slots
+from .booking import create_reservation, get_discount, reservation_for, run_with_retry
+from .models import SeatHold, SessionTime
+from .occupancy import hold
+from .waitlist import promote_next
+
+
+def hold_ttl():
+    """مهلت نگه‌داری جا"""
+    return timedelta(minutes=getattr(settings, 'SEAT_HOLD_MINUTES', 10))
+
+
+def hold_seat(user, session_time, date):
+    """
+    نگه‌داری یک جا برای کاربر؛ اگر کاربر از قبل جای معتبری در همین سانس و تاریخ داشته باشد همان برگردانده می‌شود.
+    در صورت تکمیل ظرفیت، تعطیلی یا رزرو تکراری ValidationError.
+    """
+    def create():
+        reclaim_expired_holds(session_time.pk, date)
+        existing = SeatHold.objects.filter(user=user, session_time=session_time, date=date).first()
+        if existing is not None:
+            return existing
+        # ردیف لغو یا منقضی‌شده قبلی کاربر هنگام تایید دوباره استفاده می‌شود؛ رزرو فعال یا انجام‌شده رد می‌شود
+        reservation = reservation_for(user, session_time, date)
+        reservation.status = 'pending'
+        reservation.clean()
+
+        expires_at = timezone.now() + hold_ttl()
+        hold(session_time, date, expires_at)
+        try:
+            with transaction.atomic():
+                seat_hold = SeatHold.objects.create(user=user, session_time=session_time, date=date,
+                                                    expires_at=expires_at)
+        except IntegrityError:
+            raise ValidationError(_("شما قبلاً یک جا در این سانس نگه داشته‌اید."))
+        invalidate_slots([(session_time.pk, date)], {session_time.pk: session_time.facility_id})
+        return seat_hold
+
+    return run_with_retry(create)
+
+
+def _take(seat_hold):
+    """حذف نگه‌داری در صورت وجود (سیگنال post_delete جای آن را آزاد می‌کند)؛ True اگر ردیف حذف شده باشد"""
+    deleted, _rows = SeatHold.objects.filter(pk=seat_hold.pk).delete()
+    return bool(deleted)
+
+
+def confirm_hold(seat_hold, discount_code=None):
+    """
+    تبدیل نگه‌داری به رزرو تایید شده (پس از پرداخت)؛ ردیف لغو یا منقضی‌شده قبلی کاربر دوباره فعال می‌شود.
+    نگه‌داری منقضی‌شده‌ای که هنوز آزاد نشده همچنان قابل تبدیل است؛ اگر آزاد شده باشد ValidationError.
+    """
+    discount = get_discount(discount_code) if discount_code else None
+
+    def confirm():
+        if not _take(seat_hold):
+            raise ValidationError(_("مهلت نگه‌داری این جا به پایان رسیده است."))
+        return create_reservation(seat_hold.user, seat_hold.session_time, seat_hold.date, discount,
+                                  status='confirmed')
+
+    return run_with_retry(confirm)
+
+
+def release_hold(seat_hold):
+    """انصراف کاربر از نگه‌داری؛ جای آزادشده به لیست انتظار می‌رسد"""
+    def release():
+        if _take(seat_hold):
+            promote_next(seat_hold.session_time, seat_hold.date)
+
+    run_with_retry(release)
+
+
+def reclaim_expired_holds(session_time_id=None, date=None, now=None):
+    """
+    آزاد کردن نگه‌داری‌های منقضی‌شده (همه یا فقط یک سانس و تاریخ) و واگذاری جاها به لیست انتظار.
+    خروجی: تعداد نگه‌داری‌های آزادشده
+    """
+    expired = SeatHold.objects.filter(expires_at__lte=now or timezone.now())
+    if session_time_id is not None:
+        expired = expired.filter(session_time_id=session_time_id, date=date)
+
+    with transaction.atomic():
+        slots = defaultdict(list)
+        for pk, slot_session_time_id, slot_date in expired.select_for_update(skip_locked=True).values_list(
+                'pk', 'session_time_id', 'date'):
+            slots[slot_session_time_id, slot_date].append(pk)
+        if not slots:
+            return 0
+
+        released = 0
+        session_times = SessionTime.objects.in_bulk({slot[0] for slot in slots})
+        for (slot_session_time_id, slot_date), pks in slots.items():
+            deleted, _rows = SeatHold.objects.filter(pk__in=pks).delete()
+            released += deleted
+            for _seat in range(deleted):
+                if promote_next(session_times[slot_session_time_id], slot_date) is None:
+                    break
+    return released
+
+
+def reclaim_on_read(session_time_id, date, now=None):
+    """آزادسازی تنبل هنگام خواندن ظرفیت؛ اگر دیتابیس قفل باشد خواندن با مقدار فعلی ادامه می‌یابد"""
+    try:
+        return reclaim_expired_holds(session_time_id, date, now)
+    except OperationalError:
+        return 0
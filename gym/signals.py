@@ -0,0 +1,109 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import date_dimension, snapshots
+from .availability_cache import invalidate_all_grids, invalidate_facility_grids, invalidate_slots
+from .jalali import to_gregorian, to_jalali
+from .holiday_bitset import refresh_holiday_bitset
+from .holidays import invalidate_holiday_calendar
+from .models import Holiday, PricingRule, Reservation, SeatHold, SessionTime, SportFacility
+from .occupancy import release, release_holds, sync_capacity
+from .pricing import invalidate_pricing_engine
+
+
+def _holiday_dates(holiday):
+    """تاریخ‌های میلادی یک تعطیلی در افق قیمت‌های ذخیره‌شده"""
+    if not holiday.is_recurring:
+        return [holiday.date] if holiday.date else []
+
+    start_date, end_date = snapshots.snapshot_horizon()
+    dates = []
+    for year in range(to_jalali(start_date)[0], to_jalali(end_date)[0] + 1):
+        try:
+            dates.append(to_gregorian(year, holiday.jalali_month, holiday.jalali_day))
+        except (TypeError, ValueError):  # مثلا 30 اسفند در سال غیر کبیسه
+            pass
+    return dates
+
+
+@receiver([post_save, post_delete], sender=PricingRule)
+def refresh_rule_pricing(sender, instance, **kwargs):
+    """با تغییر قوانین یک سالن، موتور و قیمت‌های ذخیره‌شده آن سالن دوباره ساخته می‌شوند."""
+    invalidate_pricing_engine(instance.facility_id)
+    invalidate_facility_grids(instance.facility_id)
+    transaction.on_commit(partial(snapshots.refresh_facility, instance.facility_id))
+
+
+@receiver(post_save, sender=SessionTime)
+def refresh_session_pricing(sender, instance, created, **kwargs):
+    invalidate_pricing_engine(instance.facility_id)
+    invalidate_facility_grids(instance.facility_id)
+    transaction.on_commit(partial(snapshots.refresh_session, instance))
+    if not created:
+        sync_capacity(instance)
+
+
+@receiver(post_delete, sender=SessionTime)
+def invalidate_session_pricing(sender, instance, **kwargs):
+    # قیمت‌های ذخیره‌شده سانس به صورت CASCADE حذف می‌شوند
+    invalidate_pricing_engine(instance.facility_id)
+    invalidate_facility_grids(instance.facility_id)
+
+
+@receiver(post_save, sender=SportFacility)
+def refresh_facility_pricing(sender, instance, created, **kwargs):
+    """قیمت ساعتی پیش‌فرض سالن در قیمت سانس‌های ساعتی استفاده می‌شود."""
+    if not created:
+        invalidate_facility_grids(instance.pk)
+        transaction.on_commit(partial(snapshots.refresh_facility, instance.pk))
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reservation_capacity(sender, instance, **kwargs):
+    """حذف رزرو فعال، ظرفیت آن سانس و تاریخ را آزاد می‌کند (لغو در Reservation.save انجام می‌شود)."""
+    if instance.status in Reservation.ACTIVE_STATUSES:
+        release(instance.session_time_id, instance.date)
+    invalidate_slots([(instance.session_time_id, instance.date)])
+
+
+@receiver(post_save, sender=Reservation)
+def invalidate_reservation_availability(sender, instance, **kwargs):
+    """کش ظرفیت و جدول هفتگی سانس و تاریخ رزرو (و سانس و تاریخ قبلی در صورت جابجایی) باطل می‌شود."""
+    invalidate_slots(
+        instance.get_affected_slots(),
+        facilities={instance.session_time_id: instance.session_time.facility_id}
+    )
+
+
+@receiver(post_delete, sender=SeatHold)
+def release_seat_hold(sender, instance, **kwargs):
+    """تبدیل، انصراف یا انقضای نگه‌داری (و حذف آبشاری آن) جای نگه‌داشته‌شده را آزاد می‌کند."""
+    release_holds(instance.session_time_id, instance.date, 1)
+    invalidate_slots([(instance.session_time_id, instance.date)])
+
+
+def holidays_changed(dates=None):
+    """
+    باطل کردن کش‌های وابسته به تعطیلات و بازسازی قیمت‌ها، جدول تاریخ و بیت‌ست تعطیلات پس از commit.
+    dates: تاریخ‌های میلادی تغییر کرده؛ بدون آن کل افق قیمت‌ها بازسازی می‌شود.
+    برای تغییرات گروهی (bulk) که سیگنال ندارند مستقیماً فراخوانی می‌شود.
+    """
+    invalidate_holiday_calendar()
+    invalidate_pricing_engine()
+    invalidate_all_grids()
+    transaction.on_commit(partial(snapshots.refresh_holiday_dates, dates))
+    transaction.on_commit(date_dimension.refresh_holiday_flags)
+    transaction.on_commit(refresh_holiday_bitset)
+
+
+@receiver([post_save, post_delete], sender=Holiday)
+def refresh_holiday_pricing(sender, instance, created=False, **kwargs):
+    """
+    تعطیلات روی قوانین 'روزهای خاص' همه سالن‌ها و پرچم تعطیلی جدول DateDimension اثر دارند.
+    برای تعطیلی جدید یا حذف‌شده فقط همان تاریخ‌ها، و برای ویرایش (که تاریخ قبلی مشخص نیست) کل افق بازسازی می‌شود.
+    """
+    is_update = kwargs['signal'] is post_save and not created
+    holidays_changed(None if is_update else _holiday_dates(instance))
@@ -0,0 +1,132 @@
+"""
+ساخت و به‌روزرسانی جدول SessionPriceSnapshot.
+
+قیمت هر سانس برای تاریخ‌های افق پیش رو (PRICE_SNAPSHOT_HORIZON_DAYS، پیش‌فرض 90 روز)
+یک بار محاسبه و ذخیره می‌شود تا محاسبه قیمت رزرو فقط یک سطر ایندکس‌شده را بخواند.
+سیگنال‌ها فقط همین افق را به‌روز می‌کنند، پس هیچ قیمتی بعد از آن ذخیره نمی‌شود (build_price_snapshots --days
+از افق تنظیم‌شده بیشتر نمی‌پذیرد).
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PricingRule, SessionPriceSnapshot, SessionTime
+from .money import SCALE, to_decimal
+from .price_calendar import holiday_dates, price_units
+from .pricing import price_for_date
+
+DEFAULT_HORIZON_DAYS = 90
+# رقم‌های اعشار قیمت‌های ذخیره‌شده: همان دقت واحد داخلی هسته صحیح
+PRICE_PLACES = len(str(SCALE)) - 1
+
+
+def snapshot_horizon(start_date=None, days=None):
+    """بازه [شروع، پایان] افق قیمت‌های ذخیره‌شده"""
+    start_date = start_date or timezone.localdate()
+    days = days or getattr(settings, 'PRICE_SNAPSHOT_HORIZON_DAYS', DEFAULT_HORIZON_DAYS)
+    return start_date, start_date + timedelta(days=days - 1)
+
+
+def build_snapshots(session_times, start_date, end_date, dates=None):
+    """
+    محاسبه و upsert قیمت سانس‌ها در بازه داده‌شده.
+    اگر dates داده شود، فقط همان تاریخ‌ها (در صورت برگزاری سانس) نوشته می‌شوند.
+    تعداد سطرهای نوشته‌شده را برمی‌گرداند.
+    """
+    holidays = holiday_dates(start_date, end_date)
+    only_dates = set(dates) if dates is not None else None
+
+    rows = []
+    for session_time in session_times:
+        # محاسبه برداری با هسته صحیح؛ مقادیر با دقت کامل هسته ذخیره و فقط در رزرو به ریال گرد می‌شوند
+        session_dates, base_units, final_units, applied = price_units(
+            session_time, start_date, end_date, holidays=holidays
+        )
+        rule_ids = np.array([rule_id for rule_id, _ in applied], dtype='int64')
+        masks = np.array([mask for _, mask in applied], dtype=bool).reshape(len(applied), len(session_dates))
+        for index, day in enumerate(session_dates.tolist()):
+            if only_dates is not None and day not in only_dates:
+                continue
+            rows.append(SessionPriceSnapshot(
+                session_time=session_time,
+                date=day,
+                base_price=to_decimal(int(base_units[index]), PRICE_PLACES),
+                final_price=to_decimal(int(final_units[index]), PRICE_PLACES),
+                applied_rule_ids=','.join(str(rule_id) for rule_id in rule_ids[masks[:, index]].tolist()),
+            ))
+
+    SessionPriceSnapshot.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['session_time', 'date'],
+        update_fields=['base_price', 'final_price', 'applied_rule_ids', 'computed_at'],
+    )
+    return len(rows)
+
+
+def refresh_facility(facility_id, start_date=None, end_date=None):
+    """بازسازی قیمت همه سانس‌های فعال یک سالن در افق (یا بازه داده‌شده)"""
+    horizon_start, horizon_end = snapshot_horizon()
+    start_date = max(start_date or horizon_start, horizon_start)
+    end_date = min(end_date or horizon_end, horizon_end)
+    if start_date > end_date:
+        return 0
+
+    SessionPriceSnapshot.objects.filter(
+        session_time__facility_id=facility_id,
+        session_time__is_active=False,
+    ).delete()
+    session_times = SessionTime.objects.filter(
+        facility_id=facility_id,
+        is_active=True
+    ).select_related('facility')
+    return build_snapshots(session_times, start_date, end_date)
+
+
+def refresh_session(session_time):
+    """
+    بازسازی قیمت یک سانس در افق؛ قیمت سانس‌های غیرفعال حذف می‌شود.
+    قیمت‌های افق پیش از ساخت حذف می‌شوند تا پس از تغییر روز هفته سانس، تاریخ‌های روز قبلی باقی نمانند.
+    """
+    if not session_time.is_active:
+        SessionPriceSnapshot.objects.filter(session_time=session_time).delete()
+        return 0
+    start_date, end_date = snapshot_horizon()
+    with transaction.atomic():
+        SessionPriceSnapshot.objects.filter(session_time=session_time, date__gte=start_date).delete()
+        return build_snapshots([session_time], start_date, end_date)
+
+
+def refresh_holiday_dates(dates=None):
+    """
+    بازسازی قیمت سالن‌هایی که قانون 'روزهای خاص' فعال دارند.
+    dates: تاریخ‌های میلادی تغییر کرده؛ بدون آن کل افق بازسازی می‌شود.
+    """
+    start_date, end_date = snapshot_horizon()
+    facility_ids = PricingRule.objects.filter(
+        rule_type='special_day',
+        is_active=True
+    ).values('facility_id')
+    session_times = SessionTime.objects.filter(
+        facility_id__in=facility_ids,
+        is_active=True
+    ).select_related('facility')
+    return build_snapshots(session_times, start_date, end_date, dates=dates)
+
+
+def get_snapshot_price(session_time, date):
+    """
+    قیمت نهایی ذخیره‌شده سانس؛ در صورت نبود (خارج از افق یا پیش از ساخت قیمت‌ها)، قیمت با قوانینی
+    که دیتابیس برای همان تاریخ و ساعت انتخاب می‌کند محاسبه می‌شود (gym.pricing.price_for_date).
+    """
+    price = SessionPriceSnapshot.objects.filter(
+        session_time=session_time,
+        date=date
+    ).values_list('final_price', flat=True).first()
+    if price is None:
+        return price_for_date(session_time, date)
+    return price
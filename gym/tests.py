@@ -1,3 +1,1954 @@
-from django.test import TestCase
+import json
+import random
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from datetime import date, time, timedelta
+from decimal import ROUND_HALF_EVEN, Decimal
 
-# Create your tests here.
+import unittest
+
+import jdatetime
+import numpy as np
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from user.models import User
+
+from . import date_dimension, holiday_bitset, holidays, jalali, pricing
+from .availability import availability_grid, search_open_slots, week_bounds
+from .availability_cache import (
+    booked_key, cache_stats, get_availability_grid, get_taken_seats, reset_cache_stats
+)
+from .booking import book_session, run_with_retry
+from .benchmarks import hammer_booking, quote_sample, run, seed
+from .holiday_bitset import HolidayBitset, bitset_path, get_holiday_bitset, write_bitset
+from .holidays import (
+    HolidayCalendar, bookable_dates, count_bookable, get_holiday_calendar, holiday_calendar_version, holidays_between,
+    invalidate_holiday_calendar, weekday_dates,
+)
+from .price_calendar import get_price_calendars
+from .models import (
+    DateDimension, Discount, Holiday, PricingRule, RecurringReservation, Reservation, SessionDayOccupancy, SessionPriceSnapshot,
+    SeatHold, SessionTime, SportFacility, Tag, WaitlistEntry,
+)
+from .money import (
+    RuleKernel, discount_units, session_base_units, to_decimal, to_rials, to_units,
+)
+from .pricing import (
+    FacilityPricingEngine, IntervalIndex, get_pricing_engine, invalidate_pricing_engine, price_for_date,
+    memoize_prices, memoized_price, price_memo_scope, price_memo_stats, quote_many,
+)
+from .seat_holds import confirm_hold, hold_seat, reclaim_expired_holds
+from .snapshots import build_snapshots, get_snapshot_price, snapshot_horizon
+from .waitlist import expire_pending_reservations, join_waitlist
+
+ADJUSTMENT_TYPES = [choice for choice, _ in PricingRule.ADJUSTMENT_TYPE_CHOICES]
+# کش حافظه پروسه به جای کش فایل مشترک DATA_DIR/cache، تا تست‌ها (و cache.clear) کش واقعی را نخوانند و پاک نکنند
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'gym-tests'}}
+
+
+def setUpModule():
+    unittest.enterModuleContext(override_settings(CACHES=TEST_CACHES))
+
+
+def whole_rials(amount):
+    return amount.quantize(Decimal('1'), rounding=ROUND_HALF_EVEN)
+
+
+def random_adjustment(rng):
+    adjustment_type = rng.choice(ADJUSTMENT_TYPES)
+    if adjustment_type.startswith('percentage'):
+        value = Decimal(rng.randint(1, 9999)) / 100
+    else:
+        value = Decimal(rng.randint(0, 500) * 1000)
+    return adjustment_type, value
+
+
+class GymTestMixin:
+    """
+    سازنده‌های داده مشترک تست‌ها و پاک کردن وضعیت پروسه پیش از هر تست: کش، آمار کش، تقویم تعطیلات
+    و موتور قیمت‌گذاری با rollback تست‌ها باطل نمی‌شوند و شناسه سالن‌ها بین کلاس‌های تست تکرار می‌شود.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        reset_cache_stats()
+        invalidate_holiday_calendar()
+        invalidate_pricing_engine()
+
+    @staticmethod
+    def create_manager():
+        return User.objects.create_user(phone_number='09120000000', username='manager')
+
+    @staticmethod
+    def create_customers(count):
+        return [
+            User.objects.create_user(phone_number=f'0913{index:07d}', username=f'customer{index}')
+            for index in range(count)
+        ]
+
+    @staticmethod
+    def create_facility(manager, **fields):
+        return SportFacility.objects.create(**{
+            'name': 'سالن', 'capacity': 40, 'hourly_price': Decimal('120000'), 'address': '-', 'manager': manager,
+            **fields
+        })
+
+    @staticmethod
+    def create_evening_session(facility, **fields):
+        """سانس دوشنبه (روز 2) ساعت 18 تا 19 با قیمت ثابت"""
+        return SessionTime.objects.create(**{
+            'facility': facility, 'session_name': 'عصر', 'day_of_week': 2, 'start_time': time(18),
+            'end_time': time(19), 'capacity': 2, 'price_type': 'fixed', 'fixed_price': Decimal('200000'), **fields
+        })
+
+    @staticmethod
+    def next_week_day(day_of_week):
+        """اولین تاریخ با روز هفته شمسی day_of_week از هفت روز بعد"""
+        start = timezone.localdate() + timedelta(days=7)
+        return weekday_dates(day_of_week, start, start + timedelta(days=6))[0]
+
+
+class MoneyKernelEquivalenceTests(SimpleTestCase):
+    """هسته صحیح gym/money.py باید همان ریال‌هایی را بدهد که مسیر Decimal پس از ذخیره می‌دهد."""
+
+    def setUp(self):
+        self.rng = random.Random(1404)
+
+    def test_rule_chains_match_decimal_path(self):
+        for _ in range(2000):
+            price = Decimal(self.rng.randint(0, 5_000_000))
+            units = to_units(price)
+            for _ in range(self.rng.randint(1, 4)):
+                adjustment_type, value = random_adjustment(self.rng)
+                rule = PricingRule(price_adjustment_type=adjustment_type, adjustment_value=value)
+                price = rule.apply_to_price(price)
+                units = RuleKernel(adjustment_type, value)(units)
+            self.assertEqual(to_rials(max(units, 0)), whole_rials(max(price, Decimal('0'))))
+
+    def test_hourly_base_price_matches_decimal_path(self):
+        facility = SportFacility(hourly_price=Decimal('350000'))
+        for minutes in range(5, 24 * 60, 7):
+            end = time(minutes // 60, minutes % 60)
+            session_time = SessionTime(facility=facility, price_type='hourly', start_time=time(0), end_time=end)
+            day = date(2025, 3, 1)
+            self.assertEqual(
+                to_rials(session_base_units(session_time, day)),
+                whole_rials(session_time.get_base_price_for_date(day))
+            )
+
+    def test_dynamic_base_price_uses_persian_weekend(self):
+        session_time = SessionTime(price_type='dynamic', base_weekday_price=Decimal('100'),
+                                   base_weekend_price=Decimal('200'))
+        for offset in range(7):
+            day = date(2025, 3, 1) + timedelta(days=offset)
+            self.assertEqual(to_units(session_time.get_base_price_for_date(day)),
+                             session_base_units(session_time, day))
+
+    def test_discounts_match_decimal_path(self):
+        today = timezone.now().date()
+        for _ in range(2000):
+            discount_type = self.rng.choice(['percentage', 'fixed'])
+            discount = Discount(
+                discount_type=discount_type,
+                amount=Decimal(self.rng.randint(1, 10000)) / 100 if discount_type == 'percentage'
+                else Decimal(self.rng.randint(0, 200) * 1000),
+                start_date=today,
+                end_date=today + timedelta(days=self.rng.randint(-1, 30)),
+                min_price=self.rng.choice([None, Decimal(self.rng.randint(0, 300) * 1000)]),
+                max_discount=self.rng.choice([None, Decimal(self.rng.randint(0, 100) * 1000)]),
+                usage_limit=self.rng.choice([None, 5]),
+                used_count=self.rng.randint(0, 6),
+            )
+            price = Decimal(self.rng.randint(0, 1_000_000))
+            self.assertEqual(
+                to_rials(discount_units(discount, to_units(price))),
+                whole_rials(discount.calculate_discount_amount(price))
+            )
+
+    def test_rounding_is_half_even(self):
+        self.assertEqual(to_rials(to_units(Decimal('2.5'))), 2)
+        self.assertEqual(to_rials(to_units(Decimal('3.5'))), 4)
+        self.assertEqual(to_decimal(to_units(Decimal('1.005')), 2), Decimal('1.00'))
+        self.assertEqual(to_decimal(to_units(Decimal('1.015')), 2), Decimal('1.02'))
+
+
+class BulkPricingEquivalenceTests(GymTestMixin, TestCase):
+    """تقویم قیمت و قیمت‌های ذخیره‌شده (مسیر صحیح) در برابر get_price_for_date (مسیر Decimal)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        manager = cls.create_manager()
+        cls.facility = cls.create_facility(manager)
+        cls.session_times = [
+            SessionTime.objects.create(
+                facility=cls.facility, session_name=f'سانس {day}', day_of_week=day,
+                start_time=time(8), end_time=time(9, 40), capacity=10,
+                price_type=['fixed', 'hourly', 'dynamic'][day % 3],
+                fixed_price=Decimal('210000'),
+                base_weekday_price=Decimal('150000'),
+                base_weekend_price=Decimal('230000'),
+            )
+            for day in range(7)
+        ]
+        start = timezone.localdate()
+        for index in range(30):
+            adjustment_type, value = random_adjustment(rng)
+            PricingRule.objects.create(
+                facility=cls.facility,
+                name=f'قانون {index}',
+                rule_type=rng.choice([choice for choice, _ in PricingRule.RULE_TYPE_CHOICES]),
+                start_time_rule=time(rng.randint(6, 9)),
+                end_time_rule=time(rng.randint(10, 22)),
+                days_of_week=','.join(str(day) for day in rng.sample(range(7), 3)),
+                start_date=start + timedelta(days=rng.randint(0, 60)),
+                end_date=start + timedelta(days=rng.randint(61, 200)),
+                price_adjustment_type=adjustment_type,
+                adjustment_value=value,
+                priority=rng.randint(0, 10),
+            )
+        Holiday.objects.create(date=start + timedelta(days=10), description='تعطیل')
+        Holiday.objects.create(date=start + timedelta(days=45), description='تعطیل')
+
+    def test_price_calendar_matches_decimal_path(self):
+        start = timezone.localdate()
+        for session_time in self.session_times:
+            calendar = session_time.get_price_calendar(start, start + timedelta(days=180))
+            self.assertGreaterEqual(len(calendar), 25)
+            for day, price in calendar.items():
+                self.assertEqual(price, whole_rials(session_time.get_price_for_date(day)))
+
+    def test_snapshots_match_decimal_path(self):
+        # مبلغ ذخیره‌شده رزرو نباید به وجود یا نبود قیمت ذخیره‌شده سانس وابسته باشد
+        start = timezone.localdate()
+        build_snapshots(self.session_times, start, start + timedelta(days=120))
+        user = User.objects.create_user(phone_number='09130000000', username='customer')
+        snapshots = list(SessionPriceSnapshot.objects.select_related('session_time__facility'))
+        self.assertGreater(len(snapshots), 100)
+        for snapshot in snapshots:
+            reservation = Reservation.objects.create(user=user, session_time=snapshot.session_time, date=snapshot.date)
+            reservation.refresh_from_db()
+            expected = whole_rials(snapshot.session_time.get_price_for_date(snapshot.date))
+            self.assertEqual((reservation.original_price, reservation.final_price), (expected, expected))
+
+    def test_snapshot_prices_are_rounded_once(self):
+        session_time = self.session_times[0]
+        PricingRule.objects.filter(facility=self.facility).delete()
+        PricingRule.objects.create(facility=self.facility, name='درصدی', rule_type='day_of_week',
+                                   days_of_week=str(session_time.day_of_week),
+                                   price_adjustment_type='percentage_increase', adjustment_value=Decimal('12.34'))
+        invalidate_pricing_engine()
+        start = timezone.localdate()
+        day = weekday_dates(session_time.day_of_week, start, start + timedelta(days=6))[0]
+        for base in range(10001, 12001, 2):
+            session_time.fixed_price = Decimal(base)
+            build_snapshots([session_time], day, day)
+            self.assertEqual(
+                whole_rials(get_snapshot_price(session_time, day)),
+                whole_rials(session_time.get_price_for_date(day))
+            )
+
+        session_time.fixed_price = Decimal('10077')
+        session_time.save()
+        build_snapshots([session_time], day, day)
+        self.assertEqual(session_time.price_snapshots.get(date=day).final_price, Decimal('11320.5018'))
+        user = User.objects.create_user(phone_number='09130000000', username='customer')
+        reservation = Reservation.objects.create(user=user, session_time=session_time, date=day)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.original_price, Decimal('11321'))
+
+
+class SnapshotRefreshTests(GymTestMixin, TestCase):
+    """قیمت‌های ذخیره‌شده (SessionPriceSnapshot) پس از تغییر قوانین، سانس‌ها و تعطیلات به‌روز می‌شوند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        cls.facility = cls.create_facility(manager, hourly_price=Decimal('150000'))
+        cls.session_times = [
+            SessionTime.objects.create(
+                facility=cls.facility, session_name=f'سانس {day}', day_of_week=day, start_time=time(10),
+                end_time=time(11), capacity=10, price_type='fixed', fixed_price=Decimal('200000')
+            )
+            for day in (0, 3)
+        ]
+        PricingRule.objects.create(facility=cls.facility, name='تعطیلات', rule_type='special_day',
+                                   price_adjustment_type='fixed_increase', adjustment_value=Decimal('40000'))
+
+    def setUp(self):
+        super().setUp()
+        build_snapshots(self.session_times, *snapshot_horizon())
+
+    def assertSnapshotsCurrent(self):
+        start, end = snapshot_horizon()
+        for session_time in SessionTime.objects.filter(facility=self.facility, is_active=True):
+            snapshots = {snapshot.date: snapshot for snapshot in session_time.price_snapshots.all()}
+            self.assertEqual(sorted(snapshots), weekday_dates(session_time.day_of_week, start, end))
+            for day, snapshot in snapshots.items():
+                self.assertEqual(snapshot.final_price, session_time.get_price_for_date(day))
+
+    def test_rule_changes_refresh_facility_snapshots(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = PricingRule.objects.create(
+                facility=self.facility, name='روزهای هفته', rule_type='day_of_week', days_of_week='0,3',
+                price_adjustment_type='percentage_increase', adjustment_value=Decimal('20'), priority=3
+            )
+        self.assertSnapshotsCurrent()
+        self.assertTrue(all(
+            rule.pk in snapshot.get_applied_rule_ids() for snapshot in SessionPriceSnapshot.objects.all()
+        ))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.delete()
+        self.assertSnapshotsCurrent()
+        self.assertFalse(any(
+            rule.pk in snapshot.get_applied_rule_ids() for snapshot in SessionPriceSnapshot.objects.all()
+        ))
+
+    def test_engine_cached_before_commit_is_not_used_for_the_rebuild(self):
+        stale = get_pricing_engine(self.facility.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            PricingRule.objects.create(
+                facility=self.facility, name='قیمت ثابت', rule_type='day_of_week', days_of_week='0',
+                price_adjustment_type='fixed_price', adjustment_value=Decimal('5'), priority=5
+            )
+            # thread دیگری پیش از commit موتور را از قوانین commit شده قبلی ساخته و کش کرده است
+            pricing._engines[self.facility.pk] = stale
+        self.assertEqual(
+            set(self.session_times[0].price_snapshots.values_list('final_price', flat=True)), {Decimal('5')}
+        )
+
+    def test_weekday_change_drops_the_old_dates(self):
+        session_time = self.session_times[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            session_time.day_of_week = 1
+            session_time.save()
+        self.assertSnapshotsCurrent()
+
+    def test_command_keeps_snapshots_within_the_horizon(self):
+        with self.assertRaises(CommandError):
+            call_command('build_price_snapshots', '--days', '365', stdout=StringIO())
+
+        end = snapshot_horizon()[1]
+        SessionPriceSnapshot.objects.create(
+            session_time=self.session_times[0],
+            date=weekday_dates(0, end + timedelta(days=1), end + timedelta(days=7))[0],
+            base_price=Decimal('200000'),
+            final_price=Decimal('200000')
+        )
+        call_command('build_price_snapshots', '--days', '30', stdout=StringIO())
+        self.assertFalse(SessionPriceSnapshot.objects.filter(date__gt=end).exists())
+        self.assertSnapshotsCurrent()
+
+    def test_session_and_holiday_changes_refresh_snapshots(self):
+        inactive, session_time = self.session_times
+        with self.captureOnCommitCallbacks(execute=True):
+            inactive.is_active = False
+            inactive.save()
+        self.assertFalse(inactive.price_snapshots.exists())
+
+        day = session_time.price_snapshots.order_by('date')[2].date
+        with self.captureOnCommitCallbacks(execute=True):
+            Holiday.objects.create(date=day, description='تعطیل')
+        self.assertSnapshotsCurrent()
+        self.assertEqual(session_time.price_snapshots.get(date=day).final_price, Decimal('240000'))
+        self.assertEqual(session_time.price_snapshots.get(date=day + timedelta(days=7)).final_price,
+                         Decimal('200000'))
+
+
+class PriceCalendarTests(GymTestMixin, TestCase):
+    """تقویم قیمت برداری (gym/price_calendar.py) در برابر قیمت تک‌تاریخ get_price_for_date."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        facility = cls.create_facility(manager, hourly_price=Decimal('150000'))
+        cls.session_times = [
+            SessionTime.objects.create(
+                facility=facility, session_name='صبح', day_of_week=1, start_time=time(7, 15), end_time=time(8, 5),
+                capacity=10, price_type='hourly'
+            ),
+            SessionTime.objects.create(
+                facility=facility, session_name='پنجشنبه', day_of_week=5, start_time=time(18), end_time=time(19),
+                capacity=10, price_type='dynamic', base_weekday_price=Decimal('100000'),
+                base_weekend_price=Decimal('170000')
+            ),
+        ]
+        cls.start = timezone.localdate()
+        cls.end = cls.start + timedelta(days=120)
+        for rule_type, fields, adjustment, value, priority in [
+            ('special_day', {}, 'percentage_increase', '25', 5),
+            ('date_range', {'start_date': cls.start + timedelta(days=30), 'end_date': cls.start + timedelta(days=40)},
+             'fixed_price', '90000', 8),
+            ('day_of_week', {'days_of_week': '1,5'}, 'percentage_decrease', '7.5', 1),
+            ('time_of_day', {'start_time_rule': time(7), 'end_time_rule': time(7, 30)}, 'fixed_increase', '12345', 2),
+        ]:
+            PricingRule.objects.create(facility=facility, name=rule_type, rule_type=rule_type,
+                                       price_adjustment_type=adjustment, adjustment_value=Decimal(value),
+                                       priority=priority, **fields)
+        cls.holiday = weekday_dates(5, cls.start + timedelta(days=10), cls.end)[0]
+        Holiday.objects.create(date=cls.holiday, description='تعطیل')
+        month, day = jalali.to_jalali(weekday_dates(1, cls.start + timedelta(days=50), cls.end)[0])[1:]
+        Holiday.objects.create(is_recurring=True, jalali_month=month, jalali_day=day, description='سالانه')
+
+    def test_calendar_matches_per_date_prices(self):
+        for session_time in self.session_times:
+            calendar = session_time.get_price_calendar(self.start, self.end)
+            self.assertEqual(list(calendar), weekday_dates(session_time.day_of_week, self.start, self.end))
+            for day, price in calendar.items():
+                self.assertEqual(price, whole_rials(session_time.get_price_for_date(day)))
+
+    def test_holidays_and_range_edges(self):
+        session_time = self.session_times[1]
+        week_later = self.holiday + timedelta(days=7)
+        calendar = session_time.get_price_calendar(self.holiday, week_later)
+        # قانون 'روزهای خاص' فقط روی روز تعطیل اعمال می‌شود
+        self.assertEqual(calendar[self.holiday], whole_rials(calendar[week_later] * Decimal('1.25')))
+        self.assertEqual(session_time.get_price_calendar(self.holiday, self.holiday),
+                         {self.holiday: calendar[self.holiday]})
+        self.assertEqual(session_time.get_price_calendar(self.holiday + timedelta(days=1),
+                                                         week_later - timedelta(days=1)), {})
+        self.assertEqual(session_time.get_price_calendar(self.end, self.start), {})
+
+    def test_calendars_read_holidays_once(self):
+        get_pricing_engine(self.session_times[0].facility_id)
+        # دو پرس‌وجوی تعطیلات (ثابت و تکرارشونده) برای همه سانس‌ها
+        with self.assertNumQueries(2):
+            calendars = get_price_calendars(self.session_times, self.start, self.end)
+        self.assertEqual(calendars, {
+            session_time.pk: session_time.get_price_calendar(self.start, self.end)
+            for session_time in self.session_times
+        })
+
+
+class QuoteManyTests(GymTestMixin, TestCase):
+    """quote_many باید برای هر درخواست همان مبالغی را بدهد که Reservation.calculate_prices محاسبه می‌کند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(6)
+        manager = cls.create_manager()
+        cls.user = User.objects.create_user(phone_number='09120000001', username='customer')
+        facilities = [
+            cls.create_facility(manager, name=f'سالن {index}', hourly_price=Decimal('130000'))
+            for index in range(2)
+        ]
+        cls.session_times = [
+            SessionTime.objects.create(
+                facility=facilities[day % 2], session_name=f'سانس {day}', day_of_week=day, start_time=time(16),
+                end_time=time(17, 30), capacity=10, price_type=['fixed', 'hourly', 'dynamic'][day % 3],
+                fixed_price=Decimal('210000'), base_weekday_price=Decimal('150000'),
+                base_weekend_price=Decimal('230000')
+            )
+            for day in range(7)
+        ]
+        start = timezone.localdate()
+        for index in range(20):
+            adjustment_type, value = random_adjustment(rng)
+            PricingRule.objects.create(
+                facility=rng.choice(facilities), name=f'قانون {index}',
+                rule_type=rng.choice([choice for choice, _ in PricingRule.RULE_TYPE_CHOICES]),
+                start_time_rule=time(rng.randint(6, 17)), end_time_rule=time(rng.randint(18, 22)),
+                days_of_week=','.join(str(day) for day in rng.sample(range(7), 3)),
+                start_date=start + timedelta(days=rng.randint(0, 20)),
+                end_date=start + timedelta(days=rng.randint(21, 50)),
+                price_adjustment_type=adjustment_type, adjustment_value=value, priority=rng.randint(0, 10),
+            )
+        Holiday.objects.create(date=start + timedelta(days=9), description='تعطیل')
+        for code, fields in [
+            ('PCT', {'discount_type': 'percentage', 'amount': Decimal('15'), 'max_discount': Decimal('30000')}),
+            ('FIX', {'discount_type': 'fixed', 'amount': Decimal('25000'), 'min_price': Decimal('180000')}),
+            ('ONCE', {'discount_type': 'fixed', 'amount': Decimal('10000'), 'user_usage_limit': 1}),
+            ('OLD', {'discount_type': 'fixed', 'amount': Decimal('10000'), 'end_date': start - timedelta(days=1)}),
+        ]:
+            Discount.objects.create(**{
+                'name': code, 'code': code, 'target_type': 'code', 'start_date': start - timedelta(days=10),
+                'end_date': start + timedelta(days=60), **fields
+            })
+        # سهم کاربر از تخفیف ONCE استفاده شده است
+        Reservation.objects.create(user=cls.user, session_time=cls.session_times[0], status='confirmed',
+                                   date=weekday_dates(0, start, start + timedelta(days=6))[0],
+                                   discount=Discount.objects.get(code='ONCE'))
+
+    def setUp(self):
+        super().setUp()
+        # فقط نیمی از بازه قیمت ذخیره‌شده دارد
+        start = timezone.localdate()
+        build_snapshots(self.session_times, start, start + timedelta(days=20))
+
+    def items(self):
+        start = timezone.localdate()
+        rng = random.Random(60)
+        items = []
+        for session_time in self.session_times:
+            for day in weekday_dates(session_time.day_of_week, start + timedelta(days=1), start + timedelta(days=45)):
+                items.append((session_time.pk, day, rng.choice([None, '', 'PCT', 'FIX', 'ONCE', 'OLD', 'NOPE'])))
+        return items
+
+    def test_quotes_match_reservation_prices(self):
+        items = self.items() + [(0, timezone.localdate(), None)]
+        quotes = quote_many(items, user=self.user)
+        self.assertEqual(len(quotes), len(items))
+        self.assertIsNone(quotes[-1])
+
+        session_times = {session_time.pk: session_time for session_time in self.session_times}
+        discounts = {discount.code: discount for discount in Discount.objects.all()}
+        for (session_time_id, day, code), quote in zip(items[:-1], quotes):
+            reservation = Reservation(user=self.user, session_time=session_times[session_time_id], date=day,
+                                      discount=discounts.get(code))
+            reservation.calculate_prices()
+            self.assertEqual((quote['session_time_id'], quote['date']), (session_time_id, day))
+            self.assertEqual(quote['original_price'], reservation.original_price)
+            self.assertEqual(quote['discount_amount'], reservation.discount_amount)
+            self.assertEqual(quote['final_price'], reservation.final_price)
+            self.assertEqual(quote['discount'], reservation.discount)
+            self.assertEqual(whole_rials(quote['original_price']),
+                             whole_rials(reservation.session_time.get_price_for_date(day)))
+
+    def test_query_count_does_not_grow_with_items(self):
+        items = self.items()
+        for batch in (items[:20], items, items * 3):
+            invalidate_pricing_engine()
+            # سانس‌ها، قیمت‌های ذخیره‌شده، نسخه و قوانین سالن‌ها، تعطیلات (دو پرس‌وجو)، تخفیف‌ها و سهم کاربر
+            with self.assertNumQueries(8):
+                quote_many(batch, user=self.user)
+
+
+class IntervalIndexTests(SimpleTestCase):
+    """جستجوی بازه‌ها در IntervalIndex و انتخاب قوانین موتور در برابر بررسی تک‌تک بازه‌ها."""
+
+    def setUp(self):
+        self.rng = random.Random(5)
+
+    def test_stab_and_overlapping_match_brute_force(self):
+        for _ in range(200):
+            intervals = []
+            for order in range(self.rng.randint(0, 12)):
+                start = self.rng.randint(0, 50)
+                intervals.append((start, start + self.rng.randint(-2, 20), SimpleNamespace(order=order)))
+            index = IntervalIndex(intervals)
+            valid = [(start, stop) for start, stop, _ in intervals if start < stop]
+            bounds = (min(start for start, _ in valid), max(stop for _, stop in valid)) if valid else ()
+            for point in range(-3, 75):
+                self.assertEqual(
+                    [item.order for item in index.stab(point)],
+                    [item.order for start, stop, item in intervals if start <= point < stop]
+                )
+                self.assertEqual(index.locate(point) is not None, bool(bounds) and bounds[0] <= point < bounds[1])
+                stop = point + self.rng.randint(1, 15)
+                self.assertEqual(
+                    [item.order for item in index.overlapping(point, stop)],
+                    [item.order for start, end, item in intervals if start < end and start < stop and end > point]
+                )
+
+    def test_engine_selects_rules_by_date_and_time(self):
+        today = date(2025, 3, 1)
+        rules = []
+        for pk in range(1, 60):
+            rule_type = self.rng.choice([choice for choice, _ in PricingRule.RULE_TYPE_CHOICES])
+            start_minute = self.rng.randint(0, 22 * 60)
+            rule = PricingRule(
+                pk=pk, rule_type=rule_type, priority=self.rng.randint(0, 5),
+                start_time_rule=time(start_minute // 60, start_minute % 60),
+                end_time_rule=time(min(start_minute // 60 + self.rng.randint(1, 3), 23), 59),
+                start_date=today + timedelta(days=self.rng.randint(0, 40)),
+                end_date=today + timedelta(days=self.rng.randint(40, 90)),
+                price_adjustment_type='fixed_increase', adjustment_value=Decimal('1000'),
+            )
+            rules.append(rule)
+        rules.sort(key=lambda rule: (-rule.priority, rule.pk))
+        engine = FacilityPricingEngine(1, rules)
+        for hour in range(0, 23, 3):
+            session_time = SessionTime(pk=hour + 1, start_time=time(hour, 15), end_time=time(hour + 1, 30))
+            for offset in range(-5, 100, 4):
+                day = today + timedelta(days=offset)
+                expected = [
+                    rule.pk for rule in rules
+                    if (rule.rule_type != 'date_range' or rule.start_date <= day <= rule.end_date) and (
+                        rule.rule_type not in ('time_of_day', 'peak_hours') or
+                        rule.start_time_rule < session_time.end_time and rule.end_time_rule > session_time.start_time
+                    )
+                ]
+                self.assertEqual([rule.pk for rule in engine.rules_for(session_time, day)], expected)
+
+
+class PricingEngineTests(GymTestMixin, TestCase):
+    """موتور کامپایل‌شده (gym/pricing.py) در برابر اعمال قانون به قانون PricingRule و قیمت رزرو."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(phone_number='09120000001', username='customer')
+        manager = cls.create_manager()
+        cls.facility = cls.create_facility(manager, hourly_price=Decimal('180000'))
+        cls.session_time = SessionTime.objects.create(
+            facility=cls.facility, session_name='عصر', day_of_week=3, start_time=time(17), end_time=time(18, 30),
+            capacity=10, price_type='hourly'
+        )
+        start = timezone.localdate()
+        cls.dates = weekday_dates(cls.session_time.day_of_week, start, start + timedelta(days=180))
+        rules = [
+            ('day_of_week', {'days_of_week': '3,4'}, 'percentage_increase', '10', 5),
+            ('day_of_week', {'days_of_week': '5,6'}, 'fixed_increase', '1000', 2),
+            ('date_range', {'start_date': start + timedelta(days=20), 'end_date': start + timedelta(days=60)},
+             'fixed_decrease', '15000', 3),
+            ('time_of_day', {'start_time_rule': time(17, 30), 'end_time_rule': time(20)},
+             'percentage_decrease', '12.5', 1),
+            ('peak_hours', {'start_time_rule': time(6), 'end_time_rule': time(8)}, 'fixed_increase', '99000', 9),
+            ('special_day', {}, 'fixed_price', '500000', 10),
+        ]
+        cls.rules = [
+            PricingRule.objects.create(
+                facility=cls.facility, name=f'قانون {index}', rule_type=rule_type, price_adjustment_type=adjustment,
+                adjustment_value=Decimal(value), priority=priority, **fields
+            )
+            for index, (rule_type, fields, adjustment, value, priority) in enumerate(rules)
+        ]
+        PricingRule.objects.create(facility=cls.facility, name='غیرفعال', rule_type='day_of_week', days_of_week='3',
+                                   price_adjustment_type='fixed_price', adjustment_value=Decimal('1'), priority=20,
+                                   is_active=False)
+        Holiday.objects.create(date=cls.dates[3], description='تعطیل')
+
+    def reference_price(self, date):
+        price = self.session_time.get_base_price_for_date(date)
+        for rule in PricingRule.objects.filter(facility=self.facility, is_active=True).order_by('-priority', 'pk'):
+            if rule.is_applicable(date, self.session_time):
+                price = rule.apply_to_price(price)
+        return max(price, Decimal('0'))
+
+    def test_engine_matches_rule_by_rule_path_and_reservation_prices(self):
+        engine = get_pricing_engine(self.facility.pk)
+        for day in self.dates:
+            expected = self.reference_price(day)
+            self.assertEqual(engine.apply(self.session_time, day, self.session_time.get_base_price_for_date(day)),
+                             expected)
+            reservation = Reservation(user=self.user, session_time=self.session_time, date=day)
+            reservation.calculate_prices()
+            self.assertEqual(reservation.original_price, expected)
+            self.assertEqual(reservation.final_price, expected)
+
+    def test_rule_changes_from_other_processes_are_seen(self):
+        day = self.dates[0]
+        price = self.session_time.get_price_for_date(day)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.session_time.get_price_for_date(day), price)
+
+        # تغییر و حذف قانون بدون سیگنال، مانند ذخیره آن در پروسه دیگر
+        PricingRule.objects.filter(pk=self.rules[0].pk).update(
+            adjustment_value=Decimal('50'), updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        with override_settings(PRICING_ENGINE_CHECK_SECONDS=0):
+            changed = self.session_time.get_price_for_date(day)
+            self.assertNotEqual(changed, price)
+            self.assertEqual(changed, self.reference_price(day))
+
+            with connection.cursor() as cursor:
+                cursor.execute('DELETE FROM gym_pricingrule WHERE id = %s', [self.rules[3].pk])
+            self.assertEqual(self.session_time.get_price_for_date(day), self.reference_price(day))
+            self.assertNotEqual(self.reference_price(day), changed)
+
+
+class PricingRuleApplicabilityTests(GymTestMixin, TestCase):
+    """PricingRule.objects.applicable_to باید همان قوانینی را انتخاب کند که is_applicable در پایتون می‌پذیرد."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(4)
+        manager = cls.create_manager()
+        cls.facility = cls.create_facility(manager, hourly_price=Decimal('150000'))
+        cls.session_times = [
+            SessionTime.objects.create(
+                facility=cls.facility, session_name=f'سانس {day}', day_of_week=day, start_time=time(9 + day),
+                end_time=time(10 + day, 30), capacity=10, price_type='dynamic',
+                base_weekday_price=Decimal('120000'), base_weekend_price=Decimal('160000')
+            )
+            for day in range(7)
+        ]
+        start = timezone.localdate()
+        for index in range(40):
+            adjustment_type, value = random_adjustment(rng)
+            start_minute = rng.randint(6 * 60, 20 * 60)
+            PricingRule.objects.create(
+                facility=cls.facility,
+                name=f'قانون {index}',
+                rule_type=rng.choice([choice for choice, _ in PricingRule.RULE_TYPE_CHOICES]),
+                start_time_rule=time(start_minute // 60, start_minute % 60),
+                end_time_rule=time(min(start_minute // 60 + rng.randint(1, 4), 23)),
+                days_of_week=','.join(str(day) for day in rng.sample(range(7), rng.randint(1, 3))),
+                start_date=start + timedelta(days=rng.randint(0, 30)),
+                end_date=start + timedelta(days=rng.randint(31, 60)),
+                price_adjustment_type=adjustment_type,
+                adjustment_value=value,
+                priority=rng.randint(0, 10),
+                is_active=rng.random() > 0.1,
+            )
+        Holiday.objects.create(date=start + timedelta(days=12), description='تعطیل')
+
+    def test_weekday_mask_is_kept_in_sync(self):
+        rule = PricingRule.objects.filter(rule_type='day_of_week').first()
+        rule.days_of_week = ' 5, 6'
+        rule.save()
+        self.assertEqual(PricingRule.objects.get(pk=rule.pk).days_of_week_mask, 0b1100000)
+        self.assertEqual(PricingRule.weekday_mask('0,x,3,9'), 0b1001)
+
+    def test_database_filter_matches_python_applicability(self):
+        start = timezone.localdate()
+        rules = list(PricingRule.objects.filter(facility=self.facility).order_by('-priority', 'pk'))
+        for offset in range(70):
+            day = start + timedelta(days=offset)
+            for session_time in self.session_times:
+                candidates = PricingRule.objects.applicable_to(
+                    self.facility, day, session_time.start_time, session_time.end_time
+                )
+                # قوانین 'روزهای خاص' فقط در پایتون بررسی می‌شوند
+                expected = [rule.pk for rule in rules if rule.is_active and (
+                    rule.rule_type == 'special_day' or rule.is_applicable(day, session_time)
+                )]
+                self.assertEqual([rule.pk for rule in candidates], expected)
+
+    def test_weekday_bitmask_filter(self):
+        # اولین چهارشنبه (روز 4 هفته شمسی) از امروز
+        day = weekday_dates(4, timezone.localdate(), timezone.localdate() + timedelta(days=6))[0]
+        PricingRule.objects.all().delete()
+        for name, days in [('دوشنبه و چهارشنبه', '1,4'), ('آخر هفته', '5,6')]:
+            PricingRule.objects.create(facility=self.facility, name=name, rule_type='day_of_week', days_of_week=days,
+                                       price_adjustment_type='fixed_increase', adjustment_value=Decimal('1000'))
+        expected = {0: ['دوشنبه و چهارشنبه'], 1: ['آخر هفته'], 2: ['آخر هفته'], 4: ['دوشنبه و چهارشنبه']}
+        for offset in range(7):
+            candidates = PricingRule.objects.applicable_to(self.facility, day + timedelta(days=offset), time(8), time(9))
+            self.assertEqual([rule.name for rule in candidates], expected.get(offset, []))
+
+    def test_single_date_price_matches_engine(self):
+        start = timezone.localdate()
+        session_time = self.session_times[3]
+        price_for_date(session_time, start)
+        for day in weekday_dates(session_time.day_of_week, start, start + timedelta(days=70)):
+            with self.assertNumQueries(2):
+                price = get_snapshot_price(session_time, day)
+            self.assertEqual(price, session_time.get_price_for_date(day))
+
+
+class PriceMemoTests(GymTestMixin, TestCase):
+    """ویوی دارای memoize_prices قیمت هر (سانس، تاریخ) را یک بار محاسبه می‌کند و پرس‌وجوهایش ثابت می‌ماند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        facility = cls.create_facility(manager)
+        cls.session_time = SessionTime.objects.create(
+            facility=facility, session_name='عصر', day_of_week=2, start_time=time(18), end_time=time(19),
+            capacity=40, price_type='dynamic', base_weekday_price=Decimal('150000'),
+            base_weekend_price=Decimal('200000')
+        )
+        start = timezone.localdate()
+        PricingRule.objects.create(
+            facility=facility, name='عصر', rule_type='time_based', start_time_rule=time(17), end_time_rule=time(20),
+            price_adjustment_type='percentage_increase', adjustment_value=Decimal('10'), priority=1,
+        )
+        cls.dates = weekday_dates(2, start + timedelta(days=1), start + timedelta(days=14))[:2]
+        cls.users = cls.create_customers(12)
+
+    def reserve(self, users):
+        for index, user in enumerate(users):
+            Reservation.objects.create(user=user, session_time=self.session_time, date=self.dates[index % 2],
+                                       status='confirmed')
+
+    @staticmethod
+    @memoize_prices
+    def price_list(request):
+        # مانند ستون قیمت یک صفحه لیست: قیمت فعلی سانس هر ردیف
+        reservations = Reservation.objects.select_related('session_time')
+        return HttpResponse(','.join(
+            str(reservation.session_time.get_price_for_date(reservation.date)) for reservation in reservations
+        ))
+
+    def render(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.price_list(RequestFactory().get('/'))
+        return response, len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.reserve(self.users[:4])
+        self.render()
+        response, few = self.render()
+        self.assertEqual(response['X-Price-Memo'], 'hits=2; misses=2')
+
+        self.reserve(self.users[4:])
+        response, many = self.render()
+        self.assertEqual(response['X-Price-Memo'], 'hits=10; misses=2')
+        self.assertEqual(many, few)
+
+        hits = price_memo_stats()['hits']
+        self.render()
+        self.assertEqual(price_memo_stats()['hits'], hits + 10)
+
+    def test_memoized_price_reuses_other_price_columns(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return Decimal('150000')
+
+        self.assertEqual(memoized_price(self.session_time, None, compute), Decimal('150000'))
+        with price_memo_scope() as memo:
+            for _ in range(3):
+                self.assertEqual(memoized_price(self.session_time, None, compute), Decimal('150000'))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((memo.hits, memo.misses), (2, 1))
+
+
+class PricingBenchmarkTests(GymTestMixin, TestCase):
+    """گزارش بنچمارک قیمت‌گذاری (gym/benchmarks.py) روی یک سطح کوچک."""
+
+    @override_settings(PRICING_ENGINE_CHECK_SECONDS=3600)
+    def test_run_reports_every_operation(self):
+        start = date(2025, 3, 22)
+        report = run('medium', quotes=40, start_date=start, facilities=3, rules=4)
+
+        self.assertEqual(report['tier'], 'medium')
+        self.assertEqual(report['params']['facilities'], 3)
+        self.assertEqual(report['params']['rules'], 4)
+        self.assertEqual(report['params']['quotes'], 40)
+        self.assertEqual(report['params']['start_date'], '2025-03-22')
+        self.assertEqual(report['params']['sessions'], SessionTime.objects.count())
+        self.assertEqual(PricingRule.objects.count(), 12)
+        self.assertEqual(set(report['results']), {
+            'get_price_for_date_cold', 'get_price_for_date_warm', 'calculate_prices', 'calculate_discount_amount',
+        })
+        for result in report['results'].values():
+            self.assertEqual(result['calls'], 40)
+            self.assertGreater(result['wall_us_per_call'], 0)
+        # موتور و تقویم تعطیلات پس از اجرای سرد در حافظه پروسه‌اند
+        self.assertGreater(report['results']['get_price_for_date_cold']['queries_per_call'], 0)
+        self.assertEqual(report['results']['get_price_for_date_warm']['queries_per_call'], 0)
+
+    def test_sample_is_deterministic_and_on_session_weekdays(self):
+        start = date(2025, 3, 22)
+        session_times, _discounts, _customer = seed(2, 0, start)
+        sample = quote_sample(session_times, start, 50)
+        self.assertEqual(sample, quote_sample(session_times, start, 50))
+        for session_time, day in sample:
+            self.assertEqual((day.weekday() + 2) % 7, session_time.day_of_week)
+            self.assertLess((day - start).days, 52 * 7)
+
+
+class SessionMinutesTests(GymTestMixin, TestCase):
+    """بازه دقیقه‌ای و مدت ذخیره‌شده سانس باید با start_time و end_time هم‌خوان بمانند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        cls.facility = cls.create_facility(manager)
+
+    def session(self, start, end, **fields):
+        return SessionTime(
+            facility=self.facility, session_name=f'{start}-{end}', day_of_week=1, start_time=start, end_time=end,
+            capacity=10, price_type='hourly', **fields
+        )
+
+    def test_save_stores_minutes_and_duration(self):
+        session_time = self.session(time(16, 15, 30), time(17, 45))
+        session_time.save()
+        session_time.refresh_from_db()
+        self.assertEqual((session_time.start_minute, session_time.end_minute), (975, 1065))
+        self.assertEqual(session_time.duration_minutes, 90)
+        self.assertEqual(session_time.get_duration_minutes(), 90)
+        self.assertEqual(session_time.get_duration_hours(), Decimal('1.5'))
+        self.assertEqual(session_time.get_base_price_for_date(timezone.localdate()), Decimal('180000'))
+        self.assertEqual(session_base_units(session_time, timezone.localdate()), to_units(Decimal('180000')))
+
+    def test_changed_times_are_resynced(self):
+        session_time = self.session(time(8), time(9))
+        session_time.save()
+        session_time.end_time = time(10, 30)
+        session_time.save(update_fields=['end_time'])
+        session_time.refresh_from_db()
+        self.assertEqual((session_time.start_minute, session_time.end_minute, session_time.duration_minutes),
+                         (480, 630, 150))
+
+        session_time.start_time = time(9)
+        session_time.save()
+        session_time.refresh_from_db()
+        self.assertEqual((session_time.start_minute, session_time.duration_minutes), (540, 90))
+
+    def test_unsaved_session_computes_duration(self):
+        self.assertEqual(self.session(time(20), time(21, 10)).get_duration_minutes(), 70)
+
+    def test_clean_rejects_overlaps_on_the_half_open_interval(self):
+        self.session(time(16), time(18)).save()
+        # سانس‌های پشت سر هم تداخل ندارند
+        self.session(time(18), time(19)).clean()
+        self.session(time(14), time(16)).clean()
+        for start, end in [(time(17), time(19)), (time(15), time(16, 1)), (time(16, 30), time(17)),
+                           (time(15), time(19))]:
+            with self.assertRaises(ValidationError):
+                self.session(start, end).clean()
+        # سانس روز دیگر یا سانس غیرفعال تداخلی ایجاد نمی‌کند
+        other_day = self.session(time(17), time(19))
+        other_day.day_of_week = 2
+        other_day.clean()
+        SessionTime.objects.update(is_active=False)
+        self.session(time(17), time(19)).clean()
+
+
+class RecurringHolidayProjectionTests(GymTestMixin, TestCase):
+    """get_holidays_in_range باید همان تعطیلاتی را بدهد که بررسی روز به روز با jdatetime پیدا می‌کند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recurring = [(1, 1), (1, 13), (3, 14), (11, 22), (12, 29), (12, 30)]
+        for month, day in cls.recurring:
+            Holiday.objects.create(is_recurring=True, jalali_month=month, jalali_day=day, description=f'{month}/{day}')
+        cls.fixed = [date(2024, 3, 20), date(2025, 7, 1), date(2026, 2, 11)]
+        for day in cls.fixed:
+            Holiday.objects.create(date=day, description='یکبار')
+
+    def expected(self, start_date, end_date):
+        holidays = set()
+        day = start_date
+        while day <= end_date:
+            jalali_day = jdatetime.date.fromgregorian(date=day)
+            if day in self.fixed or (jalali_day.month, jalali_day.day) in self.recurring:
+                holidays.add(day)
+            day += timedelta(days=1)
+        return holidays
+
+    def test_projection_matches_day_by_day_scan(self):
+        # 1403 کبیسه است (30 اسفند دارد) و 1404 نیست
+        for start_date, end_date in [
+            (date(2024, 1, 1), date(2026, 12, 31)),
+            (date(2025, 3, 19), date(2025, 3, 22)),
+            (date(2024, 3, 19), date(2024, 3, 20)),
+            (date(2025, 6, 1), date(2025, 6, 30)),
+            (date(2025, 4, 2), date(2025, 4, 2)),
+        ]:
+            holidays = Holiday.get_holidays_in_range(start_date, end_date)
+            dates = [holiday['date'] for holiday in holidays]
+            self.assertEqual(dates, sorted(self.expected(start_date, end_date)), (start_date, end_date))
+            self.assertEqual(get_holiday_calendar().dates_between(start_date, end_date), set(dates))
+
+    def test_leap_day_only_in_leap_years(self):
+        def esfand(start_date, end_date):
+            return [holiday['description'] for holiday in Holiday.get_holidays_in_range(start_date, end_date)]
+
+        # اسفند 1403 (کبیسه) و اسفند 1404
+        self.assertEqual(esfand(date(2025, 2, 19), date(2025, 3, 20)), ['12/29', '12/30'])
+        self.assertEqual(esfand(date(2026, 2, 20), date(2026, 3, 20)), ['12/29'])
+
+    def test_empty_and_reversed_ranges(self):
+        self.assertEqual(Holiday.get_holidays_in_range(date(2025, 3, 22), date(2025, 3, 20)), [])
+        self.assertEqual(Holiday.get_holidays_in_range(date(2025, 5, 1), date(2025, 5, 10)), [])
+
+    def test_recurring_description_wins_on_shared_date(self):
+        # 2024-03-20 هم تعطیلی یکبار مصرف است و هم 1 فروردین 1403
+        [holiday] = Holiday.get_holidays_in_range(date(2024, 3, 20), date(2024, 3, 20))
+        self.assertEqual(holiday['description'], '1/1')
+
+
+class LoadHolidaysCommandTests(GymTestMixin, TestCase):
+    """دستور load_holidays برای فایل‌های API تقویم."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def load(self, content):
+        path = Path(self.directory.name) / 'holidays.json'
+        path.write_text(json.dumps(content, ensure_ascii=False), encoding='utf-8')
+        call_command('load_holidays', str(path), stdout=StringIO())
+
+    def test_loads_api_responses(self):
+        self.load([
+            {'data': [{'date': '۱۴۰۴/۰۱/۰۱', 'holidayDesription': 'نوروز'}]},
+            {'data': [{'date': '1404/01/13', 'holidayDesription': 'سیزده بدر'}]},
+        ])
+        self.assertEqual(
+            dict(Holiday.objects.values_list('date', 'description')),
+            {date(2025, 3, 21): 'نوروز', date(2025, 4, 2): 'سیزده بدر'}
+        )
+
+    def test_malformed_files_raise_command_error(self):
+        for content in [
+            {'status': 'error', 'message': 'quota'},
+            {'data': None},
+            [{'data': []}, 'x'],
+            [{'date': '1404/13/01'}],
+            [{'description': 'بدون تاریخ'}],
+        ]:
+            with self.assertRaises(CommandError, msg=content):
+                self.load(content)
+        path = Path(self.directory.name) / 'broken.json'
+        path.write_text('{"data": [', encoding='utf-8')
+        with self.assertRaises(CommandError):
+            call_command('load_holidays', str(path), stdout=StringIO())
+        self.assertFalse(Holiday.objects.exists())
+
+
+class HolidayBitsetTests(GymTestMixin, TestCase):
+    """بیت‌ست فایل باید همان پاسخ تقویم تعطیلات پروسه را بدهد."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(16)
+        start = date(2024, 1, 1)
+        for _ in range(40):
+            Holiday.objects.get_or_create(date=start + timedelta(days=rng.randint(0, 1100)),
+                                          defaults={'description': 'یکبار'})
+        for month, day in [(1, 1), (1, 2), (3, 14), (12, 30)]:
+            Holiday.objects.create(is_recurring=True, jalali_month=month, jalali_day=day, description='سالانه')
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'holidays.bin'
+
+    def test_bitset_matches_calendar(self):
+        bitset = HolidayBitset(write_bitset(self.path))
+        calendar = get_holiday_calendar()
+        start = date(2023, 12, 1)
+        for offset in range(1200):
+            day = start + timedelta(days=offset)
+            self.assertEqual(bitset.is_holiday(day), calendar.is_holiday(day), day)
+
+        rng = random.Random(160)
+        for _ in range(200):
+            first = start + timedelta(days=rng.randint(0, 1200))
+            last = first + timedelta(days=rng.randint(-3, 500))
+            self.assertEqual(bitset.dates_between(first, last), calendar.dates_between(first, last), (first, last))
+        self.assertIsNone(bitset.is_holiday(date(2200, 1, 1)))
+        self.assertIsNone(bitset.dates_between(date(2024, 1, 1), date(2200, 1, 1)))
+
+    def test_weekend_block_marks_thursdays_and_fridays(self):
+        bitset = HolidayBitset(write_bitset(self.path))
+        start = jalali.to_gregorian(jalali.FIRST_YEAR, 1, 1)
+        end = jalali.to_gregorian(jalali.LAST_YEAR, 12, 29)
+        expected = {start + timedelta(days=offset) for offset in range((end - start).days + 1)
+                    if (start + timedelta(days=offset)).weekday() in (3, 4)}
+        self.assertEqual(bitset.weekend_dates_between(start, end), expected)
+        # 1405/01/06 پنجشنبه و 1405/01/08 شنبه است
+        self.assertTrue(bitset.is_weekend(jalali.to_gregorian(1405, 1, 6)))
+        self.assertFalse(bitset.is_weekend(jalali.to_gregorian(1405, 1, 8)))
+        self.assertIsNone(bitset.is_weekend(date(2200, 1, 1)))
+
+    def test_weekend_helpers_without_the_file(self):
+        first, last = date(2025, 3, 1), date(2025, 4, 30)
+        expected = {first + timedelta(days=offset) for offset in range(61)
+                    if (first + timedelta(days=offset)).weekday() in (3, 4)}
+        with transaction.atomic():
+            # تراکنش تغییر دهنده تعطیلات بیت‌ست ندارد؛ بلوک آخر هفته از حافظه خوانده می‌شود
+            Holiday.objects.create(date=date(2025, 3, 5), description='یکبار')
+            self.assertIsNone(get_holiday_bitset())
+            self.assertEqual(holiday_bitset.weekend_dates(first, last), expected)
+        self.assertEqual(holiday_bitset.weekend_dates(date(2200, 1, 1), date(2200, 1, 31)),
+                         {day for day in (date(2200, 1, 1) + timedelta(days=offset) for offset in range(31))
+                          if day.weekday() in (3, 4)})
+        self.assertTrue(holiday_bitset.is_weekend(date(2025, 3, 6)))
+        dates = np.arange(np.datetime64(first), np.datetime64(last) + 1)
+        self.assertEqual(
+            [day.item() for day in dates[holiday_bitset.weekend_mask(dates)]], sorted(expected)
+        )
+        self.assertEqual(holiday_bitset.weekend_mask(dates[:0]).shape, (0,))
+
+    def test_rewrite_replaces_the_file_and_supersedes_readers(self):
+        old = HolidayBitset(write_bitset(self.path))
+        day = date(2026, 5, 5)
+        Holiday.objects.create(date=day, description='جدید')
+        write_bitset(self.path)
+
+        self.assertTrue(old.superseded)
+        self.assertFalse(old.is_holiday(day))
+        new = HolidayBitset(self.path)
+        self.assertFalse(new.superseded)
+        self.assertTrue(new.is_holiday(day))
+        self.assertEqual(sorted(path.name for path in self.path.parent.iterdir()),
+                         ['holidays.bin', 'holidays.bin.lock'])
+
+    def test_reopening_a_file_that_stays_superseded_is_bounded(self):
+        write_bitset(self.path)
+        with open(self.path, 'r+b') as f:
+            f.seek(4)
+            f.write(holiday_bitset.STATE.pack(holiday_bitset.STATE_SUPERSEDED))
+        self.assertIsNone(holiday_bitset._open_current(self.path))
+
+
+class HolidayBitsetTransactionTests(GymTestMixin, TransactionTestCase):
+    """بیت‌ست فقط با داده‌های commit شده همگام می‌شود و rollback آن را از کار نمی‌اندازد."""
+
+    def setUp(self):
+        super().setUp()
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(DATA_DIR=directory))
+        self.day = timezone.localdate() + timedelta(days=3)
+
+    def test_commit_rewrites_the_shared_file(self):
+        self.assertIsNotNone(get_holiday_bitset())
+        Holiday.objects.create(date=self.day, description='تعطیل')
+
+        bitset = get_holiday_bitset()
+        self.assertIsNotNone(bitset)
+        self.assertTrue(bitset.is_holiday(self.day))
+        self.assertTrue(HolidayBitset(bitset_path()).is_holiday(self.day))
+
+    def test_rollback_resyncs_without_writing_uncommitted_rows(self):
+        self.assertIsNotNone(get_holiday_bitset())
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Holiday.objects.create(date=self.day, description='تعطیل')
+                self.assertIsNone(get_holiday_bitset())
+                self.assertTrue(Holiday.is_holiday(self.day))
+                raise RuntimeError
+
+        self.assertFalse(HolidayBitset(bitset_path()).is_holiday(self.day))
+        bitset = get_holiday_bitset()
+        self.assertIsNotNone(bitset)
+        self.assertFalse(bitset.is_holiday(self.day))
+        self.assertFalse(Holiday.is_holiday(self.day))
+
+
+class BookableDatesTests(GymTestMixin, TransactionTestCase):
+    """تاریخ‌های قابل رزرو دوره باید با بررسی روز به روز تعطیلات یکی باشند، از بیت‌ست یا از تقویم پروسه."""
+
+    def setUp(self):
+        super().setUp()
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(DATA_DIR=directory))
+        rng = random.Random(17)
+        self.start = date(2025, 1, 1)
+        for offset in rng.sample(range(800), 60):
+            Holiday.objects.create(date=self.start + timedelta(days=offset), description='یکبار')
+        for month, day in [(1, 1), (1, 13), (12, 30)]:
+            Holiday.objects.create(is_recurring=True, jalali_month=month, jalali_day=day, description='سالانه')
+        self.periods = [(self.start + timedelta(days=first), self.start + timedelta(days=first + length))
+                        for first, length in [(0, 730), (40, 6), (75, 0), (300, 95), (10, -5)]]
+
+    def expected(self, weekday, start_date, end_date):
+        calendar = get_holiday_calendar()
+        return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)
+                if (start_date + timedelta(days=offset)).weekday() == (weekday - 2) % 7
+                and not calendar.is_holiday(start_date + timedelta(days=offset))]
+
+    def assert_bookable(self):
+        for weekday in range(7):
+            for start_date, end_date in self.periods:
+                expected = self.expected(weekday, start_date, end_date)
+                self.assertEqual(bookable_dates(weekday, start_date, end_date), expected)
+                self.assertEqual(count_bookable(weekday, start_date, end_date), len(expected))
+                self.assertEqual(RecurringReservation(
+                    session_time=SessionTime(day_of_week=weekday), start_date=start_date, end_date=end_date
+                ).get_total_sessions(), len(expected))
+
+    def test_bookable_dates_from_the_bitset(self):
+        self.assertIsNotNone(get_holiday_bitset())
+        with self.assertNumQueries(0):
+            holidays_between(*self.periods[0])
+        self.assert_bookable()
+
+    def test_bookable_dates_from_the_calendar(self):
+        with transaction.atomic():
+            # تراکنشی که تعطیلات را تغییر داده از تقویم خصوصی خود می‌خواند
+            Holiday.objects.create(date=self.start + timedelta(days=900), description='یکبار')
+            self.assertIsNone(get_holiday_bitset())
+            self.assert_bookable()
+
+
+class OccupancyCounterTests(GymTestMixin, TestCase):
+    """شمارنده SessionDayOccupancy و used_count تخفیف با ذخیره، لغو، حذف و جابجایی رزرو هم‌خوان می‌مانند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        cls.users = cls.create_customers(4)
+        facility = cls.create_facility(manager)
+        cls.session_times = [
+            SessionTime.objects.create(
+                facility=facility, session_name=f'سانس {day}', day_of_week=day, start_time=time(18),
+                end_time=time(19), capacity=2, price_type='fixed', fixed_price=Decimal('200000')
+            )
+            for day in (2, 3)
+        ]
+        start = timezone.localdate() + timedelta(days=7)
+        cls.dates = [weekday_dates(day, start, start + timedelta(days=6))[0] for day in (2, 3)]
+        cls.discount = Discount.objects.create(
+            name='تخفیف', code='OFF', target_type='code', discount_type='fixed', amount=Decimal('20000'),
+            start_date=start - timedelta(days=30), end_date=start + timedelta(days=30)
+        )
+
+    def reserve(self, user, slot=0, **fields):
+        return Reservation.objects.create(user=user, session_time=self.session_times[slot], date=self.dates[slot],
+                                          **fields)
+
+    def booked(self, slot=0):
+        return SessionDayOccupancy.objects.get(
+            session_time=self.session_times[slot], date=self.dates[slot]
+        ).booked_count
+
+    def used_count(self):
+        self.discount.refresh_from_db()
+        return self.discount.used_count
+
+    def test_cancel_releases_the_seat(self):
+        first = self.reserve(self.users[0])
+        self.reserve(self.users[1], status='confirmed')
+        self.assertEqual(self.booked(), 2)
+        self.assertEqual(self.session_times[0].get_remaining_capacity(self.dates[0]), 0)
+
+        first.cancel('تغییر برنامه')
+        self.assertEqual(self.booked(), 1)
+        self.assertEqual(self.session_times[0].get_remaining_capacity(self.dates[0]), 1)
+        # ذخیره دوباره رزرو لغو شده شمارنده را تغییر نمی‌دهد
+        first.save()
+        self.assertEqual(self.booked(), 1)
+
+    def test_delete_releases_only_active_reservations(self):
+        active = self.reserve(self.users[0])
+        cancelled = self.reserve(self.users[1])
+        cancelled.cancel()
+        self.assertEqual(self.booked(), 1)
+
+        cancelled.delete()
+        self.assertEqual(self.booked(), 1)
+        active.delete()
+        self.assertEqual(self.booked(), 0)
+
+    def test_moving_a_reservation_moves_its_seat(self):
+        reservation = self.reserve(self.users[0])
+        reservation.session_time = self.session_times[1]
+        reservation.date = self.dates[1]
+        reservation.save()
+        self.assertEqual((self.booked(0), self.booked(1)), (0, 1))
+
+        # جابجایی به سانس تکمیل‌شده رد می‌شود و شمارنده‌ها دست نمی‌خورند
+        self.reserve(self.users[1])
+        self.reserve(self.users[2])
+        reservation.session_time = self.session_times[0]
+        reservation.date = self.dates[0]
+        with self.assertRaises(ValidationError):
+            reservation.save()
+        self.assertEqual((self.booked(0), self.booked(1)), (2, 1))
+        self.assertEqual(Reservation.objects.get(pk=reservation.pk).date, self.dates[1])
+
+    def test_rejected_booking_does_not_use_the_discount(self):
+        self.reserve(self.users[0])
+        self.reserve(self.users[1])
+        with self.assertRaises(ValidationError):
+            self.reserve(self.users[2], status='confirmed', discount=self.discount)
+        self.assertEqual(self.used_count(), 0)
+        self.assertEqual(self.booked(), 2)
+
+    def test_discount_usage_follows_confirmation_and_cancellation(self):
+        pending = self.reserve(self.users[0], discount=self.discount)
+        self.assertEqual(self.used_count(), 0)
+        pending.cancel()
+        self.assertEqual(self.used_count(), 0)
+
+        confirmed = self.reserve(self.users[1], discount=self.discount)
+        confirmed.status = 'confirmed'
+        confirmed.save()
+        self.assertEqual(self.used_count(), 1)
+        confirmed.save()
+        self.assertEqual(self.used_count(), 1)
+        confirmed.cancel()
+        self.assertEqual(self.used_count(), 0)
+
+
+class AvailabilityGridTests(GymTestMixin, TestCase):
+    """جدول هفتگی سالن در هفته شمسی، با ظرفیت باقیمانده و تعداد ثابت پرس‌وجو."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        cls.users = cls.create_customers(3)
+        cls.facilities = [
+            cls.create_facility(manager, name=f'سالن {index}')
+            for index in range(2)
+        ]
+        # سالن اول دو سانس و سالن دوم سه سانس در هر روز هفته دارد
+        for facility, hours in zip(cls.facilities, [(8, 18), (8, 12, 20)]):
+            for day in range(7):
+                for hour in hours:
+                    SessionTime.objects.create(
+                        facility=facility, session_name=f'{day}-{hour}', day_of_week=day, start_time=time(hour),
+                        end_time=time(hour + 1, 30), capacity=3, price_type=['fixed', 'hourly', 'dynamic'][day % 3],
+                        fixed_price=Decimal('200000'), base_weekday_price=Decimal('150000'),
+                        base_weekend_price=Decimal('230000')
+                    )
+        SessionTime.objects.create(
+            facility=cls.facilities[0], session_name='غیرفعال', day_of_week=1, start_time=time(22),
+            end_time=time(23), capacity=3, fixed_price=Decimal('100000'), is_active=False
+        )
+        PricingRule.objects.create(
+            facility=cls.facilities[0], name='عصر', rule_type='time_based', start_time_rule=time(17),
+            end_time_rule=time(21), price_adjustment_type='percentage_increase', adjustment_value=Decimal('10'),
+        )
+        # چهارشنبه هفته آینده
+        today = timezone.localdate()
+        cls.wednesday = weekday_dates(4, today + timedelta(days=7), today + timedelta(days=13))[0]
+        cls.saturday = cls.wednesday - timedelta(days=4)
+        Holiday.objects.create(date=cls.saturday + timedelta(days=1), description='تعطیل')
+
+    def test_week_bounds_are_saturday_to_friday(self):
+        for offset in range(7):
+            self.assertEqual(week_bounds(self.saturday + timedelta(days=offset)),
+                             (self.saturday, self.saturday + timedelta(days=6)))
+        self.assertEqual(jdatetime.date.fromgregorian(date=self.saturday).weekday(), 0)
+        self.assertEqual(self.saturday.weekday(), 5)
+
+    def test_grid_slots(self):
+        facility = self.facilities[0]
+        monday_evening = SessionTime.objects.get(facility=facility, day_of_week=2, start_time=time(18))
+        monday = self.saturday + timedelta(days=2)
+        for user in self.users[:2]:
+            Reservation.objects.create(user=user, session_time=monday_evening, date=monday)
+
+        grid = availability_grid(facility, self.wednesday)
+        self.assertEqual(len(grid), 14)
+        self.assertEqual([(slot['date'], slot['session_time'].start_minute) for slot in grid],
+                         sorted((slot['date'], slot['session_time'].start_minute) for slot in grid))
+        for slot in grid:
+            session_time = slot['session_time']
+            self.assertEqual(slot['date'], self.saturday + timedelta(days=session_time.day_of_week))
+            self.assertEqual(slot['jalali_date'], jdatetime.date.fromgregorian(date=slot['date']).strftime('%Y/%m/%d'))
+            self.assertEqual(slot['price'], whole_rials(session_time.get_price_for_date(slot['date'])))
+            self.assertEqual(slot['is_holiday'], slot['date'] == self.saturday + timedelta(days=1))
+            self.assertEqual(slot['is_weekend'], session_time.day_of_week in (5, 6))
+            expected = 1 if session_time == monday_evening else 3
+            self.assertEqual(slot['remaining_capacity'], expected)
+            self.assertEqual(slot['is_full'], False)
+            self.assertEqual(slot['remaining_capacity'], session_time.get_remaining_capacity(slot['date']))
+
+        Reservation.objects.create(user=self.users[2], session_time=monday_evening, date=monday)
+        [slot] = [slot for slot in facility.get_availability_grid(self.wednesday)
+                  if slot['session_time'] == monday_evening]
+        self.assertEqual((slot['remaining_capacity'], slot['is_full']), (0, True))
+
+    def test_query_count_does_not_grow_with_sessions(self):
+        for facility in self.facilities:
+            availability_grid(facility, self.wednesday)
+        # سانس‌های فعال و شمارنده‌های ظرفیت هفته؛ تعطیلات و قوانین قیمت از کش پروسه
+        for facility in self.facilities:
+            with self.assertNumQueries(2):
+                availability_grid(facility, self.wednesday)
+
+
+@override_settings(PRICE_SNAPSHOT_HORIZON_DAYS=28)
+class SearchOpenSlotsTests(GymTestMixin, TestCase):
+    """جستجوی سانس‌های آزاد روی قیمت‌های ذخیره‌شده، با بازه محدود به افق آن‌ها."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        cls.users = cls.create_customers(2)
+        cls.tag = Tag.objects.create(name='استخر', slug='pool')
+        facilities = [
+            cls.create_facility(manager, name=f'سالن {index}')
+            for index in range(2)
+        ]
+        facilities[1].tags.add(cls.tag)
+        cls.session_times = [
+            SessionTime.objects.create(
+                facility=facilities[day % 2], session_name=f'سانس {day}', day_of_week=day, start_time=time(8 + day),
+                end_time=time(9 + day), capacity=2, price_type='fixed', fixed_price=Decimal(100000 + day * 7000)
+            )
+            for day in range(7)
+        ]
+        SessionTime.objects.create(
+            facility=facilities[0], session_name='غیرفعال', day_of_week=0, start_time=time(20), end_time=time(21),
+            capacity=2, fixed_price=Decimal('50000'), is_active=False
+        )
+        today = timezone.localdate()
+        cls.holiday = today + timedelta(days=5)
+        Holiday.objects.create(date=cls.holiday, description='تعطیل')
+        # سانس اول در اولین تاریخ برگزاری تکمیل است
+        cls.full_day = weekday_dates(0, today + timedelta(days=1), today + timedelta(days=7))[0]
+        for user in cls.users:
+            Reservation.objects.create(user=user, session_time=cls.session_times[0], date=cls.full_day)
+
+    def setUp(self):
+        super().setUp()
+        self.start, self.end = snapshot_horizon()
+        build_snapshots(SessionTime.objects.all(), self.start, self.end)
+
+    def expected(self, session_times=None):
+        return {
+            (session_time.pk, day)
+            for session_time in session_times or self.session_times
+            for day in weekday_dates(session_time.day_of_week, self.start, self.end)
+            if day != self.holiday and (session_time, day) != (self.session_times[0], self.full_day)
+        }
+
+    def search_all(self, **filters):
+        rows, page = [], 1
+        while True:
+            result = search_open_slots(self.start, self.end, page=page, page_size=7, **filters)
+            rows += result['results']
+            if not result['has_next']:
+                return rows
+            page += 1
+
+    def test_results_exclude_holidays_full_and_inactive_slots(self):
+        rows = self.search_all()
+        self.assertEqual({(row['session_time_id'], row['date']) for row in rows}, self.expected())
+        self.assertEqual(len(rows), len(self.expected()))
+        for row in rows:
+            self.assertEqual(row['final_price'], SessionTime.objects.get(pk=row['session_time_id']).fixed_price)
+            self.assertGreaterEqual(row['remaining_capacity'], 1)
+
+    def test_orderings(self):
+        by_price = [(row['final_price'], row['date']) for row in self.search_all(order_by='price')]
+        self.assertEqual(by_price, sorted(by_price))
+        by_start = [(row['date'], row['start_time']) for row in self.search_all(order_by='start')]
+        self.assertEqual(by_start, sorted(by_start))
+
+    def test_filters(self):
+        rows = self.search_all(tags=[self.tag.pk], start_time=time(9), end_time=time(13))
+        self.assertEqual({(row['session_time_id'], row['date']) for row in rows},
+                         self.expected([session_time for session_time in self.session_times
+                                        if session_time.day_of_week in (1, 3)]))
+        self.assertEqual(self.search_all(min_capacity=3), [])
+
+    def test_range_is_clamped_to_the_snapshot_horizon(self):
+        result = search_open_slots(self.start - timedelta(days=30), self.end + timedelta(days=365), page_size=1000)
+        self.assertEqual((result['start_date'], result['end_date']), (self.start, self.end))
+        self.assertEqual(len(result['results']), len(self.expected()))
+
+        result = search_open_slots(self.end + timedelta(days=1), self.end + timedelta(days=60))
+        self.assertEqual(result['results'], [])
+        self.assertFalse(result['has_next'])
+
+    def test_no_results_before_snapshots_are_built(self):
+        SessionPriceSnapshot.objects.all().delete()
+        self.assertEqual(search_open_slots(self.start, self.end)['results'], [])
+
+    def test_invalid_ordering_and_page(self):
+        for arguments in [{'order_by': 'capacity'}, {'order_by': None}, {'page': 0}, {'page_size': 0}]:
+            with self.assertRaises(ValidationError, msg=arguments):
+                search_open_slots(self.start, self.end, **arguments)
+
+
+class BookSessionTests(GymTestMixin, TestCase):
+    """book_session ردیف لغو یا منقضی‌شده قبلی کاربر را دوباره فعال می‌کند و رزرو تکراری را رد می‌کند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        cls.users = cls.create_customers(3)
+        facility = cls.create_facility(manager)
+        cls.session_time = cls.create_evening_session(facility)
+        start = timezone.localdate() + timedelta(days=7)
+        cls.day = weekday_dates(2, start, start + timedelta(days=6))[0]
+        Discount.objects.create(
+            name='تخفیف', code='OFF', target_type='code', discount_type='fixed', amount=Decimal('20000'),
+            start_date=start - timedelta(days=30), end_date=start + timedelta(days=30)
+        )
+
+    def booked(self):
+        return SessionDayOccupancy.objects.get(session_time=self.session_time, date=self.day).booked_count
+
+    def test_rebooking_after_cancellation_reuses_the_row(self):
+        first = book_session(self.users[0], self.session_time, self.day)
+        first.cancel('تغییر برنامه')
+        self.assertEqual(self.booked(), 0)
+
+        again = book_session(self.users[0], self.session_time, self.day, discount_code='OFF')
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual((again.status, again.cancellation_reason, again.cancellation_date), ('pending', '', None))
+        self.assertEqual((again.original_price, again.discount_amount, again.final_price),
+                         (Decimal('200000'), Decimal('20000'), Decimal('180000')))
+        self.assertEqual(Reservation.objects.filter(user=self.users[0]).count(), 1)
+        self.assertEqual(self.booked(), 1)
+
+    def test_rebooking_after_expiry_reuses_the_row(self):
+        first = book_session(self.users[0], self.session_time, self.day, discount_code='OFF')
+        first.expire()
+        again = book_session(self.users[0], self.session_time, self.day)
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual((again.discount, again.final_price), (None, Decimal('200000')))
+        self.assertEqual(self.booked(), 1)
+
+    def test_active_or_completed_reservation_is_rejected(self):
+        first = book_session(self.users[0], self.session_time, self.day)
+        with self.assertRaisesMessage(ValidationError, 'قبلاً این سانس را در این تاریخ رزرو'):
+            book_session(self.users[0], self.session_time, self.day)
+        Reservation.objects.filter(pk=first.pk).update(status='completed')
+        with self.assertRaisesMessage(ValidationError, 'قبلاً این سانس را در این تاریخ رزرو'):
+            book_session(self.users[0], self.session_time, self.day)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_full_session_is_rejected(self):
+        book_session(self.users[0], self.session_time, self.day)
+        book_session(self.users[1], self.session_time, self.day)
+        with self.assertRaisesMessage(ValidationError, 'ظرفیت این سانس تکمیل است'):
+            book_session(self.users[2], self.session_time, self.day)
+        self.assertEqual(self.booked(), 2)
+
+
+class AvailabilityCacheTests(GymTestMixin, TestCase):
+    """کش ظرفیت و جدول هفتگی با تغییر رزرو، سانس و تعطیلات باطل می‌شود و اعتبارسنجی رزرو به آن تکیه نمی‌کند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        cls.users = cls.create_customers(3)
+        cls.facility = cls.create_facility(manager)
+        cls.session_time = cls.create_evening_session(cls.facility)
+        cls.day = cls.next_week_day(2)
+
+    def reserve(self, user):
+        return Reservation.objects.create(user=user, session_time=self.session_time, date=self.day)
+
+    def test_file_cache_is_separate_per_database(self):
+        from core import settings as project_settings
+
+        # اجراکننده تست نام دیتابیس را عوض می‌کند؛ پوشه با هش 12 رقمی نام دیتابیس اصلی ساخته شده است
+        location = project_settings.CACHES['default']['LOCATION']
+        self.assertEqual(location.parent, project_settings.DATA_DIR / 'cache')
+        self.assertRegex(location.name, r'^[0-9a-f]{12}$')
+        # تست‌ها روی کش حافظه پروسه اجرا می‌شوند
+        self.assertIsInstance(caches['default'], LocMemCache)
+
+    def test_reservation_changes_invalidate_the_capacity_key(self):
+        self.assertEqual(get_taken_seats(self.session_time.pk, self.day), 0)
+        self.assertEqual(get_taken_seats(self.session_time.pk, self.day), 0)
+        self.assertIsNotNone(cache.get(booked_key(self.session_time.pk, self.day)))
+
+        reservation = self.reserve(self.users[0])
+        self.assertIsNone(cache.get(booked_key(self.session_time.pk, self.day)))
+        self.assertEqual(get_taken_seats(self.session_time.pk, self.day), 1)
+        reservation.cancel('تغییر برنامه')
+        self.assertEqual(get_taken_seats(self.session_time.pk, self.day), 0)
+        self.assertEqual(cache_stats()['capacity'], {'hits': 1, 'misses': 3, 'hit_ratio': 0.25})
+
+    def test_grid_is_invalidated_by_reservations_sessions_and_holidays(self):
+        week_start = week_bounds(self.day)[0]
+
+        def slot():
+            return next(slot for slot in get_availability_grid(self.facility, week_start) if slot['date'] == self.day)
+
+        def remaining():
+            return slot()['remaining_capacity']
+
+        self.assertEqual(remaining(), 2)
+        self.assertEqual(remaining(), 2)
+        self.reserve(self.users[0])
+        self.assertEqual(remaining(), 1)
+        self.session_time.capacity = 3
+        self.session_time.save()
+        self.assertEqual(remaining(), 2)
+        Holiday.objects.create(date=self.day, description='تعطیل')
+        self.assertTrue(slot()['is_holiday'])
+        self.assertEqual(cache_stats()['grid'], {'hits': 1, 'misses': 4, 'hit_ratio': 0.2})
+
+    def test_reservation_validation_reads_the_database_counter(self):
+        # کش کهنه (مثلا نوشته‌شده در worker دیگر) نه رزرو را در ظرفیت پر می‌پذیرد و نه در ظرفیت خالی رد می‌کند
+        SessionDayOccupancy.objects.create(session_time=self.session_time, date=self.day, capacity=2)
+        self.assertEqual(self.session_time.get_remaining_capacity(self.day), 2)
+        SessionDayOccupancy.objects.filter(session_time=self.session_time, date=self.day).update(booked_count=2)
+        self.assertEqual(self.session_time.get_remaining_capacity(self.day), 2)
+        with self.assertRaisesMessage(ValidationError, 'ظرفیت این سانس تکمیل است'):
+            Reservation(user=self.users[0], session_time=self.session_time, date=self.day).clean()
+
+        SessionDayOccupancy.objects.filter(session_time=self.session_time, date=self.day).update(booked_count=0)
+        cache.set(booked_key(self.session_time.pk, self.day), (2, None))
+        self.assertEqual(self.session_time.get_remaining_capacity(self.day), 0)
+        Reservation(user=self.users[1], session_time=self.session_time, date=self.day).clean()
+
+    def test_cache_stats_without_reads(self):
+        self.assertEqual(cache_stats(), {
+            'capacity': {'hits': 0, 'misses': 0, 'hit_ratio': 0},
+            'grid': {'hits': 0, 'misses': 0, 'hit_ratio': 0},
+        })
+
+
+class SeatHoldTests(GymTestMixin, TestCase):
+    """نگه‌داری جا از ظرفیت کم می‌شود، با تایید به رزرو تبدیل و پس از انقضا هنگام خواندن ظرفیت آزاد می‌شود."""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = cls.create_manager()
+        cls.users = cls.create_customers(3)
+        facility = cls.create_facility(manager)
+        cls.session_time = cls.create_evening_session(facility)
+        cls.day = cls.next_week_day(2)
+
+    def counts(self):
+        return SessionDayOccupancy.objects.filter(session_time=self.session_time, date=self.day).values_list(
+            'booked_count', 'held_count'
+        ).get()
+
+    def expire(self, seat_hold):
+        past = timezone.now() - timedelta(seconds=1)
+        SeatHold.objects.filter(pk=seat_hold.pk).update(expires_at=past)
+        SessionDayOccupancy.objects.filter(session_time=self.session_time, date=self.day).update(
+            next_hold_expiry=past
+        )
+        cache.clear()
+
+    def test_hold_takes_capacity_until_full(self):
+        first = hold_seat(self.users[0], self.session_time, self.day)
+        self.assertEqual(hold_seat(self.users[0], self.session_time, self.day).pk, first.pk)
+        self.assertEqual(self.session_time.get_remaining_capacity(self.day), 1)
+
+        hold_seat(self.users[1], self.session_time, self.day)
+        self.assertEqual(self.counts(), (0, 2))
+        with self.assertRaisesMessage(ValidationError, 'ظرفیت این سانس تکمیل است'):
+            hold_seat(self.users[2], self.session_time, self.day)
+        self.assertEqual(SeatHold.objects.count(), 2)
+
+    def test_confirm_turns_the_hold_into_a_reservation(self):
+        reservation = confirm_hold(hold_seat(self.users[0], self.session_time, self.day))
+
+        self.assertEqual((reservation.status, reservation.final_price), ('confirmed', Decimal('200000')))
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_confirm_reuses_a_cancelled_reservation(self):
+        cancelled = book_session(self.users[0], self.session_time, self.day)
+        cancelled.cancel('تغییر برنامه')
+
+        reservation = confirm_hold(hold_seat(self.users[0], self.session_time, self.day))
+        self.assertEqual((reservation.pk, reservation.status), (cancelled.pk, 'confirmed'))
+        self.assertIsNone(reservation.cancellation_date)
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_hold_is_rejected_for_an_active_reservation(self):
+        book_session(self.users[0], self.session_time, self.day)
+        with self.assertRaisesMessage(ValidationError, 'قبلاً این سانس را در این تاریخ رزرو'):
+            hold_seat(self.users[0], self.session_time, self.day)
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_expired_hold_is_reclaimed_lazily(self):
+        seat_hold = hold_seat(self.users[0], self.session_time, self.day)
+        hold_seat(self.users[1], self.session_time, self.day)
+        entry = join_waitlist(self.users[2], self.session_time, self.day)
+        self.expire(seat_hold)
+
+        # خواندن ظرفیت نگه‌داری منقضی‌شده را آزاد و جایش را به لیست انتظار می‌دهد
+        self.assertEqual(self.session_time.get_remaining_capacity(self.day), 0)
+        self.assertFalse(SeatHold.objects.filter(pk=seat_hold.pk).exists())
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.reservation.status), ('promoted', 'pending'))
+        self.assertEqual(self.counts(), (1, 1))
+        with self.assertRaisesMessage(ValidationError, 'این جا به پایان رسیده است'):
+            confirm_hold(seat_hold)
+
+    def test_expired_hold_can_be_confirmed_before_it_is_reclaimed(self):
+        seat_hold = hold_seat(self.users[0], self.session_time, self.day)
+        self.expire(seat_hold)
+
+        self.assertEqual(confirm_hold(seat_hold).status, 'confirmed')
+        self.assertEqual(self.counts(), (1, 0))
+        self.assertEqual(reclaim_expired_holds(), 0)
+
+
+class JalaliTableTests(SimpleTestCase):
+    """جدول‌های gym/jalali.py در کل بازه پشتیبانی‌شده با jdatetime مقایسه می‌شوند."""
+
+    def test_gregorian_to_jalali_matches_jdatetime(self):
+        first = jalali.to_gregorian(jalali.FIRST_YEAR, 1, 1)
+        last = jalali.to_gregorian(jalali.LAST_YEAR, 12, jalali.month_length(jalali.LAST_YEAR, 12))
+        day = jdatetime.date(jalali.FIRST_YEAR, 1, 1)
+        for ordinal in range(first.toordinal(), last.toordinal() + 1):
+            gregorian = date.fromordinal(ordinal)
+            self.assertEqual(jalali.to_jalali(gregorian), (day.year, day.month, day.day))
+            self.assertEqual(jalali.to_gregorian(day.year, day.month, day.day), gregorian)
+            day += timedelta(days=1)
+
+    def test_leap_years_and_invalid_dates(self):
+        for year in range(jalali.FIRST_YEAR, jalali.LAST_YEAR + 1):
+            self.assertEqual(jalali.is_leap(year), jdatetime.date(year, 1, 1).isleap())
+            if not jalali.is_leap(year):
+                with self.assertRaises(ValueError):
+                    jalali.to_gregorian(year, 12, 30)
+        with self.assertRaises(ValueError):
+            jalali.to_gregorian(1403, 7, 31)
+
+    def test_format_matches_strftime(self):
+        for day in [date(1850, 3, 20), date(2024, 3, 20), date(2025, 3, 21), date(2100, 12, 31), date(1700, 1, 1)]:
+            self.assertEqual(jalali.format_date(day), jdatetime.date.fromgregorian(date=day).strftime('%Y/%m/%d'))
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN فقط در SQLite')
+class QueryPlanTests(TestCase):
+    """پرس‌وجوهای پرتکرار رزرو باید با ایندکس اجرا شوند، نه با پیمایش کامل جدول."""
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[3] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, table):
+        plan = self.query_plan(queryset)
+        steps = [step for step in plan if step.split()[1:2] == [table]]
+        self.assertTrue(steps, plan)
+        for step in steps:
+            self.assertTrue(step.startswith('SEARCH') and 'USING' in step, plan)
+
+    def test_reservation_hot_paths_use_indexes(self):
+        today = timezone.localdate()
+        queries = {
+            'capacity': Reservation.objects.filter(
+                session_time_id=1, date=today, status__in=Reservation.ACTIVE_STATUSES
+            ),
+            'duplicate': Reservation.objects.filter(
+                user_id=1, session_time_id=1, date=today, status__in=['confirmed', 'pending']
+            ).exclude(pk=1),
+            'discount_usage': Reservation.objects.filter(discount_id=1, user_id=1, status='confirmed'),
+            'cleanup': Reservation.objects.filter(status='pending', date__lt=today),
+            'recurring': Reservation.objects.filter(recurring_reservation_id=1, status='confirmed'),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(name):
+                # count() و exists() ترتیب پیش‌فرض را حذف می‌کنند
+                self.assertUsesIndex(queryset.order_by(), 'gym_reservation')
+
+    def test_occupancy_and_session_lookups_use_indexes(self):
+        self.assertUsesIndex(
+            SessionDayOccupancy.objects.filter(session_time_id=1, date=timezone.localdate()),
+            'gym_sessiondayoccupancy'
+        )
+        self.assertUsesIndex(
+            SessionTime.objects.filter(facility_id=1, day_of_week=2, is_active=True).order_by(),
+            'gym_sessiontime'
+        )
+
+
+class BookingLoadTests(GymTestMixin, TransactionTestCase):
+    """رزرو هم‌زمان آخرین ظرفیت‌های یک سانس با چند thread نباید از ظرفیت عبور کند."""
+
+    def test_concurrent_bookings_never_overbook(self):
+        manager = self.create_manager()
+        facility = self.create_facility(manager)
+        session_time = self.create_evening_session(facility, capacity=5)
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        day = weekday_dates(session_time.day_of_week, tomorrow, tomorrow + timedelta(days=6))[0]
+        users = self.create_customers(40)
+
+        report = hammer_booking(session_time, day, users, threads=8)
+
+        self.assertEqual(report['attempts'], len(users))
+        self.assertEqual(report['overbooked'], 0)
+        self.assertEqual(report['booked'], report['active_reservations'])
+        self.assertEqual(report['occupancy_count'], report['active_reservations'])
+        self.assertLessEqual(report['booked'], session_time.capacity)
+        self.assertGreater(report['booked'], 0)
+        self.assertGreater(report['throughput_per_second'], 0)
+
+
+class HolidayCalendarTransactionTests(GymTestMixin, TransactionTestCase):
+    """تقویم کش‌شده پروسه نباید تعطیلات یک تراکنش rollback شده را نگه دارد یا پس از commit کهنه بماند."""
+
+    def setUp(self):
+        super().setUp()
+        self.day = timezone.localdate() + timedelta(days=3)
+
+    def test_rolled_back_holiday_is_not_cached(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Holiday.objects.create(date=self.day, description='تعطیل')
+                self.assertTrue(get_holiday_calendar().is_holiday(self.day))
+                raise RuntimeError
+
+        self.assertFalse(get_holiday_calendar().is_holiday(self.day))
+        with self.assertNumQueries(0):
+            get_holiday_calendar()
+
+    def test_calendar_cached_during_transaction_is_dropped_on_commit(self):
+        get_holiday_calendar()
+        with transaction.atomic():
+            Holiday.objects.create(date=self.day, description='تعطیل')
+            # پروسه یا thread دیگری در طول تراکنش داده‌های commit شده قبلی را کش می‌کند
+            holidays._calendar = HolidayCalendar(holiday_calendar_version(), [], [])
+            self.assertTrue(get_holiday_calendar().is_holiday(self.day))
+
+        self.assertTrue(get_holiday_calendar().is_holiday(self.day))
+        with self.assertNumQueries(0):
+            get_holiday_calendar()
+
+    def test_transaction_without_holiday_changes_shares_the_cache(self):
+        cached = get_holiday_calendar()
+        with transaction.atomic():
+            self.assertIs(get_holiday_calendar(), cached)
+
+
+class WaitlistTransactionTests(GymTestMixin, TransactionTestCase):
+    """ظرفیت آزادشده با لغو یا انقضا به اولین درخواست معتبر لیست انتظار می‌رسد، حتی با لغوهای هم‌زمان."""
+
+    def setUp(self):
+        super().setUp()
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(DATA_DIR=directory))
+        manager = self.create_manager()
+        facility = self.create_facility(manager)
+        self.session_time = self.create_evening_session(facility)
+        self.day = self.next_week_day(2)
+        self.users = self.create_customers(4)
+        self.reservations = [book_session(user, self.session_time, self.day) for user in self.users[:2]]
+        self.entries = [join_waitlist(user, self.session_time, self.day) for user in self.users[2:]]
+
+    def booked(self):
+        return SessionDayOccupancy.objects.get(session_time=self.session_time, date=self.day).booked_count
+
+    def statuses(self):
+        return list(WaitlistEntry.objects.order_by('pk').values_list('status', flat=True))
+
+    def test_cancel_promotes_the_first_entry(self):
+        entry = self.reservations[0].cancel('تغییر برنامه')
+
+        self.assertEqual((entry.pk, entry.status), (self.entries[0].pk, 'promoted'))
+        self.assertEqual((entry.reservation.user_id, entry.reservation.status),
+                         (self.users[2].pk, 'pending'))
+        self.assertIsNotNone(entry.reservation.hold_expires_at)
+        self.assertEqual(self.statuses(), ['promoted', 'waiting'])
+        self.assertEqual(self.booked(), 2)
+
+    def test_expired_promotion_passes_to_the_next_entry(self):
+        promoted = self.reservations[0].cancel('تغییر برنامه').reservation
+
+        self.assertEqual(expire_pending_reservations(promoted.hold_expires_at + timedelta(seconds=1)), (1, 1))
+        promoted.refresh_from_db()
+        self.assertEqual(promoted.status, 'expired')
+        self.assertEqual(self.statuses(), ['promoted', 'promoted'])
+        self.assertEqual(
+            Reservation.objects.get(user=self.users[3], session_time=self.session_time, date=self.day).status,
+            'pending'
+        )
+        self.assertEqual(self.booked(), 2)
+
+    def test_concurrent_cancellations_promote_different_entries(self):
+        barrier = threading.Barrier(2)
+        results, errors = [], []
+
+        def cancel(pk):
+            try:
+                barrier.wait()
+                results.append(run_with_retry(lambda: Reservation.objects.get(pk=pk).cancel('تغییر برنامه')))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=cancel, args=(reservation.pk,)) for reservation in self.reservations]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(entry.pk for entry in results), [entry.pk for entry in self.entries])
+        self.assertEqual(self.statuses(), ['promoted', 'promoted'])
+        self.assertEqual(
+            set(Reservation.objects.filter(status='pending').values_list('user_id', flat=True)),
+            {user.pk for user in self.users[2:]}
+        )
+        self.assertEqual(self.booked(), 2)
+
+    def test_entries_failing_validation_are_skipped(self):
+        Holiday.objects.create(date=self.day, description='تعطیل')
+
+        self.assertIsNone(self.reservations[0].cancel('تعطیلی'))
+        self.assertEqual(self.statuses(), ['cancelled', 'cancelled'])
+        self.assertEqual(Reservation.objects.filter(user__in=self.users[2:]).count(), 0)
+        self.assertEqual(self.booked(), 1)
+
+
+class DateDimensionTests(GymTestMixin, TransactionTestCase):
+    """شمارش روزهای قابل رزرو و گزارش ماهانه روی جدول DateDimension با تقویم تعطیلات یکی است."""
+
+    def setUp(self):
+        super().setUp()
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(DATA_DIR=directory))
+        rng = random.Random(23)
+        self.start = timezone.localdate()
+        self.end = self.start + timedelta(days=800)
+        for offset in rng.sample(range(800), 60):
+            Holiday.objects.create(date=self.start + timedelta(days=offset), description='یکبار')
+        for month, day in [(1, 1), (1, 13), (12, 30)]:
+            Holiday.objects.create(is_recurring=True, jalali_month=month, jalali_day=day, description='سالانه')
+        date_dimension.build_date_dimension(self.start, self.end)
+        self.periods = [(self.start + timedelta(days=first), self.start + timedelta(days=first + length))
+                        for first, length in [(0, 800), (40, 6), (75, 0), (300, 95), (10, -5)]]
+
+    def assert_counts(self, periods):
+        for weekday in range(7):
+            for start_date, end_date in periods:
+                expected = holidays.bookable_dates(weekday, start_date, end_date)
+                self.assertEqual(date_dimension.bookable_dates(weekday, start_date, end_date), expected)
+                self.assertEqual(date_dimension.count_bookable(weekday, start_date, end_date), len(expected))
+                self.assertEqual(RecurringReservation(
+                    session_time=SessionTime(day_of_week=weekday), start_date=start_date, end_date=end_date
+                ).get_total_sessions(), len(expected))
+
+    def test_build_matches_the_calendar(self):
+        calendar = get_holiday_calendar()
+        rows = list(DateDimension.objects.all())
+        self.assertEqual(len(rows), 801)
+        for row in rows:
+            self.assertEqual((row.jalali_year, row.jalali_month, row.jalali_day), jalali.to_jalali(row.date))
+            self.assertEqual(row.persian_weekday, (row.date.weekday() + 2) % 7)
+            self.assertEqual(row.is_weekend, row.persian_weekday in (5, 6))
+            self.assertEqual(row.is_holiday, calendar.is_holiday(row.date))
+
+    def test_counts_from_the_table(self):
+        self.assertTrue(date_dimension.dimension_covers(*self.periods[0]))
+        self.assert_counts(self.periods)
+        with self.assertNumQueries(2):
+            date_dimension.count_bookable(3, *self.periods[0])
+
+    def test_counts_outside_the_table_fall_back_to_the_calendar(self):
+        period = (self.end - timedelta(days=30), self.end + timedelta(days=60))
+        self.assertFalse(date_dimension.dimension_covers(*period))
+        self.assert_counts([period])
+
+    def test_holiday_change_refreshes_the_flag_after_commit(self):
+        day = next(day for day in weekday_dates(2, self.start + timedelta(days=7), self.end)
+                   if not DateDimension.objects.get(date=day).is_holiday)
+        with transaction.atomic():
+            holiday = Holiday.objects.create(date=day, description='یکبار')
+            # تا commit پرچم جدول قدیمی است و شمارش از تقویم تراکنش خوانده می‌شود
+            self.assertFalse(DateDimension.objects.get(date=day).is_holiday)
+            self.assertFalse(date_dimension.dimension_covers(day, day))
+            self.assertEqual(date_dimension.count_bookable(2, day, day), 0)
+        self.assertTrue(DateDimension.objects.get(date=day).is_holiday)
+        self.assertEqual(date_dimension.count_bookable(2, day, day), 0)
+
+        holiday.delete()
+        self.assertFalse(DateDimension.objects.get(date=day).is_holiday)
+        self.assertEqual(date_dimension.count_bookable(2, day, day), 1)
+
+    def test_monthly_report(self):
+        manager = self.create_manager()
+        user, = self.create_customers(1)
+        facility = self.create_facility(manager)
+        session_time = self.create_evening_session(facility, capacity=10)
+        days = date_dimension.bookable_dates(2, self.start + timedelta(days=7), self.start + timedelta(days=120))
+        for day in days:
+            Reservation.objects.create(user=user, session_time=session_time, date=day, status='confirmed')
+
+        expected = {}
+        for reservation in Reservation.objects.all():
+            key = jalali.to_jalali(reservation.date)[:2]
+            count, revenue = expected.get(key, (0, Decimal('0')))
+            expected[key] = (count + 1, revenue + reservation.final_price)
+
+        with self.assertNumQueries(1):
+            report = date_dimension.monthly_report(Reservation.objects.all())
+        self.assertGreater(len(report), 1)
+        self.assertEqual(
+            {(row['jalali_year'], row['jalali_month']): (row['reservations'], row['revenue']) for row in report},
+            expected
+        )
+        self.assertEqual([(row['jalali_year'], row['jalali_month']) for row in report], sorted(expected))
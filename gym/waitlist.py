@@ -0,0 +1,143 @@
+"""
+لیست انتظار سانس‌های تکمیل‌شده.
+
+با لغو (Reservation.cancel) یا انقضای (Reservation.expire) یک رزرو، promote_next در همان تراکنش
+اولین درخواست منتظر همان سانس و تاریخ را با یک پرس‌وجوی قفل‌دار (SELECT ... FOR UPDATE SKIP LOCKED)
+برمی‌دارد و برای آن رزرو در انتظار پرداخت با مهلت WAITLIST_HOLD_MINUTES می‌سازد؛ ظرفیت آزادشده
+مستقیماً به نفر بعدی می‌رسد و لغوهای هم‌زمان درخواست‌های متفاوتی را برمی‌دارند.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .booking import reservation_for
+from .models import Reservation, WaitlistEntry
+
+
+def hold_window():
+    """مهلت پرداخت رزروی که از لیست انتظار ساخته می‌شود"""
+    return timedelta(minutes=getattr(settings, 'WAITLIST_HOLD_MINUTES', 30))
+
+
+def join_waitlist(user, session_time, date):
+    """ثبت کاربر در لیست انتظار یک سانس تکمیل‌شده"""
+    if not session_time.is_full(date):
+        raise ValidationError(_("این سانس ظرفیت خالی دارد و مستقیماً قابل رزرو است."))
+    if Reservation.objects.filter(
+            user=user,
+            session_time=session_time,
+            date=date,
+            status__in=Reservation.ACTIVE_STATUSES
+    ).exists():
+        raise ValidationError(_("شما قبلاً این سانس را در این تاریخ رزرو کرده‌اید."))
+
+    try:
+        with transaction.atomic():
+            return WaitlistEntry.objects.create(user=user, session_time=session_time, date=date)
+    except IntegrityError:
+        raise ValidationError(_("شما قبلاً در لیست انتظار این سانس هستید."))
+
+
+def _reserve(entry, now):
+    """
+    رزرو در انتظار پرداخت برای درخواست با همان اعتبارسنجی رزرو مستقیم (Reservation.clean)؛
+    ردیف لغو یا منقضی‌شده قبلی همین کاربر دوباره استفاده می‌شود
+    """
+    reservation = reservation_for(entry.user, entry.session_time, entry.date)
+    reservation.status = 'pending'
+    reservation.hold_expires_at = now + hold_window()
+    reservation.notes = _("ایجاد شده از لیست انتظار")
+    # قیمت‌ها در save محاسبه می‌شوند
+    reservation.full_clean(exclude=['original_price', 'final_price'], validate_unique=False)
+    if reservation.pk:
+        reservation.calculate_prices()
+    reservation.save()
+    return reservation
+
+
+def promote_next(session_time, date):
+    """
+    تبدیل اولین درخواست منتظر سانس و تاریخ به رزرو در انتظار پرداخت.
+    درخواستی که رزروش در اعتبارسنجی رد شود (مثلا روز تعطیل شده) لغو و درخواست بعدی بررسی می‌شود.
+    اگر درخواستی نباشد یا ظرفیت آزاد نباشد None برگردانده می‌شود.
+    """
+    now = timezone.now()
+    if date < timezone.localdate():
+        return None
+
+    with transaction.atomic():
+        while True:
+            entry = WaitlistEntry.objects.select_for_update(skip_locked=True).select_related(
+                'session_time'
+            ).filter(
+                session_time=session_time,
+                date=date,
+                status='waiting'
+            ).order_by('created_at', 'pk').first()
+            if entry is None:
+                return None
+
+            if Reservation.objects.filter(
+                    user_id=entry.user_id,
+                    session_time=session_time,
+                    date=date,
+                    status__in=Reservation.ACTIVE_STATUSES
+            ).exists():
+                # کاربر در این فاصله خودش رزرو کرده است
+                entry.status = 'cancelled'
+                entry.save(update_fields=['status'])
+                continue
+
+            try:
+                with transaction.atomic():
+                    reservation = _reserve(entry, now)
+            except ValidationError:
+                if session_time.get_remaining_capacity(date, cached=False) == 0:
+                    # ظرفیت آزادشده را رزرو دیگری گرفته است؛ درخواست منتظر می‌ماند
+                    return None
+                # سانس و تاریخ برای این درخواست دیگر قابل رزرو نیست (مثلا تعطیل شده)؛ سراغ درخواست بعدی
+                entry.status = 'cancelled'
+                entry.save(update_fields=['status'])
+                continue
+
+            entry.status = 'promoted'
+            entry.reservation = reservation
+            entry.promoted_at = now
+            entry.save(update_fields=['status', 'reservation', 'promoted_at'])
+            return entry
+
+
+def expire_waitlist(today=None):
+    """منقضی کردن درخواست‌های منتظر تاریخ‌های گذشته"""
+    return WaitlistEntry.objects.filter(
+        status='waiting',
+        date__lt=today or timezone.localdate()
+    ).update(status='expired')
+
+
+def expire_pending_reservations(now=None):
+    """
+    منقضی کردن رزروهای در انتظار پرداخت که مهلتشان گذشته و واگذاری ظرفیت آن‌ها به لیست انتظار.
+    خروجی: (تعداد رزروهای منقضی‌شده، تعداد درخواست‌های تبدیل‌شده به رزرو)
+    """
+    now = now or timezone.now()
+    expired = promoted = 0
+    for pk in list(Reservation.objects.filter(
+            status='pending',
+            hold_expires_at__lt=now
+    ).values_list('pk', flat=True)):
+        with transaction.atomic():
+            reservation = Reservation.objects.select_for_update().select_related('session_time').filter(
+                pk=pk,
+                status='pending'
+            ).first()
+            if reservation is None:
+                continue
+            expired += 1
+            if reservation.expire():
+                promoted += 1
+    return expired, promoted